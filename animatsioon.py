@@ -0,0 +1,94 @@
+"""
+Animatsioon – mängukell ja ajapõhised üleminekud (tween)
+
+Kell: mängu aeg (ms), mis võetakse kaadri uuenduse alguses üks kord ja mida kasutab
+kogu ülejäänud kaader (animatsioonide algus, teadete lõpp, joonistamine). Mängus pole
+olekut, mida peaks kindla sammuga edasi arvutama: kõik animatsioonid on ajast arvutatud
+üleminekud, seega piisab ühest ajast kaadri kohta ja vahele jäänud kaadrid ei muuda midagi.
+
+Animatsioonid: nimega üleminekud väärtusest algus väärtusesse lõpp kestus_ms jooksul.
+Väärtus arvutatakse alati ajast (mitte kaadrite arvust), seega on ajastus õige ka siis,
+kui kaadreid jääb vahele. Kui animatsioonil on ala, joonistatakse see ala uuesti, kuni
+animatsioon käib (vt game.py osaline uuendus); ilma alata animatsioon on lihtsalt taimer.
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Callable, Hashable, Optional
+
+import pygame
+
+def lineaarne(t: float) -> float:
+    return t
+
+
+def sujuv(t: float) -> float:
+    """Kiire algus, aeglane lõpp (ease-out cubic)."""
+    return 1 - (1 - t) ** 3
+
+
+class Kell:
+    """Kaadri mänguaeg; samas skaalas kui edasi()-le antud aeg (game.main aeg(), ms)."""
+
+    def __init__(self, algus: float):
+        self.aeg = float(algus)
+
+    def edasi(self, praegu: float) -> None:
+        """Kaadri uus aeg; aeg ei lähe kunagi tagasi."""
+        self.aeg = max(self.aeg, float(praegu))
+
+
+@dataclass
+class Üleminek:
+    algus: float
+    lõpp: float
+    algusaeg: float
+    kestus_ms: float
+    kõver: Callable[[float], float] = sujuv
+    ala: Optional[pygame.Rect] = None
+
+    @property
+    def lõpuaeg(self) -> float:
+        return self.algusaeg + self.kestus_ms
+
+    def väärtus(self, aeg: float) -> float:
+        t = min(1.0, max(0.0, (aeg - self.algusaeg) / self.kestus_ms)) if self.kestus_ms > 0 else 1.0
+        return self.algus + (self.lõpp - self.algus) * self.kõver(t)
+
+
+class Animatsioonid:
+    """Käimasolevad üleminekud nime järgi; sama nimega uus üleminek asendab vana."""
+
+    def __init__(self):
+        self._üleminekud: dict[Hashable, Üleminek] = {}
+
+    def alusta(self, nimi: Hashable, algus: float, lõpp: float, kestus_ms: float, aeg: float,
+               kõver: Callable[[float], float] = sujuv, ala: Optional[pygame.Rect] = None) -> None:
+        self._üleminekud[nimi] = Üleminek(algus, lõpp, aeg, kestus_ms, kõver, ala)
+
+    def käib(self, nimi: Hashable, aeg: float) -> bool:
+        ü = self._üleminekud.get(nimi)
+        return ü is not None and aeg < ü.lõpuaeg
+
+    def väärtus(self, nimi: Hashable, aeg: float, vaikimisi: float = 1.0) -> float:
+        """Ülemineku väärtus ajal aeg; kui sellist pole või see on lõppenud, siis vaikimisi."""
+        ü = self._üleminekud.get(nimi)
+        return ü.väärtus(aeg) if ü is not None and aeg < ü.lõpuaeg else vaikimisi
+
+    def lõpuaeg(self, nimi: Hashable) -> float:
+        ü = self._üleminekud.get(nimi)
+        return ü.lõpuaeg if ü is not None else 0.0
+
+    def seis(self, aeg: float) -> tuple:
+        """Alaga üleminekute (nimi, väärtus, ala) – muutub iga kaader, kuni mõni käib."""
+        return tuple((n, round(ü.väärtus(aeg), 3), tuple(ü.ala)) for n, ü in self._üleminekud.items()
+                     if ü.ala is not None and aeg < ü.lõpuaeg)
+
+    def uuenda(self, aeg: float) -> None:
+        """Unustab lõppenud üleminekud (kord kaadris)."""
+        for n in [n for n, ü in self._üleminekud.items() if aeg >= ü.lõpuaeg]:
+            del self._üleminekud[n]
+
+    def tühjenda(self) -> None:
+        self._üleminekud.clear()
@@ -12,27 +12,53 @@ Kontrollid:
  - Hiireklikk: vali objekt / vali vastus / kliki uksel
  - 1-4: vali vastus klaviatuurilt
  - ESC: sulge küsimus / mine tagasi
- - F3: debug (näitab klikialasid ja prindib koordinaate)
- - R: reset (kustutab salvestuse)
+ - F3: debug (näitab klikialasid, kaadriaegade graafikut ja prindib koordinaate)
+ - F4: salvestab viimaste sekundite kaadriajad (profiil_*.csv ja profiil_*.json)
+ - R: reset (kustutab selle mängija progressi)
+ - Tab: vaheta mängijat (igal õpilasel oma profiil ja progress)
+
+Käivitusaeg: python game.py --käivitusaeg [MS] näitab aega esimese kaadrini osade kaupa
+ja lõpetab (kood 1, kui eelarve MS on ületatud).
 
 Failid:
- - küsimused.json (küsimused + objektide asukohad)
- - salvestus.json (luuakse automaatselt; progress)
+ - küsimused.json (küsimused + objektide asukohad; "mall" = parameetritega küsimus, vt mallid.py)
+ - progress.db (luuakse automaatselt; kõigi mängijate progress, vt mangijad.py)
  - pildid/ (pildid)
  - fondid, muusika/DeterminationMonoWebRegular-Z5oq.ttf (valikuline font)
 """
 
 from __future__ import annotations
 
+import csv
+import io
 import json
+import math
 import sys
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from dataclasses import dataclass
-from typing import Optional
+from typing import Callable, Iterable, NoReturn, Optional
+
+_IMPORDI_ALGUS = time.perf_counter()  # käivitusaja mõõtmise algus (vt Käivitusprofiil)
 
 import pygame
 
 import os
 
+import animatsioon
+import kysimustepank
+import mallid
+import mangijad
+import paigutus
+import stseenid
+import varad
+from helid import Helid
+from kysimustepank import küsimus
+from mangureeglid import MAKS_VEAD, Mänguseis, Tulemus
+from stseenid import Stseenihaldur, ToaKirjeldus
+from telemeetria import Telemeetria, uus_logi
+
 BASE_DIR = os.path.dirname(os.path.abspath(__file__))
 os.chdir(BASE_DIR)  # et kõik suhtelised teed (pildid/fondid/json) töötaks alati
 
@@ -60,64 +86,135 @@ AKNA_LAIUS, AKNA_KÕRGUS = 800, 600
 FPS = 60
 
 # palju vigu võib teha
-MAKS_VEAD = 3
 X_FLASH_MS = 650  # kui kaua punane X vilgub pärast viga
+PANEELI_ILMUMINE_MS = 160  # küsimuse/luku akna sissehajumine
+SÜDAME_KADUMINE_MS = 450  # kaotatud süda tõmbub kokku ja hallistub
+TÄHE_ILMUMINE_MS = 700  # uus täht uksekoodis on alguses kuldne
+PROFIILI_SEKUNDID = 10  # mitu viimast sekundit kaadriaegu F4 faili kirjutab
+OSALINE_UUENDUS = True  # joonista ainult muutunud alad ja oota sündmusi, kui midagi ei muutu
+RENDERDAJA = "pind"  # pind | sdl2 | sdl2-tarkvara (vt renderdaja.py)
+TEKSTI_VAHEMALU_BAITE = 4 * 1024 * 1024  # renderdatud teksti vahemälu suurim maht
+KIHTIDE_BAITE = 24 * 1024 * 1024  # eelrenderdatud kihtide (paneelid jm) suurim maht
+VALIKULINE_INIT = True  # käivita ainult ekraan ja fondid, mitte pygame.init() kõiki alamsüsteeme
+KÄIVITUSE_EELARVE_MS = 500  # --käivitusaeg vaikimisi eelarve esimese kaadrini
+HELID = True  # heliefektid ja taustamuusika (vt helid.py)
+MALLID = True  # malliga küsimustel igal avamisel uued arvud (vt mallid.py)
 
 KÜSIMUSTE_FAIL = "küsimused.json"
-SALVESTUS_FAIL = "salvestus.json"
+PROGRESSI_FAIL = mangijad.ANDMEBAAS  # kõigi mängijate progress (vt mangijad.py)
+SALVESTUS_FAIL = "salvestus.json"  # vana ühe mängija salvestus; viiakse esimesel käivitusel PROGRESSI_FAIL-i
+KOMPILEERI_PANK = True  # küsimuste tekst loetakse kompileeritud pangast alles avamisel (vt kysimustepank.py)
+SALVESTUSE_VIIVITUS_MS = 250  # selle aja jooksul tulnud muudatused kirjutatakse korraga
+VAIKIMISI_MÄNGIJA = mangijad.puhasta_nimi(os.environ.get("USER") or os.environ.get("USERNAME") or "") or "mangija"
+MÄNGIJAID_NÄHA = 6  # mängija valiku aknas näidatavad viimased profiilid
 
 TAUST_FAIL = os.path.join("pildid", "background.png")
 FONDI_FAIL = os.path.join("fondid, muusika", "DeterminationMonoWebRegular-Z5oq.ttf")
+VARADE_KOMPLEKT = "varad.bin"  # eelnevalt skaleeritud pildid + font (vt varad.py)
+KASUTA_KOMPLEKTI = True
+TOAD_FAIL = "toad.json"  # mitu tuba järjest (vt stseenid.py); kui faili pole, on üks tuba
+MAKS_TUBADE_MÄLU_MB = 96  # laetud tubade piltide hinnanguline ülempiir
 
 # Ukse klikiala (800x600 ekraanil)
 UKSE_RECT = pygame.Rect(690, 145, 90, 330)
 
+# Akende ja kastide asukohad
+KÜSIMUSE_PANEEL = pygame.Rect(110, 70, 580, 460)
+LUKU_PANEEL = pygame.Rect(180, 190, 440, 220)
+LUKU_SISEND = pygame.Rect(LUKU_PANEEL.x + 18, LUKU_PANEEL.y + 100, LUKU_PANEEL.width - 36, 52)
+TEATE_KAST = pygame.Rect(14, AKNA_KÕRGUS - 52, AKNA_LAIUS - 28, 40)
+X_PIKKUS = 70
+KOODI_REAVAHE = 20
+KERIMISE_SAMM = 3 * KOODI_REAVAHE  # üks hiirerulli samm
+PROFIILI_RECT = pygame.Rect(AKNA_LAIUS - 250, 58, 240, 96)
+X_RECT = pygame.Rect(AKNA_LAIUS // 2 - X_PIKKUS - 8, AKNA_KÕRGUS // 2 - X_PIKKUS - 8, 2 * X_PIKKUS + 16, 2 * X_PIKKUS + 16)
+EKRAANI_RECT = pygame.Rect(0, 0, AKNA_LAIUS, AKNA_KÕRGUS)
+KOODI_RIBA_RECT = pygame.Rect(0, 0, AKNA_LAIUS - 26 - MAKS_VEAD * 30, 48)  # "Kood: ..." ülaribal
+SÜDAMETE_RECT = pygame.Rect(KOODI_RIBA_RECT.right, 0, AKNA_LAIUS - KOODI_RIBA_RECT.right, 48)
+MÄNGIJATE_PANEEL = pygame.Rect(200, 90, 400, 420)
+MÄNGIJA_SISEND = pygame.Rect(MÄNGIJATE_PANEEL.x + 18, MÄNGIJATE_PANEEL.y + 80, MÄNGIJATE_PANEEL.width - 36, 44)
+
+
+# Loendurid (profiilija loeb neist iga kaadri muutuse)
+LOENDURID = {"pinnad": 0, "salvestused": 0}
+
 
 # Andmed ja objektid
 
-@dataclass
-class küsimus:
-    objekt: str
-    nimi: str
-    x: int
-    y: int
-    pilt: Optional[str]
-    skaala: float
-    kysimus: str
-    kood: str
-    valikud: list[str]
-    oige_vastus: int 
-    taht: str
+def skaleeri_pilt(pind: pygame.Surface, skaala: float) -> pygame.Surface:
+    if abs(skaala - 1.0) <= 1e-6:
+        return pind
+    uus_w = max(1, int(pind.get_width() * skaala))
+    uus_h = max(1, int(pind.get_height() * skaala))
+    LOENDURID["pinnad"] += 1
+    return pygame.transform.scale(pind, (uus_w, uus_h))
 
 
 class KlikitavObjekt:
-    def __init__(self, küsimus: küsimus, pilt_pind: Optional[pygame.Surface], jarjekord: int):
+    def __init__(self, küsimus: küsimus, pilt_pind: Optional[pygame.Surface], jarjekord: int, skaleeritud: bool = False):
         self.küsimus = küsimus
         self.jarjekord = jarjekord
-        self.lahendatud = False
 
         self.pilt_pind = pilt_pind
         if self.pilt_pind is not None:
-            if abs(self.küsimus.skaala - 1.0) > 1e-6:
-                uus_w = max(1, int(self.pilt_pind.get_width() * self.küsimus.skaala))
-                uus_h = max(1, int(self.pilt_pind.get_height() * self.küsimus.skaala))
-                self.pilt_pind = pygame.transform.scale(self.pilt_pind, (uus_w, uus_h))
+            if not skaleeritud:
+                self.pilt_pind = skaleeri_pilt(self.pilt_pind, self.küsimus.skaala)
             self.rect = self.pilt_pind.get_rect(topleft=(self.küsimus.x, self.küsimus.y))
+            # klikk loeb ainult pildi nähtavas (mitte läbipaistvas) osas
+            self.mask: Optional[pygame.mask.Mask] = pygame.mask.from_surface(self.pilt_pind)
         else:
             # kui pilt puudub, loome nähtamatu ala
             self.rect = pygame.Rect(self.küsimus.x, self.küsimus.y, 120, 120)
+            self.mask = None
 
-    def joonista(self, ekraan: pygame.Surface, debug: bool, hiir_peal: bool):
-        if self.pilt_pind is not None:
+    def tabab(self, pos: tuple[int, int]) -> bool:
+        if not self.rect.collidepoint(pos):
+            return False
+        if self.mask is None:
+            return True
+        return bool(self.mask.get_at((pos[0] - self.rect.x, pos[1] - self.rect.y)))
+
+    def joonista(self, ekraan: pygame.Surface, debug: bool, hiir_peal: bool, lahendatud: bool, pilt: bool = True):
+        if pilt and self.pilt_pind is not None:
             ekraan.blit(self.pilt_pind, self.rect.topleft)
 
         if debug:
-            varv = (0, 200, 0) if not self.lahendatud else (120, 120, 120)
+            varv = (0, 200, 0) if not lahendatud else (120, 120, 120)
             pygame.draw.rect(ekraan, varv, self.rect, 2)
             if hiir_peal:
                 pygame.draw.rect(ekraan, (255, 255, 255), self.rect, 1)
 
 
+class ObjektideIndeks:
+    """Ühtlane ruudustik objektide klikialade kohal.
+
+    Iga lahtri kohta on meeles objektid, mille rect seda lahtrit puudutab, pealmine
+    (viimasena joonistatud) eespool. Nii vaadatakse hiire all olevaks objektiks ainult
+    üht lahtrit, olgu toas 6 või 600 objekti. Kui objektid liiguvad, tuleb kutsuda ehita().
+    """
+
+    def __init__(self, objektid: list[KlikitavObjekt], lahter: int = 64):
+        self.objektid = objektid
+        self.lahter = lahter
+        self._lahtrid: dict[tuple[int, int], list[KlikitavObjekt]] = {}
+        self.ehita()
+
+    def ehita(self) -> None:
+        self._lahtrid = {}
+        for o in reversed(self.objektid):  # pealmised ees
+            r = o.rect
+            for cx in range(r.left // self.lahter, (r.right - 1) // self.lahter + 1):
+                for cy in range(r.top // self.lahter, (r.bottom - 1) // self.lahter + 1):
+                    self._lahtrid.setdefault((cx, cy), []).append(o)
+
+    def leia(self, pos: tuple[int, int]) -> Optional[KlikitavObjekt]:
+        """Pealmine objekt, mille nähtav osa on punktis pos."""
+        for o in self._lahtrid.get((pos[0] // self.lahter, pos[1] // self.lahter), ()):
+            if o.tabab(pos):
+                return o
+        return None
+
+
 # Failiabi
 
 def lae_pilt(tee: str) -> Optional[pygame.Surface]:
@@ -126,115 +223,382 @@ def lae_pilt(tee: str) -> Optional[pygame.Surface]:
     if not os.path.exists(tee):
         return None
     try:
+        LOENDURID["pinnad"] += 1
         return pygame.image.load(tee).convert_alpha()
     except pygame.error:
         return None
 
 
-def lae_taust() -> pygame.Surface:
-    if os.path.exists(TAUST_FAIL):
-        try:
-            img = pygame.image.load(TAUST_FAIL).convert()
-            return pygame.transform.smoothscale(img, (AKNA_LAIUS, AKNA_KÕRGUS))
-        except pygame.error:
-            pass
-    # varutaust
+def varutaust() -> pygame.Surface:
     varu = pygame.Surface((AKNA_LAIUS, AKNA_KÕRGUS))
     varu.fill((30, 34, 40))
     return varu
 
 
-def lae_font(suurus: int) -> pygame.font.Font:
+# Varade komplekt (vt varad.py)
+
+def vajalikud_varad(küsimused: list[küsimus], taust_fail: str = TAUST_FAIL) -> list[varad.Vara]:
+    """Kõik, mida tuba enne esimest kaadrit vajab: taust, objektide pildid lõplikus suuruses, font."""
+    vajalikud = []
+    if os.path.exists(taust_fail):
+        vajalikud.append(varad.Vara("taust", taust_fail, suurus=(AKNA_LAIUS, AKNA_KÕRGUS)))
+    for k in küsimused:
+        if k.pilt and os.path.exists(k.pilt):
+            vara = varad.Vara("pilt", k.pilt, k.skaala)
+            if vara not in vajalikud:
+                vajalikud.append(vara)
     if os.path.exists(FONDI_FAIL):
+        vajalikud.append(varad.Vara("font", FONDI_FAIL))
+    return vajalikud
+
+
+def dekodeeri_vara(vara: varad.Vara) -> pygame.Surface | bytes:
+    """Laeb ja skaleerib vara. Ei vaja ekraani, seega võib töötada ka taustalõimes."""
+    if vara.liik == "font":
+        with open(vara.allikas, "rb") as f:
+            return f.read()
+    LOENDURID["pinnad"] += 1
+    pind = pygame.image.load(vara.allikas)
+    if vara.liik == "taust":
+        if pind.get_bitsize() in (24, 32):
+            return pygame.transform.smoothscale(pind, vara.suurus)
+        return pygame.transform.scale(pind, vara.suurus)
+    return skaleeri_pilt(pind, vara.skaala)
+
+
+def lae_komplekt(vajalikud: list[varad.Vara], tee: str) -> Optional[varad.Komplekt]:
+    """Avab varade komplekti; kui see puudub või mõni allikas on muutunud, ehitab uuesti.
+
+    Kui komplekti ei saa kirjutada (nt kirjutuskaitstud kaust), tagastab None ja
+    pildid laetakse tavalisel viisil.
+    """
+    if not KASUTA_KOMPLEKTI:
+        return None
+    komplekt = varad.ava(tee, vajalikud)
+    if komplekt is None:
         try:
-            return pygame.font.Font(FONDI_FAIL, suurus)
+            varad.ehita(tee, {v: dekodeeri_vara(v) for v in vajalikud})
+        except (OSError, pygame.error):
+            return None
+        komplekt = varad.ava(tee, vajalikud)
+    return komplekt
+
+
+# Toad (vt stseenid.py)
+
+@dataclass
+class ToaAndmed:
+    """Taustalõimes laetud tuba: pildid on lahti pakitud, aga veel ekraani formaati teisendamata."""
+    kirjeldus: ToaKirjeldus
+    küsimused: list[küsimus]
+    pinnad: dict[varad.Vara, pygame.Surface]
+    teisendada: set[varad.Vara]  # need ei tulnud komplektist ja vajavad convert()
+    komplekt: Optional[varad.Komplekt]
+    fondi_baidid: Optional[bytes]
+
+
+@dataclass
+class Tuba:
+    kirjeldus: ToaKirjeldus
+    küsimused: list[küsimus]
+    taust: pygame.Surface
+    objektid: list[KlikitavObjekt]
+    indeks: ObjektideIndeks
+    uks: pygame.Rect
+    komplekt: Optional[varad.Komplekt]  # komplekti pinnad viitavad selle mälule
+    fondi_baidid: Optional[bytes]
+
+
+def dekodeeri_tuba(kirjeldus: ToaKirjeldus) -> ToaAndmed:
+    küsimused = loe_küsimused(kirjeldus.küsimused)
+    vajalikud = vajalikud_varad(küsimused, kirjeldus.taust)
+    komplekt = lae_komplekt(vajalikud, kirjeldus.komplekt)
+
+    pinnad: dict[varad.Vara, pygame.Surface] = {}
+    teisendada: set[varad.Vara] = set()
+    for vara in vajalikud:
+        if vara.liik == "font":
+            continue
+        pind = komplekt.pind(vara) if komplekt is not None else None
+        if pind is None:
+            try:
+                pind = dekodeeri_vara(vara)
+            except pygame.error:
+                continue
+            teisendada.add(vara)
+        pinnad[vara] = pind
+
+    fondi_baidid = komplekt.baidid(varad.Vara("font", FONDI_FAIL)) if komplekt is not None else None
+    return ToaAndmed(kirjeldus, küsimused, pinnad, teisendada, komplekt, fondi_baidid)
+
+
+def valmista_tuba(andmed: ToaAndmed) -> Tuba:
+    """Teisendab pildid ekraani formaati ja loob objektid (ainult põhilõimes)."""
+    taust = andmed.pinnad.get(varad.Vara("taust", andmed.kirjeldus.taust, suurus=(AKNA_LAIUS, AKNA_KÕRGUS)))
+    taust = taust.convert() if taust is not None else varutaust()  # ilma alfakanalita on joonistamine kiirem
+
+    objektid: list[KlikitavObjekt] = []
+    for i, k in enumerate(andmed.küsimused):
+        vara = varad.Vara("pilt", k.pilt, k.skaala) if k.pilt else None
+        pilt = andmed.pinnad.get(vara) if vara else None
+        if pilt is not None and vara in andmed.teisendada:
+            pilt = pilt.convert_alpha()
+        objektid.append(KlikitavObjekt(k, pilt, jarjekord=i, skaleeritud=True))
+
+    return Tuba(andmed.kirjeldus, andmed.küsimused, taust, objektid, ObjektideIndeks(objektid),
+                pygame.Rect(andmed.kirjeldus.uks), andmed.komplekt, andmed.fondi_baidid)
+
+
+def toa_suurus(tuba: Tuba) -> int:
+    pinnad = [tuba.taust] + [o.pilt_pind for o in tuba.objektid if o.pilt_pind is not None]
+    return sum(p.get_width() * p.get_height() * p.get_bytesize() for p in pinnad)
+
+
+# Fondid ja renderdatud tekst (vahemälu)
+
+# fondiregister: (tee või "sys:nimi", suurus) -> Font; igat fonti luuakse ainult üks kord
+_FONDID: dict[tuple[str, int], pygame.font.Font] = {}
+_FONDI_BAIDID: Optional[bytes] = None  # FONDI_FAIL sisu varade komplektist
+
+
+def lae_font(suurus: int) -> pygame.font.Font:
+    võti = (FONDI_FAIL, suurus)
+    if võti in _FONDID:
+        return _FONDID[võti]
+    font = None
+    if _FONDI_BAIDID is not None:
+        font = pygame.font.Font(io.BytesIO(_FONDI_BAIDID), suurus)
+    elif os.path.exists(FONDI_FAIL):
+        try:
+            font = pygame.font.Font(FONDI_FAIL, suurus)
         except pygame.error:
             pass
-    return pygame.font.SysFont(None, suurus)
+    if font is None:
+        font = pygame.font.SysFont(None, suurus)
+    _FONDID[võti] = font
+    return font
+
+
+# süsteemifondi nimi -> otsing taustalõimes (tee või None); fondifaili tee kehtib ka pärast pygame.quit()
+_SYSFONDI_TEED: dict[str, Future] = {}
+_JÄRELLAADIJA: Optional[ThreadPoolExecutor] = None
+
+
+def järellaadija() -> ThreadPoolExecutor:
+    """Taustalõim töödele, mis pole esimeseks kaadriks vajalikud."""
+    global _JÄRELLAADIJA
+    if _JÄRELLAADIJA is None:
+        _JÄRELLAADIJA = ThreadPoolExecutor(max_workers=1, thread_name_prefix="järellaadija")
+    return _JÄRELLAADIJA
+
+
+def otsi_sysfont(nimi: str) -> None:
+    """Alustab süsteemifondi otsingut taustal (SysFont loeb esimesel korral läbi kõik süsteemi fondid)."""
+    if nimi not in _SYSFONDI_TEED:
+        _SYSFONDI_TEED[nimi] = järellaadija().submit(pygame.font.match_font, nimi)
+
+
+def lae_sysfont(nimi: str, suurus: int) -> pygame.font.Font:
+    """Nagu pygame.font.SysFont, aga süsteemifonte otsitakse ainult üks kord (võimalusel juba taustal)."""
+    võti = ("sys:" + nimi, suurus)
+    if võti not in _FONDID:
+        otsi_sysfont(nimi)
+        tee = _SYSFONDI_TEED[nimi].result()
+        _FONDID[võti] = pygame.font.Font(tee, suurus)  # tee None: pygame'i vaikefont, nagu SysFont-il
+    return _FONDID[võti]
+
+
+def eellae_tekstid(küsimused: list[küsimus]) -> None:
+    """Loeb küsimuste teksti kompileeritud pangast taustal, et küsimuse avamine faili ei ootaks."""
+    def lae() -> None:
+        for k in küsimused:
+            k.sisu
+    järellaadija().submit(lae)
+
+
+class TekstiVahemalu:
+    """LRU vahemälu renderdatud tekstipindadele.
+
+    Võti on (font, tekst, värv, antialias). Mälu piiratakse baitides (laius * kõrgus *
+    baite pikslis); kui piir ületatakse, visatakse välja kõige kauem kasutamata pinnad.
+    """
+
+    def __init__(self, maks_baite: int = TEKSTI_VAHEMALU_BAITE):
+        self.maks_baite = maks_baite
+        self.baite = 0
+        self.tabamused = 0
+        self.möödalasud = 0
+        self._pinnad: OrderedDict[tuple, pygame.Surface] = OrderedDict()
+
+    @staticmethod
+    def _suurus(pind: pygame.Surface) -> int:
+        return pind.get_width() * pind.get_height() * pind.get_bytesize()
+
+    def render(self, font: pygame.font.Font, tekst: str, antialias: bool, varv: tuple[int, int, int]) -> pygame.Surface:
+        võti = (font, tekst, varv, antialias)
+        pind = self._pinnad.get(võti)
+        if pind is not None:
+            self._pinnad.move_to_end(võti)
+            self.tabamused += 1
+            return pind
+
+        self.möödalasud += 1
+        LOENDURID["pinnad"] += 1
+        pind = font.render(tekst, antialias, varv)
+        suurus = self._suurus(pind)
+        if suurus > self.maks_baite:
+            return pind  # liiga suur, et hoida
+        self._pinnad[võti] = pind
+        self.baite += suurus
+        while self.baite > self.maks_baite:
+            _, vana = self._pinnad.popitem(last=False)
+            self.baite -= self._suurus(vana)
+        return pind
+
+    def tühjenda(self) -> None:
+        self._pinnad.clear()
+        self.baite = 0
+
+
+TEKSTID = TekstiVahemalu()
+PAIGUTUS = paigutus.Paigutaja()
+
+
+def render_tekst(font: pygame.font.Font, tekst: str, antialias: bool, varv: tuple[int, int, int]) -> pygame.Surface:
+    """Sama mis font.render(), aga tulemus võetakse võimalusel vahemälust."""
+    return TEKSTID.render(font, tekst, antialias, varv)
 
 
 def murra_tekst(font: pygame.font.Font, tekst: str, max_laius: int) -> list[str]:
-    sonad = tekst.split(" ")
-    read: list[str] = []
-    rida = ""
-    for s in sonad:
-        kandidaat = (rida + " " + s).strip()
-        if font.size(kandidaat)[0] <= max_laius:
-            rida = kandidaat
-        else:
-            if rida:
-                read.append(rida)
-            rida = s
-    if rida:
-        read.append(rida)
-    return read
+    return list(PAIGUTUS.murra(font, tekst, max_laius))
+
+
+def küsimuse_paigutus(font: pygame.font.Font, k: küsimus) -> tuple[list[str], pygame.Rect, list[pygame.Rect]]:
+    """Küsimuse akna paigutus: murtud küsimuse read, koodibloki ala ja 4 vastusenuppu."""
+    paneel = KÜSIMUSE_PANEEL
+    read = murra_tekst(font, k.kysimus, paneel.width - 36)
+    y = paneel.y + 54 + len(read) * 24
+
+    # koodiblokk
+    nupu_h = 26
+    vahe = 6
+    valikute_arv = 4
+    valikute_ruum = valikute_arv * nupu_h + (valikute_arv - 1) * vahe + 20 # määrame kui palju ruumi on valikute mahutamisek vaja
+    maks_koodi_kõrgus = (paneel.bottom - valikute_ruum - y- 20)
+    kood_kõrgus = min(210, maks_koodi_kõrgus)
+    kood_rect = pygame.Rect(paneel.x + 18,y + 6,paneel.width - 36,kood_kõrgus)
+
+    # valikud
+    nupu_w = paneel.width - 40
+    footer = 32 # alumine osa ehk footer, et valikud ei kataks teksti ära
+    alg_y = min(kood_rect.bottom + 10, paneel.bottom - footer - (nupu_h + vahe) * valikute_arv)
+    nupud = [pygame.Rect(paneel.x + 20, alg_y + i * (nupu_h + vahe), nupu_w, nupu_h) for i in range(valikute_arv)]
+    return read, kood_rect, nupud
 
 
-def loe_küsimused() -> list[küsimus]:
-    failitee = leia_kysimuste_fail()
+def koodi_ala(kood_rect: pygame.Rect) -> pygame.Rect:
+    """Koodibloki sisemus (raami ja äärise võrra väiksem), kus koodi näidatakse."""
+    return kood_rect.inflate(-20, -20)
+
+
+def loe_küsimused(failitee: Optional[str] = None) -> list[küsimus]:
+    failitee = failitee or leia_kysimuste_fail()
     if not os.path.exists(failitee):
         raise FileNotFoundError(f"Ei leidnud faili: '{failitee}'.\n")
 
-    with open(failitee, "r", encoding="utf-8") as f: #avame küsimused.json faili
-        andmed = json.load(f)
-
-    küsimused: list[küsimus] = []
-    for r in andmed:
-        pilt = r.get("pilt")
-        if pilt and not os.path.exists(pilt):
-            kandidaadi_tee = os.path.join("pildid", pilt)
-            if os.path.exists(kandidaadi_tee):
-                pilt = kandidaadi_tee
-
-        küsimused.append(
-            küsimus(
-                objekt=r["objekt"],
-                nimi=r.get("nimi", r["objekt"]),
-                x=int(r["x"]),
-                y=int(r["y"]),
-                pilt=pilt,
-                skaala=float(r.get("skaala", 1.0)),
-                kysimus=r["küsimus"],
-                kood=r.get("kood", ""),
-                valikud=list(r.get("valikud", [])),
-                oige_vastus=int(r.get("õige_vastus", 0)),
-                taht=str(r.get("täht", "")),
-            )
-        )
-    return küsimused
+    if KOMPILEERI_PANK:
+        return kysimustepank.loe(failitee)
+    return kysimustepank.loe_json(failitee)
 
 
-def lae_salvestus() -> dict:
-    if not os.path.exists(SALVESTUS_FAIL):
-        return {"lahendatud": [], "vead": 0}
+def _logi_fail() -> str:
+    return SALVESTUS_FAIL + ".logi"
+
+
+def _loe_logi() -> tuple[bool, Optional[dict]]:
+    """Viimane terve kirje logist: (kas leidus, andmed). None tähendab, et tehti reset."""
     try:
-        with open(SALVESTUS_FAIL, "r", encoding="utf-8") as f:
-            data = json.load(f)
-            if "lahendatud" not in data:
-                data["lahendatud"] = []
-            if "vead" not in data:
-                data["vead"] = 0
-            return data
-    except Exception:
+        with open(_logi_fail(), "r", encoding="utf-8") as f:
+            read = f.read().splitlines()
+    except OSError:
+        return False, None
+    for rida in reversed(read):
+        try:
+            return True, json.loads(rida)
+        except ValueError:
+            continue  # pooleli jäänud rida (krahh kirjutamise ajal)
+    return False, None
+
+
+def lae_salvestus() -> dict:
+    data = None
+    if os.path.exists(SALVESTUS_FAIL):
+        try:
+            with open(SALVESTUS_FAIL, "r", encoding="utf-8") as f:
+                data = json.load(f)
+        except Exception:
+            print(f"Hoiatus: '{SALVESTUS_FAIL}' on vigane, proovin logist taastada.", file=sys.stderr)
+
+    # logis on ainult muudatused, mis pole veel salvestusfaili jõudnud
+    leitud, logist = _loe_logi()
+    if leitud:
+        data = logist
+
+    if not isinstance(data, dict):
         return {"lahendatud": [], "vead": 0}
+    if "lahendatud" not in data:
+        data["lahendatud"] = []
+    if "vead" not in data:
+        data["vead"] = 0
+    return data
+
+
+def ava_mängijad(nimi: str = "") -> tuple[mangijad.Mängijad, str]:
+    """Avab profiilide andmebaasi ja valib mängija: antud nimi, muidu viimati mänginud, muidu VAIKIMISI_MÄNGIJA.
+
+    Vana salvestus.json (koos logiga) viiakse valitud mängija profiili, kui sellist profiili
+    veel pole; fail jääb alles nimega salvestus.json.vana.
+    """
+    andmebaas = mangijad.Mängijad(PROGRESSI_FAIL, SALVESTUSE_VIIVITUS_MS)
+    profiil = nimi or andmebaas.viimane() or VAIKIMISI_MÄNGIJA
+    if os.path.exists(SALVESTUS_FAIL) or os.path.exists(_logi_fail()):
+        if not andmebaas.olemas(profiil):
+            andmebaas.salvesta(profiil, lae_salvestus())
+            print(f"'{SALVESTUS_FAIL}' viidi mängija '{profiil}' profiili ({PROGRESSI_FAIL}).")
+        if os.path.exists(SALVESTUS_FAIL):
+            os.replace(SALVESTUS_FAIL, SALVESTUS_FAIL + ".vana")
+        if os.path.exists(_logi_fail()):
+            os.remove(_logi_fail())
+    andmebaas.vali(profiil)
+    return andmebaas, profiil
+
+
+def serveri_viga(server: Optional[str], e: Exception) -> NoReturn:
+    """Serveriga mängimine ei alanud: selge teade traceback'i asemel."""
+    print(f"Viga: klassiserveriga {server} ei saa mängida: {e}", file=sys.stderr)
+    pygame.quit()
+    raise SystemExit(1)
+
 
+def segu(a: tuple[int, int, int], b: tuple[int, int, int], t: float) -> tuple[int, int, int]:
+    """Värv a ja b vahel (t=0 -> a, t=1 -> b)."""
+    return tuple(round(x + (y - x) * t) for x, y in zip(a, b))
 
-def salvesta_salvestus(andmed: dict) -> None:
-    with open(SALVESTUS_FAIL, "w", encoding="utf-8") as f:
-        json.dump(andmed, f, ensure_ascii=False, indent=2)
 
+def joonista_sydamed(ekraan: pygame.Surface, vead: int, kaob: float = 0.0):
+    """Joonistab elud (3 südant) ülariba paremasse serva.
 
-def joonista_sydamed(ekraan: pygame.Surface, vead: int):
-    """Joonistab elud (3 südant) ülariba paremasse serva."""
+    kaob (1 -> 0) on viimati kaotatud südame animatsioon: see on alguses punane ja
+    suurem ning tõmbub hallina tavasuurusesse.
+    """
 
     def sydame_keskkoht(i: int) -> tuple[int, int]:
         x = AKNA_LAIUS - 26 - i * 30
         y = 24
         return x, y
 
-    def joonista_sydame_kuju(kesk: tuple[int, int], varv: tuple[int, int, int]):
+    def joonista_sydame_kuju(kesk: tuple[int, int], varv: tuple[int, int, int], r: int = 8):
         x, y = kesk
-        r = 8
         # kaks "mulli" + kolmnurk = lihtne süda
         pygame.draw.circle(ekraan, varv, (x - r, y - 3), r)
         pygame.draw.circle(ekraan, varv, (x + r, y - 3), r)
@@ -242,331 +606,1050 @@ def joonista_sydamed(ekraan: pygame.Surface, vead: int):
 
     elud = max(0, MAKS_VEAD - vead)
     for i in range(MAKS_VEAD):
+        if i == elud and kaob > 0:
+            joonista_sydame_kuju(sydame_keskkoht(i), segu((120, 120, 120), (220, 60, 60), kaob), round(8 + 2 * kaob))
+            continue
         varv = (220, 60, 60) if i < elud else (120, 120, 120)
         joonista_sydame_kuju(sydame_keskkoht(i), varv)
 
 
 # visuaalsed elemendid (UI)
 
-def joonista_varjund(ekraan: pygame.Surface):
+class Kihid:
+    """Eelrenderdatud kihid (varjund, paneelid), mis ehitatakse esimesel vajadusel.
+
+    Kihte ei ehitata ise uuesti: kui nende sisu muutub (akna suurus, uued küsimused),
+    tuleb kutsuda tühjenda() või unusta(). Mälu piiratakse baitides nagu TekstiVahemalu-s:
+    üle piiri visatakse välja kõige kauem kasutamata kihid. Toa kihid (võti kujul
+    (liik, tuba, objekt)) unustatakse tuppa sisenemisel (unusta_teised_toad).
+    """
+
+    def __init__(self, maks_baite: int = KIHTIDE_BAITE):
+        self.maks_baite = maks_baite
+        self.baite = 0
+        self._kihid: OrderedDict[tuple, pygame.Surface] = OrderedDict()
+
+    def hangi(self, võti: tuple, ehita: Callable[[], pygame.Surface]) -> pygame.Surface:
+        kiht = self._kihid.get(võti)
+        if kiht is not None:
+            self._kihid.move_to_end(võti)
+            return kiht
+        LOENDURID["pinnad"] += 1
+        kiht = ehita()
+        suurus = TekstiVahemalu._suurus(kiht)
+        if suurus > self.maks_baite:
+            return kiht  # liiga suur, et hoida
+        self._kihid[võti] = kiht
+        self.baite += suurus
+        while self.baite > self.maks_baite:
+            _, vana = self._kihid.popitem(last=False)
+            self.baite -= TekstiVahemalu._suurus(vana)
+        return kiht
+
+    def unusta(self, võti: tuple) -> None:
+        kiht = self._kihid.pop(võti, None)
+        if kiht is not None:
+            self.baite -= TekstiVahemalu._suurus(kiht)
+
+    def unusta_teised_toad(self, tuba: int) -> None:
+        for võti in [v for v in self._kihid if len(v) == 3 and v[1] != tuba]:
+            self.unusta(võti)
+
+    def tühjenda(self) -> None:
+        self._kihid.clear()
+        self.baite = 0
+
+
+KIHID = Kihid()
+
+
+def _ehita_varjund() -> pygame.Surface:
     kiht = pygame.Surface((AKNA_LAIUS, AKNA_KÕRGUS), pygame.SRCALPHA)
     kiht.fill((0, 0, 0, 180))
+    return kiht
+
+
+def _ehita_hajuv_varjund() -> pygame.Surface:
+    # ilma alfakanalita pind + pinna läbipaistvus on palju kiirem kui SRCALPHA + set_alpha
+    kiht = pygame.Surface((AKNA_LAIUS, AKNA_KÕRGUS))
+    kiht.fill((0, 0, 0))
+    return kiht
+
+
+def joonista_varjund(ekraan: pygame.Surface, nähtavus: float = 1.0):
+    if nähtavus >= 1.0:
+        ekraan.blit(KIHID.hangi(("varjund",), _ehita_varjund), (0, 0))
+        return
+    kiht = KIHID.hangi(("hajuv_varjund",), _ehita_hajuv_varjund)
+    kiht.set_alpha(round(180 * nähtavus))
     ekraan.blit(kiht, (0, 0))
 
 
+def _tühi_paneel(rect: pygame.Rect) -> pygame.Surface:
+    """Läbipaistev pind paneeli suuruses, millel on ümarate nurkadega taust ja raam."""
+    kiht = pygame.Surface(rect.size, pygame.SRCALPHA)
+    kohalik = kiht.get_rect()
+    pygame.draw.rect(kiht, (25, 28, 34), kohalik, border_radius=14)
+    pygame.draw.rect(kiht, (220, 220, 220), kohalik, 2, border_radius=14)
+    return kiht
+
+
+def ehita_küsimuse_paneel(k: küsimus, font: pygame.font.Font, font_suur: pygame.font.Font,
+                          font_tagasi: pygame.font.Font) -> pygame.Surface:
+    """Küsimuse akna muutumatu osa (pealkiri, küsimus, koodibloki raam, ESC vihje) ühe pinnana.
+
+    Kood ise on keritav ja joonistatakse peale eraldi (vt paigutus.Kerimisala).
+    """
+    paneel = KÜSIMUSE_PANEEL
+    kiht = _tühi_paneel(paneel)
+    read, kood_rect, _ = küsimuse_paigutus(font, k)
+    kood_rect = kood_rect.move(-paneel.x, -paneel.y)
+
+    # pealkiri
+    kiht.blit(font_suur.render(k.nimi, True, (245, 245, 245)), (18, 12))
+
+    # küsimus
+    y = 54
+    for r in read:
+        kiht.blit(font.render(r, True, (235, 235, 235)), (18, y))
+        y += 24
+
+    # koodiblokk
+    pygame.draw.rect(kiht, (15, 16, 20), kood_rect, border_radius=10)
+    pygame.draw.rect(kiht, (90, 90, 90), kood_rect, 2, border_radius=10)
+
+    kiht.blit(font_tagasi.render("ESC - tagasi", True, (200, 200, 200)), (18, paneel.height - 28))
+    return kiht
+
+
+def ehita_luku_paneel(font: pygame.font.Font, font_suur: pygame.font.Font, koodi_pikkus: int) -> pygame.Surface:
+    """Luku akna muutumatu osa; sisestatud kood joonistatakse peale eraldi."""
+    paneel = LUKU_PANEEL
+    kiht = _tühi_paneel(paneel)
+    kiht.blit(font_suur.render("Ukse lukk", True, (245, 245, 245)), (18, 12))
+    kiht.blit(font.render(f"Sisesta kood ({koodi_pikkus} märki) ja ENTER.", True, (220, 220, 220)), (18, 60))
+
+    sis = LUKU_SISEND.move(-paneel.x, -paneel.y)
+    pygame.draw.rect(kiht, (15, 16, 20), sis, border_radius=10)
+    pygame.draw.rect(kiht, (90, 90, 90), sis, 2, border_radius=10)
+    kiht.blit(font.render("ESC = tagasi", True, (200, 200, 200)), (18, paneel.height - 28))
+    return kiht
+
+
+def ehita_mängijate_paneel(font: pygame.font.Font, font_suur: pygame.font.Font) -> pygame.Surface:
+    """Mängija valiku akna muutumatu osa; sisestatud nimi ja profiilide nupud joonistatakse peale."""
+    paneel = MÄNGIJATE_PANEEL
+    kiht = _tühi_paneel(paneel)
+    kiht.blit(font_suur.render("Mängija", True, (245, 245, 245)), (18, 12))
+    kiht.blit(font.render("Kirjuta nimi ja ENTER või vali:", True, (220, 220, 220)), (18, 50))
+
+    sis = MÄNGIJA_SISEND.move(-paneel.x, -paneel.y)
+    pygame.draw.rect(kiht, (15, 16, 20), sis, border_radius=10)
+    pygame.draw.rect(kiht, (90, 90, 90), sis, 2, border_radius=10)
+    kiht.blit(font.render("ESC = tagasi", True, (200, 200, 200)), (18, paneel.height - 28))
+    return kiht
+
+
+def mängijate_read(n: int) -> list[pygame.Rect]:
+    """Mängija valiku aknas profiilide nupud sisendkasti all."""
+    sis = MÄNGIJA_SISEND
+    return [pygame.Rect(sis.x, sis.bottom + 14 + i * 40, sis.width, 34) for i in range(n)]
+
+
+def ehita_lõpuekraan(read: list[tuple[pygame.font.Font, str, tuple[int, int, int], int]]) -> pygame.Surface:
+    """Varjund koos keskele joondatud tekstiridadega (font, tekst, värv, keskpunkti y)."""
+    kiht = _ehita_varjund()
+    for font, tekst, varv, y in read:
+        t = font.render(tekst, True, varv)
+        kiht.blit(t, t.get_rect(center=(AKNA_LAIUS // 2, y)))
+    return kiht
+
+
+def joonista_kerimisriba(ekraan: pygame.Surface, ala: pygame.Rect, kerimine: paigutus.Kerimisala) -> None:
+    if kerimine.max_y == 0:
+        return
+    riba = pygame.Rect(ala.right + 4, ala.y, 4, ala.height)
+    pygame.draw.rect(ekraan, (45, 45, 52), riba, border_radius=2)
+    h = max(16, riba.height * kerimine.kõrgus // kerimine.pind.get_height())
+    y = riba.y + (riba.height - h) * kerimine.y // kerimine.max_y
+    pygame.draw.rect(ekraan, (150, 150, 160), (riba.x, y, riba.width, h), border_radius=2)
+
+
 def joonista_nupp(ekraan: pygame.Surface, font: pygame.font.Font, tekst: str, rect: pygame.Rect, hiir_peal: bool):
     taust = (70, 85, 105) if hiir_peal else (55, 65, 80)
     pygame.draw.rect(ekraan, taust, rect, border_radius=10)
     pygame.draw.rect(ekraan, (210, 210, 210), rect, 2, border_radius=10)
-    s = font.render(tekst, True, (240, 240, 240))
+    s = render_tekst(font, tekst, True, (240, 240, 240))
     ekraan.blit(s, (rect.x + 12, rect.y + (rect.height - s.get_height()) // 2))
 
 
-def main() -> None:
-    pygame.init()
-    ekraan = pygame.display.set_mode((AKNA_LAIUS, AKNA_KÕRGUS))
+class Profiilija:
+    """Kaadri osade ajad (ms) ja loendurite muutused viimase PROFIILI_SEKUNDID jooksul.
+
+    Iga kaader: alusta(), siis iga osa lõpus lõik("nimi") (aeg eelmisest lõigust),
+    lõpuks lõpeta(). Sama nimega lõigud ühes kaadris liidetakse kokku.
+    """
+
+    OSAD = ("sündmused", "uuendus", "paigutus", "taust", "objektid", "ülariba", "teade", "küsimus", "lukk", "mängijad", "lõpp", "x", "profiil", "flip")
+
+    def __init__(self, sekundeid: float = PROFIILI_SEKUNDID):
+        self.sekundeid = sekundeid
+        self.proovid: deque[dict[str, float]] = deque()
+        self._kaader: dict[str, float] = {}
+        self._algus = 0.0
+        self._eelmine = 0.0
+        self._loendurid = dict(LOENDURID)
+
+    def alusta(self) -> None:
+        self._kaader = {}
+        self._algus = self._eelmine = time.perf_counter()
+
+    def lõik(self, nimi: str) -> None:
+        t = time.perf_counter()
+        self._kaader[nimi] = self._kaader.get(nimi, 0.0) + (t - self._eelmine) * 1000
+        self._eelmine = t
+
+    def lõpeta(self) -> None:
+        t = time.perf_counter()
+        proov = {"aeg_s": t, "kaader_ms": (t - self._algus) * 1000}
+        for osa in self.OSAD:
+            proov[osa] = self._kaader.get(osa, 0.0)
+        for nimi, väärtus in LOENDURID.items():
+            proov[nimi] = väärtus - self._loendurid[nimi]
+        self._loendurid = dict(LOENDURID)
+
+        self.proovid.append(proov)
+        while self.proovid and self.proovid[0]["aeg_s"] < t - self.sekundeid:
+            self.proovid.popleft()
+
+    def viimased(self, n: int) -> list[dict[str, float]]:
+        return list(self.proovid)[-n:]
+
+    def salvesta(self, nimi: str) -> list[str]:
+        """Kirjutab proovid faili nimi.csv ja nimi.json; tagastab failinimed."""
+        proovid = list(self.proovid)
+        if not proovid:
+            return []
+        algus = proovid[0]["aeg_s"]
+        read = [dict(p, aeg_s=round(p["aeg_s"] - algus, 4)) for p in proovid]
+
+        with open(nimi + ".csv", "w", encoding="utf-8", newline="") as f:
+            kirjutaja = csv.DictWriter(f, fieldnames=list(read[0].keys()))
+            kirjutaja.writeheader()
+            kirjutaja.writerows(read)
+        with open(nimi + ".json", "w", encoding="utf-8") as f:
+            json.dump(read, f, ensure_ascii=False)
+        return [nimi + ".csv", nimi + ".json"]
+
+
+def joonista_profiil(ekraan: pygame.Surface, font: pygame.font.Font, profiilija: Profiilija) -> None:
+    """Kaadriaegade graafik (viimased kaadrid) ja viimase kaadri jaotus."""
+    kast = PROFIILI_RECT
+    pygame.draw.rect(ekraan, (0, 0, 0), kast)
+    pygame.draw.rect(ekraan, (120, 120, 120), kast, 1)
+
+    graafik = pygame.Rect(kast.x + 4, kast.y + 36, kast.width - 8, kast.height - 40)
+    proovid = profiilija.viimased(graafik.width // 2)
+    skaala = graafik.height / (2 * 1000 / FPS)  # graafiku kõrgus = 2 kaadri eelarvet
+    eelarve_y = graafik.bottom - int(1000 / FPS * skaala)
+    pygame.draw.line(ekraan, (90, 90, 40), (graafik.x, eelarve_y), (graafik.right, eelarve_y))
+    for i, p in enumerate(proovid):
+        h = min(graafik.height, int(p["kaader_ms"] * skaala))
+        varv = (80, 200, 80) if p["kaader_ms"] <= 1000 / FPS else (230, 70, 70)
+        x = graafik.x + i * 2
+        pygame.draw.line(ekraan, varv, (x, graafik.bottom), (x, graafik.bottom - h))
+
+    if proovid:
+        viimane = proovid[-1]
+        osad = sorted(Profiilija.OSAD, key=lambda o: viimane[o], reverse=True)[:2]
+        rida1 = f"{viimane['kaader_ms']:.2f} ms  pinnad {viimane['pinnad']:.0f}  salv {viimane['salvestused']:.0f}"
+        rida2 = "  ".join(f"{o} {viimane[o]:.2f}" for o in osad)
+        # profiili tekst muutub iga kaader, seega ei panda seda tekstivahemällu
+        ekraan.blit(font.render(rida1, True, (230, 230, 230)), (kast.x + 4, kast.y + 3))
+        ekraan.blit(font.render(rida2, True, (180, 180, 180)), (kast.x + 4, kast.y + 18))
+
+
+class Käivitusprofiil:
+    """Aeg esimese kaadrini osade kaupa.
+
+    Esimene osa algab game.py importimisest (või main() uuest väljakutsest), iga lõik()
+    lõpetab osa ja alustab järgmist. Pärast lõpeta() uusi lõike ei lisata.
+    """
+
+    def __init__(self, algus: float):
+        self.algus = algus
+        self._eelmine = algus
+        self.osad: list[tuple[str, float]] = []
+        self.valmis = False
+
+    def alusta(self) -> None:
+        """main() algus; korduval main() väljakutsel alustatakse nullist."""
+        if self.osad:
+            self.__init__(time.perf_counter())
+        self.lõik("import")
+
+    def lõik(self, nimi: str) -> None:
+        if self.valmis:
+            return
+        t = time.perf_counter()
+        self.osad.append((nimi, (t - self._eelmine) * 1000))
+        self._eelmine = t
+
+    def lõpeta(self, nimi: str) -> None:
+        self.lõik(nimi)
+        self.valmis = True
+
+    @property
+    def kokku_ms(self) -> float:
+        return (self._eelmine - self.algus) * 1000
+
+    def aruanne(self, eelarve_ms: Optional[float] = None) -> str:
+        read = [f"{nimi:<16}{ms:>9.1f} ms" for nimi, ms in self.osad]
+        read.append(f"{'esimese kaadrini':<16}{self.kokku_ms:>9.1f} ms")
+        if eelarve_ms is not None:
+            read.append(f"eelarve {eelarve_ms:.0f} ms: " + ("OK" if self.kokku_ms <= eelarve_ms else "ÜLETATUD"))
+        return "\n".join(read)
+
+
+KÄIVITUS = Käivitusprofiil(_IMPORDI_ALGUS)
+
+
+def alusta_pygame() -> None:
+    """Käivitab ainult ekraani ja fondid (pygame.init() käivitaks ka heli, juhtkangid jne)."""
+    if VALIKULINE_INIT:
+        pygame.display.init()
+        pygame.font.init()
+    else:
+        pygame.init()
+
+
+def oota_sündmusi(tähtajad: list[int]) -> list[pygame.event.Event]:
+    """Ootab (protsessorit koormamata), kuni tuleb sündmus või saabub lähim tähtaeg.
+
+    Tähtajad on pygame.time.get_ticks() millisekundites; möödunud tähtaegu ei arvestata.
+    """
+    praegu = pygame.time.get_ticks()
+    jäänud = [t - praegu for t in tähtajad if t > praegu]
+    ev = pygame.event.wait(min(jäänud)) if jäänud else pygame.event.wait()
+    sündmused = [] if ev.type == pygame.NOEVENT else [ev]
+    return sündmused + pygame.event.get()
+
+
+def tühjenda_vahemälud() -> None:
+    """Unustab fondid, tekstid, paigutused ja kihid (need kehtivad ainult ühe pygame.init() jooksul)."""
+    _FONDID.clear()
+    TEKSTID.tühjenda()
+    PAIGUTUS.tühjenda()
+    KIHID.tühjenda()
+
+
+def main(
+    küsimuste_fail: Optional[str] = None,
+    fps: int = FPS,
+    sündmuste_allikas: Optional[Callable[[], list[pygame.event.Event]]] = None,
+    kaadri_kuulaja: Optional[Callable[[str], None]] = None,
+    aeg: Callable[[], int] = pygame.time.get_ticks,
+    sündmuste_kuulaja: Optional[Callable[[list[pygame.event.Event]], None]] = None,
+    väljumisel: Optional[Callable[[dict], None]] = None,
+    server: Optional[str] = None,
+    nimi: str = "",
+    telemeetria: Optional[Telemeetria] = None,
+    seeme: Optional[int] = None,
+    variantide_kuulaja: Optional[Callable[[int], None]] = None,
+    variandid_logist: Optional[Iterable[int]] = None,
+) -> None:
+    """Käivitab mängu.
+
+    Tavamängus on kõik argumendid vaikimisi. Jõudlustestid ja automaatne mängimine
+    saavad anda oma küsimuste faili, fps=0 (ilma piiranguta), sündmuste_allika
+    (asendab pygame.event.get()) ja kaadri_kuulaja, mida kutsutakse iga kaadri
+    lõpus praeguse olekuga.
+
+    Sisendi lindistamiseks ja taasesituseks (vt sisendlogi.py): aeg asendab
+    pygame.time.get_ticks() (virtuaalne kell), sündmuste_kuulaja saab iga kaadri
+    sündmused ja väljumisel lõppseisu (olek, vead, lahendatud, tuba).
+
+    Kui server ("host:port") on antud, otsustab mängu käigu klassiserver (vt
+    klassiserver.py) ja see aken ainult joonistab; progress salvestatakse serveris.
+    Muidu on nimi kohaliku profiili nimi (vt ava_mängijad); tühja nime korral jätkab
+    viimati mänginud mängija.
+
+    telemeetria (vt telemeetria.py) saab küsimuste avamised, vastused ja lukukatsed;
+    main sulgeb selle väljumisel.
+
+    seeme määrab malliga küsimuste variandid (vt mallid.py). variantide_kuulaja saab
+    iga malliga küsimuse avamisel, mitu varianti järjekorrast võeti (lindistamine);
+    variandid_logist annab need arvud taasesitusel tagasi, nii et näidatakse samu variante.
+    """
+    global _FONDI_BAIDID
+
+    KÄIVITUS.alusta()
+    tühjenda_vahemälud()
+    alusta_pygame()
+    KÄIVITUS.lõik("pygame")
+    if RENDERDAJA.startswith("sdl2"):
+        import renderdaja as rd
+
+        renderdaja: Optional[rd.Renderdaja] = rd.Renderdaja((AKNA_LAIUS, AKNA_KÕRGUS), tarkvara=RENDERDAJA == "sdl2-tarkvara")
+        ekraan = renderdaja.kiht  # taust ja objektid tulevad tekstuuridest, siia ainult ülejäänu
+    else:
+        renderdaja = None
+        ekraan = pygame.display.set_mode((AKNA_LAIUS, AKNA_KÕRGUS))
     pygame.display.set_caption("Heleri & Adele – Põgenemismäng")
     kell = pygame.time.Clock()
+    mängukell = animatsioon.Kell(aeg())  # kaadri aeg, millest sõltuvad teated ja animatsioonid
+    animatsioonid = animatsioon.Animatsioonid()
+    KÄIVITUS.lõik("aken")
+
+    if küsimuste_fail is None and server is None and os.path.exists(TOAD_FAIL):
+        toad = stseenid.loe_toad(TOAD_FAIL)
+    else:
+        toad = stseenid.vaiketoad(TAUST_FAIL, küsimuste_fail or leia_kysimuste_fail(), tuple(UKSE_RECT), VARADE_KOMPLEKT)
+    haldur = Stseenihaldur(toad, dekodeeri_tuba, valmista_tuba, toa_suurus, MAKS_TUBADE_MÄLU_MB * 1024 * 1024)
+    KÄIVITUS.lõik("toad")
+
+    # mängu seis: mängija profiilist või serverist
+    mängijad: Optional[mangijad.Mängijad] = None
+    profiil = nimi
+    if server is not None:
+        import klassiserver
 
-    font = lae_font(22)
-    font_suur = lae_font(28)
-    font_kood = pygame.font.SysFont("consolas", 18)
+        try:
+            mäng: Mänguseis = klassiserver.Kaugseis(server, nimi or VAIKIMISI_MÄNGIJA)
+        except (OSError, ValueError) as e:  # ConnectionError on OSError
+            serveri_viga(server, e)
+    else:
+        mängijad, profiil = ava_mängijad(nimi)
+        mäng = Mänguseis([], tubade_arv=len(toad))
+        mäng.taasta(mängijad.lae(profiil))
+    KÄIVITUS.lõik("salvestus")
+
+    # malliga küsimuste variandid; serveriga mängides on küsimused serveri omad
+    variandid = None
+    if MALLID and server is None:
+        variandid = mallid.Mallid(seeme, kuulaja=variantide_kuulaja, esitus=variandid_logist)
+
+    def sisene(nr: int) -> None:
+        """Teeb toa nr aktiivseks ja alustab järgmise toa eellaadimist."""
+        nonlocal tuba, objektid, indeks, taust, ukse_rect
+        tuba = haldur.hangi(nr)
+        if renderdaja is not None:
+            renderdaja.unusta()
+        haldur.eellae(nr + 1)
+        objektid, indeks, taust, ukse_rect = tuba.objektid, tuba.indeks, tuba.taust, tuba.uks
+        mäng.vaheta_tuba(tuba.küsimused)
+        KIHID.unusta_teised_toad(nr)
+        if variandid is not None:
+            for k in tuba.küsimused:
+                if k.mall:
+                    variandid.lisa((nr, k.objekt), k.mall)
+
+    tuba: Tuba
+    objektid: list[KlikitavObjekt] = []
+    indeks: ObjektideIndeks
+    taust: pygame.Surface
+    ukse_rect = UKSE_RECT
+    try:
+        sisene(mäng.tuba)
+    except ValueError as e:  # Kaugseis: serveri küsimustepank on teine
+        serveri_viga(server, e)
+    KÄIVITUS.lõik("tuba")
 
-    taust = lae_taust()
+    # font tuleb võimalusel esimese toa komplektist
+    _FONDI_BAIDID = tuba.fondi_baidid
+    font = lae_font(22)  # ülariba vajab seda juba esimeses kaadris
+    KÄIVITUS.lõik("fondid")
 
-    küsimused = loe_küsimused()
+    # ülejäänud fondid on vaja alles paneelides; need luuakse esimesel kasutamisel
+    def font_suur() -> pygame.font.Font:
+        return lae_font(28)
 
-    objektid: list[KlikitavObjekt] = []
-    for i, k in enumerate(küsimused):
-        pilt = lae_pilt(k.pilt) if k.pilt else None
-        objektid.append(KlikitavObjekt(k, pilt, jarjekord=i))
-
-    # uksekood: tähtede jada JSON-is olevas järjekorras
-    oodatav_kood = "".join([k.taht for k in küsimused])
-    kood_nahtav = ["_"] * len(küsimused)
-
-    # salvestus
-    salvestus = lae_salvestus()
-    lahendatud_id = set(salvestus.get("lahendatud", []))
-    vead = int(salvestus.get("vead", 0))
-    punane_x_lopp = 0  # pygame.time.get_ticks() millis
-    for obj in objektid:
-        if obj.küsimus.objekt in lahendatud_id:
-            obj.lahendatud = True
-            kood_nahtav[obj.jarjekord] = obj.küsimus.taht
+    def font_kood() -> pygame.font.Font:
+        return lae_sysfont("consolas", 18)
+
+    def font_nupp() -> pygame.font.Font:
+        return lae_font(18)
+
+    def font_tagasi() -> pygame.font.Font:
+        return lae_font(14)
 
     debug = False
-    olek = "tuba"  # tuba | küsimus | lukk | võit | kaotus
-    aktiivne: Optional[KlikitavObjekt] = None
-    sisestatud_kood = ""
+    kerimine: Optional[paigutus.Kerimisala] = None  # aktiivse küsimuse koodiblokk
     teade = ""
-    teade_lopp = 0
+    teade_lopp = 0.0  # mängukella aeg
+    mängijavalik: Optional[str] = None  # mängija valiku aknas sisestatud nimi; None = aken kinni
+    mängijate_nimed: list[str] = []
+
+    helid = Helid()  # mixer käivitub alles pärast esimest kaadrit
 
     def salvesta_progress() -> None:
-        """Salvestab lahendatud objektid + vead."""
-        salvesta_salvestus({"lahendatud": sorted(lahendatud_id), "vead": vead})
-
-    def registreeri_viga(sonum: str = "Viga!"):
-        nonlocal vead, olek, aktiivne, sisestatud_kood, punane_x_lopp
-        vead += 1
-        punane_x_lopp = pygame.time.get_ticks() + X_FLASH_MS
-        naita_teadet(f"{sonum} (vead: {vead}/{MAKS_VEAD})", 1300)
-        salvesta_progress()
-        if vead >= MAKS_VEAD:
-            olek = "kaotus"
-            aktiivne = None
-            sisestatud_kood = ""
+        """Salvestab mängija lahendatud objektid + vead (taustal, vt mangijad.py). Serveriga mängides salvestab server."""
+        if mängijad is not None:
+            LOENDURID["salvestused"] += 1
+            mängijad.salvesta(profiil, mäng.salvestus())
+
+    def logi_viga(tuba_nr: int, objekt: str, vastus: str) -> None:
+        """Vale vastus või kood mängija vigade ajalukku (õpetajale, vt mangijad.py)."""
+        if mängijad is not None:
+            mängijad.viga(profiil, tuba_nr, objekt, vastus)
+
+    def välju() -> None:
+        if väljumisel is not None:
+            väljumisel(mäng.seis())
+        if mängijad is not None:
+            mängijad.sulge()
+        helid.sulge()
+        if variandid is not None:
+            variandid.sulge()
+        if telemeetria is not None:
+            telemeetria.sulge()
+        haldur.sulge()
+        if server is not None:
+            mäng.sulge()  # Kaugseis
+        pygame.quit()
+        sys.exit()
 
     def naita_teadet(tekst: str, ms: int = 1500):
         nonlocal teade, teade_lopp
         teade = tekst
-        teade_lopp = pygame.time.get_ticks() + ms
+        teade_lopp = mängukell.aeg + ms
+
+    def näita(tulemus: Tulemus) -> None:
+        """Mängija tegevuse tulemus ekraanile (teade, punane X) ja vajadusel salvestusse."""
+        if tulemus.uus_tuba:
+            # järgmine tuba (tavaliselt juba taustal ette laetud)
+            sisene(mäng.tuba)
+            naita_teadet(f"Uks avanes! Järgmine tuba: {tuba.kirjeldus.nimi}")
+        if tulemus.teade:
+            naita_teadet(tulemus.teade, tulemus.ms)
+        if tulemus.viga:
+            animatsioonid.alusta("x", 1.0, 0.0, X_FLASH_MS, mängukell.aeg, animatsioon.lineaarne)
+        if tulemus.salvesta:
+            salvesta_progress()
+
+    def kõla(tulemus: Tulemus, õnnestus: str) -> None:
+        """Vastuse või koodi heliefekt: kaotus, viga või õnnestumise heli."""
+        if mäng.olek == "kaotus":
+            helid.mängi("kaotus")
+        elif tulemus.viga:
+            helid.mängi("viga")
+        else:
+            helid.mängi(õnnestus)
+
+    def vasta(valik: int) -> None:
+        k, tuba_nr = mäng.küsimused[mäng.aktiivne], mäng.tuba
+        tulemus = mäng.vasta(valik)
+        if telemeetria is not None:
+            # malliga küsimuse valikud on igal variandil erinevad, valiku number ei ütleks midagi
+            malliga = variandid is not None and k.mall is not None
+            telemeetria.vastus(k.objekt, None if malliga else valik, not tulemus.viga, mäng.vead, tuba_nr)
+        if tulemus.viga:
+            logi_viga(tuba_nr, k.objekt, k.valikud[valik])
+        kõla(tulemus, "õige")
+        näita(tulemus)
+
+    def tagasi() -> bool:
+        objekt = mäng.küsimused[mäng.aktiivne].objekt if mäng.olek == "küsimus" and mäng.aktiivne is not None else ""
+        olek = mäng.olek
+        if not mäng.tagasi():
+            return False
+        if telemeetria is not None:
+            if olek == "lukk":
+                telemeetria.lukk_suletud(mäng.vead, mäng.tuba)
+            elif objekt:
+                telemeetria.suletud(objekt, mäng.vead, mäng.tuba)
+        return True
+
+    def uus_variant(k: küsimus) -> None:
+        """Malliga küsimusele järgmine valmis variant; kui see pole veel valmis, jääb eelmine."""
+        variant = variandid.võta((mäng.tuba, k.objekt)) if variandid is not None and k.mall else None
+        if variant is not None:
+            kysimus, kood, valikud, õige = variant
+            k.vaheta(kysimustepank.KüsimuseSisu(k.nimi, kysimus, kood, valikud, õige))
+            KIHID.unusta(("küsimus", mäng.tuba, k.objekt))
+            KIHID.unusta(("kood", mäng.tuba, k.objekt))
+
+    def ava_mängijavalik() -> None:
+        nonlocal mängijavalik, mängijate_nimed
+        mängijavalik = ""
+        mängijate_nimed = mängijad.nimed(MÄNGIJAID_NÄHA)
+        animatsioonid.alusta("paneel", 0.0, 1.0, PANEELI_ILMUMINE_MS, mängukell.aeg, ala=EKRAANI_RECT)
+
+    def vaheta_mängijat(uus: str) -> None:
+        """Teise mängija seis on mälus või tuleb andmebaasist indeksi järgi; kettale kirjutab taustalõim."""
+        nonlocal profiil, mängijavalik, kerimine, seis_enne, lahendatud_enne
+        mängijavalik = None
+        if uus != profiil:
+            tagasi()
+            profiil = uus
+            mängijad.vali(profiil)
+            mäng.taasta(mängijad.lae(profiil))
+            sisene(mäng.tuba)
+            kerimine = None
+            # vahetus pole mängusündmus: kaotatud südameid ega uusi tähti ei animeerita
+            animatsioonid.tühjenda()
+            seis_enne, lahendatud_enne = mängu_seis(), set(mäng.lahendatud)
+        naita_teadet(f"Mängija: {profiil}")
+
+    def mängijavaliku_sündmus(ev: pygame.event.Event) -> None:
+        """Klahv või klikk mängija valiku aknas (see aken võtab kõik sündmused endale)."""
+        nonlocal mängijavalik
+        if ev.type == pygame.MOUSEBUTTONDOWN:
+            if ev.button == 1:
+                for uus, rida in zip(mängijate_nimed, mängijate_read(len(mängijate_nimed))):
+                    if rida.collidepoint(ev.pos):
+                        vaheta_mängijat(uus)
+                        break
+        elif ev.key in (pygame.K_ESCAPE, pygame.K_TAB):
+            mängijavalik = None
+        elif ev.key == pygame.K_RETURN:
+            if mangijad.NIMI.match(mängijavalik):
+                vaheta_mängijat(mängijavalik)
+            else:
+                naita_teadet("Nimes võivad olla tähed, numbrid, _ ja - (kuni 40 märki).")
+        elif ev.key == pygame.K_BACKSPACE:
+            mängijavalik = mängijavalik[:-1]
+        elif ev.unicode and mangijad.NIMI.match(mängijavalik + ev.unicode):
+            mängijavalik += ev.unicode
+
+    def aktiivne_objekt() -> Optional[KlikitavObjekt]:
+        return objektid[mäng.aktiivne] if mäng.olek == "küsimus" and mäng.aktiivne is not None else None
+
+    def joonista_küsimus(pind: pygame.Surface, aktiivne: KlikitavObjekt, hiir: tuple[int, int]) -> None:
+        k = aktiivne.küsimus
+        kiht = KIHID.hangi(("küsimus", mäng.tuba, k.objekt), lambda: ehita_küsimuse_paneel(k, font, font_suur(), font_tagasi()))
+        pind.blit(kiht, KÜSIMUSE_PANEEL.topleft)
+        if kerimine is not None:
+            ala = koodi_ala(küsimuse_paigutus(font, k)[1])
+            pind.blit(kerimine.vaade(), ala.topleft)
+            joonista_kerimisriba(pind, ala, kerimine)
+
+        # valikud (ainult need sõltuvad hiirest)
+        for i, nupp in enumerate(küsimuse_paigutus(font, k)[2]):
+            tekst = k.valikud[i] if i < len(k.valikud) else "-"
+            joonista_nupp(pind, font_nupp(), f"{i+1}) {tekst}",nupp, nupp.collidepoint(hiir))
+
+    def joonista_lukk(pind: pygame.Surface) -> None:
+        pikkus = len(mäng.oodatav_kood)
+        kiht = KIHID.hangi(("lukk", pikkus), lambda: ehita_luku_paneel(font, font_suur(), pikkus))
+        pind.blit(kiht, LUKU_PANEEL.topleft)
+        sis = LUKU_SISEND
+        pind.blit(render_tekst(font_suur(), mäng.sisestatud_kood, True, (245, 245, 245)), (sis.x + 10, sis.y + 10))
+
+    def joonista_mängijad(pind: pygame.Surface, hiir: tuple[int, int]) -> None:
+        pind.blit(KIHID.hangi(("mängijad",), lambda: ehita_mängijate_paneel(font, font_suur())), MÄNGIJATE_PANEEL.topleft)
+        sis = MÄNGIJA_SISEND
+        pind.blit(render_tekst(font_suur(), mängijavalik, True, (245, 245, 245)), (sis.x + 10, sis.y + 8))
+        for mängija, rida in zip(mängijate_nimed, mängijate_read(len(mängijate_nimed))):
+            tekst = f"{mängija} (praegu)" if mängija == profiil else mängija
+            joonista_nupp(pind, font_nupp(), tekst, rida, rida.collidepoint(hiir))
+
+    def joonista_paneel(joonista: Callable[[pygame.Surface], None], paneel: pygame.Rect, nähtavus: float) -> None:
+        """Varjund ja aken; sissehajumise ajal joonistatakse aken vahepinnale ja see poolläbipaistvalt peale."""
+        joonista_varjund(ekraan, nähtavus)
+        if nähtavus >= 1.0:
+            joonista(ekraan)
+            return
+        vahepind = KIHID.hangi(("paneeli_vahepind",), lambda: pygame.Surface((AKNA_LAIUS, AKNA_KÕRGUS), pygame.SRCALPHA))
+        vahepind.fill((0, 0, 0, 0), paneel)
+        joonista(vahepind)
+        vahepind.set_alpha(round(255 * nähtavus))
+        ekraan.blit(vahepind, paneel.topleft, paneel)  # ainult akna ala
+
+    def joonista_stseen(hiir: tuple[int, int], nüüd: float) -> None:
+        """Joonistab kõik (või ainult clip-ala); nüüd on kaadri mänguaeg animatsioonide jaoks."""
+        olek, aktiivne = mäng.olek, aktiivne_objekt()
+        if renderdaja is None:
+            ekraan.blit(taust, (0, 0))
+        else:
+            ekraan.fill((0, 0, 0, 0))  # kiht on läbipaistev, taust on tekstuur
+        profiilija.lõik("taust")
+
+        # uks
+        if debug:
+            pygame.draw.rect(ekraan, (255, 255, 0), ukse_rect, 2)
+
+        # objektid
+        hiire_all = indeks.leia(hiir) if debug else None
+        for o in objektid:
+            o.joonista(ekraan, debug, o is hiire_all, mäng.on_lahendatud(o.jarjekord), pilt=renderdaja is None)
+        profiilija.lõik("objektid")
+
+        # ülemine riba
+        pygame.draw.rect(ekraan, (18, 18, 22), pygame.Rect(0, 0, AKNA_LAIUS, 48))
+        pygame.draw.line(ekraan, (80, 80, 80), (0, 48), (AKNA_LAIUS, 48), 2)
+        kood_tekst = "Kood: " + " ".join(mäng.kood_nahtav)
+        ekraan.blit(render_tekst(font, kood_tekst, True, (240, 240, 240)), (14, 12))
+        for i, k in enumerate(mäng.küsimused):
+            # äsja avatud täht on alguses kuldne (värv muutub iga kaader, seega mitte tekstivahemällu)
+            uus = animatsioonid.väärtus(("täht", k.objekt), nüüd, 0.0)
+            if uus > 0 and k.objekt in mäng.lahendatud:
+                x = 14 + font.size(kood_tekst[:len("Kood: ") + 2 * i])[0]
+                ekraan.blit(font.render(k.taht, True, segu((240, 240, 240), (255, 200, 60), uus)), (x, 12))
+        joonista_sydamed(ekraan, mäng.vead, animatsioonid.väärtus("süda", nüüd, 0.0))
+        profiilija.lõik("ülariba")
 
-    def koik_lahendatud() -> bool:
-        return all(o.lahendatud for o in objektid)
+        # teade
+        if teade and nüüd < teade_lopp:
+            kast = TEATE_KAST
+            pygame.draw.rect(ekraan, (0, 0, 0), kast, border_radius=10)
+            pygame.draw.rect(ekraan, (220, 220, 220), kast, 2, border_radius=10)
+            ekraan.blit(render_tekst(font, teade, True, (240, 240, 240)), (kast.x + 12, kast.y + 10))
+        profiilija.lõik("teade")
+
+        # küsimuse aken
+        if olek == "küsimus" and aktiivne is not None:
+            joonista_paneel(lambda pind: joonista_küsimus(pind, aktiivne, hiir), KÜSIMUSE_PANEEL,
+                            animatsioonid.väärtus("paneel", nüüd))
+            profiilija.lõik("küsimus")
+
+        # luku aken
+        if olek == "lukk":
+            joonista_paneel(joonista_lukk, LUKU_PANEEL, animatsioonid.väärtus("paneel", nüüd))
+            profiilija.lõik("lukk")
+
+        # mängija valik (kõige peal)
+        if mängijavalik is not None:
+            joonista_paneel(lambda pind: joonista_mängijad(pind, hiir), MÄNGIJATE_PANEEL,
+                            animatsioonid.väärtus("paneel", nüüd))
+            profiilija.lõik("mängijad")
+
+        # võit
+        if olek == "võit":
+            ekraan.blit(KIHID.hangi(("võit",), lambda: ehita_lõpuekraan([
+                (font_suur(), "Põgenesid!", (255, 255, 255), 270),
+                (font, "ESC = sulge mäng", (220, 220, 220), 310),
+            ])), (0, 0))
+
+        # kaotus
+        if olek == "kaotus":
+            ekraan.blit(KIHID.hangi(("kaotus",), lambda: ehita_lõpuekraan([
+                (font_suur(), "Sa kaotasid!", (255, 255, 255), 255),
+                (font, f"Sul sai {MAKS_VEAD} viga täis.", (220, 220, 220), 295),
+                (font, "R = proovi uuesti | ESC = sulge", (220, 220, 220), 330),
+            ])), (0, 0))
+        profiilija.lõik("lõpp")
+
+        # punane X (vilgub pärast viga)
+        if animatsioonid.käib("x", nüüd):
+            cx, cy = AKNA_LAIUS // 2, AKNA_KÕRGUS // 2
+            pikkus = X_PIKKUS
+            pygame.draw.line(ekraan, (230, 50, 50), (cx - pikkus, cy - pikkus), (cx + pikkus, cy + pikkus), 12)
+            pygame.draw.line(ekraan, (230, 50, 50), (cx + pikkus, cy - pikkus), (cx - pikkus, cy + pikkus), 12)
+        profiilija.lõik("x")
+
+        if debug:
+            joonista_profiil(ekraan, font_tagasi(), profiilija)
+            profiilija.lõik("profiil")
+
+    def pildid() -> list[tuple[pygame.Surface, pygame.Rect]]:
+        """Renderdaja tekstuurid: taust ja objektide pildid joonistamise järjekorras."""
+        return [(taust, taust.get_rect())] + [(o.pilt_pind, o.rect) for o in objektid if o.pilt_pind is not None]
+
+    def ekraani_osad(hiir: tuple[int, int]) -> dict[str, object]:
+        """Kõik, millest sõltub ekraani sisu. Kui "üldine" muutub, joonistatakse kogu ekraan,
+        teiste osade muutumisel ainult vastav ala."""
+        olek, aktiivne = mäng.olek, aktiivne_objekt()
+        nupp = -1
+        if olek == "küsimus" and aktiivne is not None:
+            nupud = küsimuse_paigutus(font, aktiivne.küsimus)[2]
+            nupp = next((i for i, n in enumerate(nupud) if n.collidepoint(hiir)), -1)
+        objekt = -1
+        if debug:
+            hiire_all = indeks.leia(hiir)
+            objekt = hiire_all.jarjekord if hiire_all is not None else -1
+        mängija_nupp = -1
+        if mängijavalik is not None:
+            read = mängijate_read(len(mängijate_nimed))
+            mängija_nupp = next((i for i, r in enumerate(read) if r.collidepoint(hiir)), -1)
+        nüüd = mängukell.aeg
+        return {
+            "üldine": (olek, mäng.tuba, aktiivne, debug, mäng.vead, tuple(mäng.kood_nahtav), mängijavalik, mängija_nupp),
+            "objekt": objekt,
+            "nupp": nupp,
+            "kood": (kerimine.x, kerimine.y) if olek == "küsimus" and kerimine is not None else None,
+            "teade": teade if teade and nüüd < teade_lopp else "",
+            "x": animatsioonid.käib("x", nüüd),
+            "animatsioonid": animatsioonid.seis(nüüd),
+            "sisend": mäng.sisestatud_kood if olek == "lukk" else "",
+            "profiil": len(profiilija.proovid) and profiilija.proovid[-1]["aeg_s"] if debug else 0,
+        }
+
+    def mustad_alad(vanad: dict[str, object], uued: dict[str, object]) -> list[pygame.Rect]:
+        """Ekraani alad, mis on eelmisest kaadrist muutunud."""
+        aktiivne = aktiivne_objekt()
+        alad: list[pygame.Rect] = []
+        for i in (vanad["objekt"], uued["objekt"]):
+            if vanad["objekt"] != uued["objekt"] and i >= 0:
+                alad.append(objektid[i].rect)
+        if vanad["nupp"] != uued["nupp"] and aktiivne is not None:
+            nupud = küsimuse_paigutus(font, aktiivne.küsimus)[2]
+            alad.extend(nupud[i] for i in (vanad["nupp"], uued["nupp"]) if i >= 0)
+        if vanad["kood"] != uued["kood"] and aktiivne is not None:
+            alad.append(küsimuse_paigutus(font, aktiivne.küsimus)[1])
+        if vanad["teade"] != uued["teade"]:
+            alad.append(TEATE_KAST)
+        if vanad["x"] != uued["x"]:
+            alad.append(X_RECT)
+        if vanad["sisend"] != uued["sisend"]:
+            alad.append(LUKU_SISEND)
+        if vanad["profiil"] != uued["profiil"]:
+            alad.append(PROFIILI_RECT)
+        if vanad["animatsioonid"] != uued["animatsioonid"]:
+            alad.extend(pygame.Rect(a) for a in {ala for _, _, ala in vanad["animatsioonid"] + uued["animatsioonid"]})
+        return alad
+
+    def mängu_seis() -> tuple:
+        return mäng.olek, mäng.vead, mäng.tuba, len(mäng.lahendatud)
+
+    lahendatud_enne = set(mäng.lahendatud)
+
+    def alusta_animatsioonid(enne: tuple) -> None:
+        """Seisu muutustest tulenevad animatsioonid: aken avanes, süda kaotati, täht avanes."""
+        nonlocal lahendatud_enne
+        olek, vead, tuba_nr, lahendatuid = enne
+        t = mängukell.aeg
+        if mäng.olek in ("küsimus", "lukk") and mäng.olek != olek:
+            animatsioonid.alusta("paneel", 0.0, 1.0, PANEELI_ILMUMINE_MS, t, ala=EKRAANI_RECT)
+        if mäng.vead > vead:
+            animatsioonid.alusta("süda", 1.0, 0.0, SÜDAME_KADUMINE_MS, t, ala=SÜDAMETE_RECT)
+        if (mäng.tuba, len(mäng.lahendatud)) != (tuba_nr, lahendatuid):
+            if mäng.tuba == tuba_nr:
+                for objekt in mäng.lahendatud - lahendatud_enne:
+                    animatsioonid.alusta(("täht", objekt), 1.0, 0.0, TÄHE_ILMUMINE_MS, t, animatsioon.lineaarne,
+                                         KOODI_RIBA_RECT)
+            lahendatud_enne = set(mäng.lahendatud)
+
+    eelmised: dict[str, object] = {}
+    ootel = False  # eelmises kaadris ei muutunud midagi -> võib järgmist sündmust oodata
+
+    hiir = pygame.mouse.get_pos()
+    profiilija = Profiilija()
+    if mängijad is not None:
+        naita_teadet(f"Mängija: {profiil} (Tab = vaheta)", 2500)
 
     while True:
-        hiir = pygame.mouse.get_pos()
+        if sündmuste_allikas is not None:
+            sündmused = sündmuste_allikas()
+        elif OSALINE_UUENDUS and ootel:
+            # animatsioonide ajal ootel ei olda, seega piisab teate ja punase X lõpust
+            tähtajad = (teade_lopp, animatsioonid.lõpuaeg("x"))
+            sündmused = oota_sündmusi([math.ceil(t) for t in tähtajad])
+        else:
+            sündmused = pygame.event.get()
+        if sündmuste_kuulaja is not None:
+            sündmuste_kuulaja(sündmused)
+        profiilija.alusta()
+        seis_enne = mängu_seis()
+
+        for ev in sündmused:
+            if ev.type in (pygame.MOUSEMOTION, pygame.MOUSEBUTTONDOWN):
+                hiir = ev.pos
 
-        for ev in pygame.event.get():
             if ev.type == pygame.QUIT:
-                pygame.quit()
-                sys.exit()
+                välju()
+
+            if ev.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+                eelmised = {}  # aken tuli nähtavale -> joonista kõik uuesti
+
+            if ev.type in (pygame.VIDEORESIZE, pygame.WINDOWSIZECHANGED):
+                KIHID.tühjenda()
+                eelmised = {}
+
+            if mängijavalik is not None and ev.type in (pygame.KEYDOWN, pygame.MOUSEBUTTONDOWN):
+                mängijavaliku_sündmus(ev)
+                continue
 
             if ev.type == pygame.KEYDOWN:
+                if ev.key == pygame.K_TAB and mängijad is not None:
+                    ava_mängijavalik()
+                    continue
+
                 if ev.key == pygame.K_F3:
                     debug = not debug
                     naita_teadet("DEBUG: " + ("SEES" if debug else "VÄLJAS"), 900)
 
+                if ev.key == pygame.K_F4:
+                    failid = profiilija.salvesta(time.strftime("profiil_%Y%m%d_%H%M%S"))
+                    naita_teadet("Profiil: " + (", ".join(failid) if failid else "andmeid pole"), 2500)
+
                 if ev.key == pygame.K_r:
-                    # reset
-                    if os.path.exists(SALVESTUS_FAIL):
-                        os.remove(SALVESTUS_FAIL)
-                    for o in objektid:
-                        o.lahendatud = False
-                    kood_nahtav = ["_"] * len(küsimused)
-                    lahendatud_id.clear()
-                    vead = 0
-                    punane_x_lopp = 0
-                    olek = "tuba"
-                    aktiivne = None
-                    sisestatud_kood = ""
-                    naita_teadet("Reset tehtud.")
+                    # reset (ainult selle mängija progress; vigade ajalugu jääb õpetajale alles)
+                    tulemus = mäng.lähtesta()
+                    sisene(0)
+                    animatsioonid.tühjenda()
+                    näita(tulemus)
+                    salvesta_progress()
 
                 if ev.key == pygame.K_ESCAPE:
-                    if olek in ("küsimus", "lukk"):
-                        olek = "tuba"
-                        aktiivne = None
-                        sisestatud_kood = ""
-                    elif olek in ("võit", "kaotus"):
-                        pygame.quit()
-                        sys.exit()
-                    else:
-                        pygame.quit()
-                        sys.exit()
-
-                if olek == "küsimus" and aktiivne is not None:
+                    if not tagasi():
+                        välju()
+
+                if mäng.olek == "küsimus" and kerimine is not None:
+                    if ev.key in (pygame.K_UP, pygame.K_DOWN):
+                        kerimine.keri(0, KOODI_REAVAHE if ev.key == pygame.K_DOWN else -KOODI_REAVAHE)
+                    elif ev.key in (pygame.K_PAGEUP, pygame.K_PAGEDOWN):
+                        kerimine.keri(0, kerimine.kõrgus if ev.key == pygame.K_PAGEDOWN else -kerimine.kõrgus)
+
+                if mäng.olek == "küsimus" and mäng.aktiivne is not None:
                     if pygame.K_1 <= ev.key <= pygame.K_4:
                         valik = ev.key - pygame.K_1
-                        if valik < len(aktiivne.küsimus.valikud):
-                            # kontroll
-                            if valik == aktiivne.küsimus.oige_vastus:
-                                if not aktiivne.lahendatud:
-                                    aktiivne.lahendatud = True
-                                    kood_nahtav[aktiivne.jarjekord] = aktiivne.küsimus.taht
-                                    lahendatud_id.add(aktiivne.küsimus.objekt)
-                                    salvesta_progress()
-                                naita_teadet(f"Õige! Täht: {aktiivne.küsimus.taht}")
-                                olek = "tuba"
-                                aktiivne = None
-                            else:
-                                registreeri_viga("Vale vastus")
-
-                if olek == "lukk":
+                        if valik < len(mäng.küsimused[mäng.aktiivne].valikud):
+                            vasta(valik)
+
+                if mäng.olek == "lukk":
                     if ev.key == pygame.K_BACKSPACE:
-                        sisestatud_kood = sisestatud_kood[:-1]
+                        mäng.kustuta()
                     elif ev.key == pygame.K_RETURN:
-                        if sisestatud_kood.upper() == oodatav_kood.upper():
-                            olek = "võit"
-                        else:
-                            registreeri_viga("Vale kood")
-                            sisestatud_kood = ""
-                    else:
-                        if ev.unicode and ev.unicode.isprintable():
-                            if len(sisestatud_kood) < len(oodatav_kood) + 4:
-                                sisestatud_kood += ev.unicode
+                        tuba_nr, kood = mäng.tuba, mäng.sisestatud_kood
+                        tulemus = mäng.kinnita_kood()
+                        if telemeetria is not None:
+                            telemeetria.kood(not tulemus.viga, mäng.vead, tuba_nr)
+                        if tulemus.viga:
+                            logi_viga(tuba_nr, "uks", kood)
+                        kõla(tulemus, "võit" if mäng.olek == "võit" else "uks")
+                        näita(tulemus)
+                    elif ev.unicode and ev.unicode.isprintable():
+                        mäng.sisesta(ev.unicode)
+
+            if ev.type == pygame.MOUSEWHEEL and mäng.olek == "küsimus" and kerimine is not None:
+                kerimine.keri(-ev.x * KERIMISE_SAMM, -ev.y * KERIMISE_SAMM)
 
             if ev.type == pygame.MOUSEBUTTONDOWN and ev.button == 1:
                 if debug:
-                    print("Klikk:", hiir, "olek:", olek)
+                    print("Klikk:", hiir, "olek:", mäng.olek)
 
-                if olek == "tuba":
+                if mäng.olek == "tuba":
                     # uks
-                    if UKSE_RECT.collidepoint(hiir):
-                        if not koik_lahendatud():
-                            naita_teadet(f"Uks on lukus. Tee kõik ülesanded ({kood_nahtav.count('_')}/{len(kood_nahtav)} puudu).")
-                        else:
-                            olek = "lukk"
-                            sisestatud_kood = ""
+                    if ukse_rect.collidepoint(hiir):
+                        näita(mäng.ava_uks())
+                        if telemeetria is not None and mäng.olek == "lukk":
+                            telemeetria.lukk_avatud(mäng.vead, mäng.tuba)
                         continue
 
                     # objekt
-                    for o in objektid:
-                        if o.rect.collidepoint(hiir):
-                            aktiivne = o
-                            if o.lahendatud:
-                                naita_teadet("See on juba lahendatud.")
-                                aktiivne = None
-                            else:
-                                olek = "küsimus"
-                            break
-
-                elif olek == "küsimus" and aktiivne is not None:
+                    o = indeks.leia(hiir)
+                    if o is not None:
+                        näita(mäng.ava_küsimus(o.jarjekord))
+                        if mäng.olek == "küsimus":
+                            k = o.küsimus
+                            uus_variant(k)
+                            if telemeetria is not None:
+                                telemeetria.avatud(k.objekt, mäng.vead, mäng.tuba)
+                            pind = KIHID.hangi(("kood", mäng.tuba, k.objekt), lambda: paigutus.koodipind(font_kood(), k.kood, KOODI_REAVAHE))
+                            kerimine = paigutus.Kerimisala(pind, koodi_ala(küsimuse_paigutus(font, k)[1]).size)
+
+                elif mäng.olek == "küsimus" and mäng.aktiivne is not None:
                     # nupud
-                    paneel = pygame.Rect(110, 90, 580, 400)
-                    nupu_w = paneel.width - 40
-                    nupu_h = 36
-                    alg_y = paneel.bottom - (nupu_h + 8) * 4 - 12
-                    for i in range(4):
-                        nupp = pygame.Rect(paneel.x + 20, alg_y + i * (nupu_h + 12), nupu_w, nupu_h)
+                    nupud = küsimuse_paigutus(font, mäng.küsimused[mäng.aktiivne])[2]
+                    for i, nupp in enumerate(nupud):
                         if nupp.collidepoint(hiir):
-                            if i == aktiivne.küsimus.oige_vastus:
-                                if not aktiivne.lahendatud:
-                                    aktiivne.lahendatud = True
-                                    kood_nahtav[aktiivne.jarjekord] = aktiivne.küsimus.taht
-                                    lahendatud_id.add(aktiivne.küsimus.objekt)
-                                    salvesta_progress()
-                                naita_teadet(f"Õige! Täht: {aktiivne.küsimus.taht}")
-                                olek = "tuba"
-                                aktiivne = None
-                            else:
-                                registreeri_viga("Vale vastus")
+                            vasta(i)
                             break
 
-        # -------------------- Joonistamine --------------------
-
-        ekraan.blit(taust, (0, 0))
-
-        # uks
-        if debug:
-            pygame.draw.rect(ekraan, (255, 255, 0), UKSE_RECT, 2)
-
-        # objektid
-        for o in objektid:
-            o.joonista(ekraan, debug, o.rect.collidepoint(hiir))
-
-        # ülemine riba
-        pygame.draw.rect(ekraan, (18, 18, 22), pygame.Rect(0, 0, AKNA_LAIUS, 48))
-        pygame.draw.line(ekraan, (80, 80, 80), (0, 48), (AKNA_LAIUS, 48), 2)
-        ekraan.blit(font.render("Kood: " + " ".join(kood_nahtav), True, (240, 240, 240)), (14, 12))
-        joonista_sydamed(ekraan, vead)
-
-        # teade
-        if teade and pygame.time.get_ticks() < teade_lopp:
-            kast = pygame.Rect(14, AKNA_KÕRGUS - 52, AKNA_LAIUS - 28, 40)
-            pygame.draw.rect(ekraan, (0, 0, 0), kast, border_radius=10)
-            pygame.draw.rect(ekraan, (220, 220, 220), kast, 2, border_radius=10)
-            ekraan.blit(font.render(teade, True, (240, 240, 240)), (kast.x + 12, kast.y + 10))
+        profiilija.lõik("sündmused")
 
-        # küsimuse aken
-        if olek == "küsimus" and aktiivne is not None:
-            joonista_varjund(ekraan)
-            paneel = pygame.Rect(110, 70, 580, 460)
-            pygame.draw.rect(ekraan, (25, 28, 34), paneel, border_radius=14)
-            pygame.draw.rect(ekraan, (220, 220, 220), paneel, 2, border_radius=14)
-
-            # pealkiri
-            ekraan.blit(font_suur.render(aktiivne.küsimus.nimi, True, (245, 245, 245)), (paneel.x + 18, paneel.y + 12))
-
-            # küsimus
-            read = murra_tekst(font, aktiivne.küsimus.kysimus, paneel.width - 36)
-            y = paneel.y + 54
-            for r in read:
-                ekraan.blit(font.render(r, True, (235, 235, 235)), (paneel.x + 18, y))
-                y += 24
-
-            # koodiblokk
-            nupu_h = 26
-            vahe = 6
-            valikute_arv = 4
-
-            valikute_ruum = valikute_arv * nupu_h + (valikute_arv - 1) * vahe + 20 # määrame kui palju ruumi on valikute mahutamisek vaja
-
-            maks_koodi_kõrgus = (paneel.bottom - valikute_ruum - y- 20)
-
-            kood_kõrgus = min(210, maks_koodi_kõrgus)
-
-            kood_rect = pygame.Rect(paneel.x + 18,y + 6,paneel.width - 36,kood_kõrgus)
-
-            pygame.draw.rect(ekraan, (15, 16, 20), kood_rect, border_radius=10)
-            pygame.draw.rect(ekraan, (90, 90, 90), kood_rect, 2, border_radius=10)
-            ky = kood_rect.y + 10
-            for r in aktiivne.küsimus.kood.split("\n")[:8]:
-                if ky + 20 > kood_rect.bottom:
-                    break
-                ekraan.blit(font_kood.render(r, True, (210, 245, 210)), (kood_rect.x + 10, ky))
-                ky += 20
-
-            # valikud
-            nupu_w = paneel.width - 40
-            nupu_h = 26
-            footer = 32 # alumine osa ehk footer, et valikud ei kataks teksti ära
-            alg_y = min(kood_rect.bottom + 10, paneel.bottom - footer - (nupu_h + 6) * 4)
-            font_nupp = lae_font(18)
-            font_tagasi = lae_font(14)
-
-            for i in range(4):
-                nupp = pygame.Rect(paneel.x + 20, alg_y + i * (nupu_h + 6), nupu_w, nupu_h)
-                tekst = aktiivne.küsimus.valikud[i] if i < len(aktiivne.küsimus.valikud) else "-"
-                joonista_nupp(ekraan, font_nupp, f"{i+1}) {tekst}",nupp, nupp.collidepoint(hiir))
-
-            ekraan.blit(font_tagasi.render("ESC - tagasi", True, (200, 200, 200)), (paneel.x + 18, paneel.bottom - 28))
+        # -------------------- Uuendus --------------------
+        # üks aeg kogu kaadrile; animatsioonid on ajast arvutatud, seega on ajastus õige
+        # ka vahele jäänud kaadritega
 
-        # luku aken
-        if olek == "lukk":
-            joonista_varjund(ekraan)
-            paneel = pygame.Rect(180, 190, 440, 220)
-            pygame.draw.rect(ekraan, (25, 28, 34), paneel, border_radius=14)
-            pygame.draw.rect(ekraan, (220, 220, 220), paneel, 2, border_radius=14)
-
-            ekraan.blit(font_suur.render("Ukse lukk", True, (245, 245, 245)), (paneel.x + 18, paneel.y + 12))
-            ekraan.blit(font.render(f"Sisesta kood ({len(oodatav_kood)} märki) ja ENTER.", True, (220, 220, 220)), (paneel.x + 18, paneel.y + 60))
-
-            sis = pygame.Rect(paneel.x + 18, paneel.y + 100, paneel.width - 36, 52)
-            pygame.draw.rect(ekraan, (15, 16, 20), sis, border_radius=10)
-            pygame.draw.rect(ekraan, (90, 90, 90), sis, 2, border_radius=10)
-            ekraan.blit(font_suur.render(sisestatud_kood, True, (245, 245, 245)), (sis.x + 10, sis.y + 10))
-            ekraan.blit(font.render("ESC = tagasi", True, (200, 200, 200)), (paneel.x + 18, paneel.bottom - 28))
-
-        # võit
-        if olek == "võit":
-            joonista_varjund(ekraan)
-            t1 = font_suur.render("Põgenesid!", True, (255, 255, 255))
-            t2 = font.render("ESC = sulge mäng", True, (220, 220, 220))
-            ekraan.blit(t1, t1.get_rect(center=(AKNA_LAIUS // 2, 270)))
-            ekraan.blit(t2, t2.get_rect(center=(AKNA_LAIUS // 2, 310)))
+        mängukell.edasi(aeg())
+        animatsioonid.uuenda(mängukell.aeg)
+        alusta_animatsioonid(seis_enne)
+        nüüd = mängukell.aeg
+        profiilija.lõik("uuendus")
 
-        # kaotus
-        if olek == "kaotus":
-            joonista_varjund(ekraan)
-            t1 = font_suur.render("Sa kaotasid!", True, (255, 255, 255))
-            t2 = font.render(f"Sul sai {MAKS_VEAD} viga täis.", True, (220, 220, 220))
-            t3 = font.render("R = proovi uuesti | ESC = sulge", True, (220, 220, 220))
-            ekraan.blit(t1, t1.get_rect(center=(AKNA_LAIUS // 2, 255)))
-            ekraan.blit(t2, t2.get_rect(center=(AKNA_LAIUS // 2, 295)))
-            ekraan.blit(t3, t3.get_rect(center=(AKNA_LAIUS // 2, 330)))
-
-        # punane X (vilgub pärast viga)
-        if pygame.time.get_ticks() < punane_x_lopp:
-            cx, cy = AKNA_LAIUS // 2, AKNA_KÕRGUS // 2
-            pikkus = 70
-            pygame.draw.line(ekraan, (230, 50, 50), (cx - pikkus, cy - pikkus), (cx + pikkus, cy + pikkus), 12)
-            pygame.draw.line(ekraan, (230, 50, 50), (cx + pikkus, cy - pikkus), (cx - pikkus, cy + pikkus), 12)
+        # -------------------- Joonistamine --------------------
 
-        pygame.display.flip()
-        kell.tick(FPS)
+        osad = ekraani_osad(hiir)
+        profiilija.lõik("paigutus")
+        if not OSALINE_UUENDUS or osad["üldine"] != eelmised.get("üldine"):
+            joonista_stseen(hiir, nüüd)
+            if renderdaja is not None:
+                renderdaja.uuenda()
+                renderdaja.esita(pildid())
+            else:
+                pygame.display.flip()
+        else:
+            alad = mustad_alad(eelmised, osad)
+            profiilija.lõik("paigutus")
+            for ala in alad:
+                ekraan.set_clip(ala)
+                joonista_stseen(hiir, nüüd)
+            ekraan.set_clip(None)
+            if alad and renderdaja is not None:
+                renderdaja.uuenda(alad)
+                renderdaja.esita(pildid())
+            elif alad:
+                pygame.display.update(alad)
+        profiilija.lõik("flip")
+        profiilija.lõpeta()
+        if not KÄIVITUS.valmis:
+            KÄIVITUS.lõpeta("esimene kaader")
+            # tuba on ekraanil; küsimuste jaoks vajalik laetakse nüüd taustal
+            otsi_sysfont("consolas")
+            eellae_tekstid(tuba.küsimused)
+            if HELID:
+                helid.alusta(järellaadija())
+            if variandid is not None:
+                variandid.käivita()
+        ootel = osad == eelmised
+        eelmised = osad
+
+        haldur.lõpeta_valmis()
+        if kaadri_kuulaja is not None:
+            kaadri_kuulaja(mäng.olek)
+        kell.tick(fps)
 
 
 if __name__ == "__main__":
-    main()
-
+    import argparse
+
+    parser = argparse.ArgumentParser(description="Heleri & Adele – Põgenemismäng")
+    parser.add_argument("--lindista", metavar="FAIL", help="salvesta sisend faili (taasesitus: python sisendlogi.py FAIL)")
+    parser.add_argument("--server", metavar="HOST:PORT", help="mängi klassiserveris (vt klassiserver.py)")
+    parser.add_argument("--nimi", default="", help="mängija nimi serveris või kohalik profiil (vaikimisi viimati mänginud)")
+    parser.add_argument("--telemeetria", nargs="?", const="telemeetria", metavar="KAUST",
+                        help="logi vastused ja ajad kausta (kokkuvõte: python telemeetria.py KAUST)")
+    parser.add_argument("--renderdaja", choices=("pind", "sdl2", "sdl2-tarkvara"), default=RENDERDAJA,
+                        help="sdl2: skaleeritav aken, vsync ja tekstuurid (vt renderdaja.py)")
+    parser.add_argument("--käivitusaeg", "--profile-startup", nargs="?", type=float, const=KÄIVITUSE_EELARVE_MS,
+                        metavar="MS", help="näita aega esimese kaadrini osade kaupa ja lõpeta (kood 1, kui üle eelarve)")
+    parser.add_argument("--vaikne", action="store_true", help="ilma helideta")
+    parser.add_argument("--seeme", type=int, help="malliga küsimuste variantide seeme (sama seeme = samad variandid)")
+    arg = parser.parse_args()
+    if arg.nimi and not mangijad.NIMI.match(arg.nimi):
+        parser.error(f"--nimi '{arg.nimi}': lubatud on tähed, numbrid, _ ja - (kuni 40 märki)")
+    RENDERDAJA = arg.renderdaja
+    HELID = not arg.vaikne
+    lõpukood: Optional[int] = None
+
+    def käivitusaja_kuulaja(olek: str) -> None:
+        # lõpetab tavalise QUIT-iga, et välju() sulgeks sisendlogi ja telemeetria
+        global lõpukood
+        if lõpukood is None:
+            print(KÄIVITUS.aruanne(arg.käivitusaeg))
+            lõpukood = 0 if KÄIVITUS.kokku_ms <= arg.käivitusaeg else 1
+            pygame.event.post(pygame.event.Event(pygame.QUIT))
+
+    kuulaja = käivitusaja_kuulaja if arg.käivitusaeg is not None else None
+    tlm = None
+    if arg.telemeetria:
+        tlm = Telemeetria(uus_logi(arg.telemeetria), aeg=pygame.time.get_ticks)
+    try:
+        if arg.lindista:
+            import sisendlogi
+
+            andmebaas, profiil = ava_mängijad(arg.nimi)
+            algus = andmebaas.lae(profiil)
+            andmebaas.sulge()
+            seeme = arg.seeme if arg.seeme is not None else mallid.uus_seeme()  # taasesitus vajab samu variante
+            lindistaja = sisendlogi.Lindistaja(arg.lindista, algus, mängija=profiil, seeme=seeme)
+            main(sündmuste_kuulaja=lindistaja, väljumisel=lindistaja.sulge, server=arg.server, nimi=arg.nimi or profiil,
+                 telemeetria=tlm, kaadri_kuulaja=kuulaja, seeme=seeme, variantide_kuulaja=lindistaja.variandid)
+        else:
+            main(server=arg.server, nimi=arg.nimi, telemeetria=tlm, kaadri_kuulaja=kuulaja, seeme=arg.seeme)
+    except SystemExit:
+        if lõpukood is None:
+            raise
+        raise SystemExit(lõpukood)
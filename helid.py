@@ -0,0 +1,150 @@
+"""
+Helid – heliefektid ja taustamuusika
+
+ - heliefektid (õige vastus, viga, uks, võit, kaotus) laetakse mällu üks kord, taustalõimes
+   kohe pärast esimest kaadrit; vastuse käsitlemisel ainult mängitakse valmis Sound-i
+ - efektid mängivad kindlast kanalite kogumist (KANALEID). Kui kõik kanalid on hõivatud,
+   katkestatakse kõige vanem heli, mille prioriteet pole uuest kõrgem; kui sellist pole,
+   jäetakse uus heli mängimata
+ - taustamuusika voogedastatakse failist (pygame.mixer.music), seda ei pakita tervikuna lahti
+ - kui heliseadet pole (või mixer ei käivitu), on kõik meetodid tühjad ja mäng töötab
+   edasi vaikselt; ilma aknata testides sobib SDL_AUDIODRIVER=dummy
+
+Helifailid on kaustas HELIDE_KAUST (HELIFAILID, MUUSIKA_FAIL). Kui efekti faili pole,
+sünteesitakse lühike toon (TOONID), nii et helid on olemas ka ilma failideta.
+"""
+
+from __future__ import annotations
+
+import array
+import math
+import os
+import sys
+from concurrent.futures import Executor, Future
+from typing import Optional
+
+import pygame
+
+HELIDE_KAUST = "fondid, muusika"
+HELIFAILID = {
+    "õige": "õige.wav",
+    "viga": "viga.wav",
+    "uks": "uks.wav",
+    "võit": "võit.wav",
+    "kaotus": "kaotus.wav",
+}
+MUUSIKA_FAIL = os.path.join(HELIDE_KAUST, "taust.ogg")
+
+# suurem prioriteet võib väiksema katkestada
+PRIORITEEDID = {"õige": 1, "viga": 1, "uks": 2, "võit": 3, "kaotus": 3}
+
+# sünteesitud asendusheli: (sagedus Hz, kestus ms) järjest
+TOONID = {
+    "õige": ((660, 70), (880, 110)),
+    "viga": ((180, 220),),
+    "uks": ((440, 70), (660, 70), (880, 140)),
+    "võit": ((523, 110), (659, 110), (784, 110), (1047, 260)),
+    "kaotus": ((392, 160), (330, 160), (262, 320)),
+}
+
+SAGEDUS = 44100
+PUHVER = 512  # väike puhver = väike viivitus klikist helini
+KANALEID = 8
+EFEKTIDE_VALJUS = 0.6
+MUUSIKA_VALJUS = 0.35
+
+
+def sünteesi(toonid: tuple[tuple[int, int], ...], sagedus: int, kanaleid: int) -> bytes:
+    """16-bitine PCM (mixeri formaadis): siinustoonid järjest, ots ja algus sujuvalt."""
+    proovid = array.array("h")
+    for hz, ms in toonid:
+        n = sagedus * ms // 1000
+        sujuv = max(1, min(n // 4, sagedus // 200))  # 5 ms, et ei plõksuks
+        for i in range(n):
+            kate = min(1.0, i / sujuv, (n - i) / sujuv)
+            väärtus = int(12000 * kate * math.sin(2 * math.pi * hz * i / sagedus))
+            proovid.extend([väärtus] * kanaleid)
+    return proovid.tobytes()  # masina baidijärjestuses, nagu mixeri AUDIO_S16SYS
+
+
+class Helid:
+    """Heliefektid kanalite kogumis ja voogedastatud muusika. Kõik meetodid on põhilõime jaoks odavad."""
+
+    def __init__(self, kanaleid: int = KANALEID):
+        self.kanaleid = kanaleid
+        self.sees = False
+        self._helid: dict[str, pygame.mixer.Sound] = {}
+        self._kanalid: list[pygame.mixer.Channel] = []
+        self._mängib: list[tuple[int, int]] = []  # kanali kaupa (prioriteet, järjekorranumber)
+        self._loendur = 0
+        self._laadimine: Optional[Future] = None
+
+    def alusta(self, laadija: Optional[Executor] = None, muusika: bool = True) -> bool:
+        """Käivitab mixeri ja laeb efektid (laadija olemasolul taustal). False, kui heli pole."""
+        try:
+            pygame.mixer.init(frequency=SAGEDUS, size=-16, channels=2, buffer=PUHVER)
+        except pygame.error as e:
+            print(f"Hoiatus: heli pole saadaval ({e}), mäng on vaikne.", file=sys.stderr)
+            return False
+        pygame.mixer.set_num_channels(self.kanaleid)
+        self._kanalid = [pygame.mixer.Channel(i) for i in range(self.kanaleid)]
+        self._mängib = [(0, 0)] * self.kanaleid
+        self.sees = True
+        if laadija is not None:
+            self._laadimine = laadija.submit(self._lae, muusika)
+        else:
+            self._lae(muusika)
+        return True
+
+    def _lae(self, muusika: bool) -> None:
+        sagedus, formaat, kanaleid = pygame.mixer.get_init()
+        for nimi, fail in HELIFAILID.items():
+            tee = os.path.join(HELIDE_KAUST, fail)
+            try:
+                if os.path.exists(tee):
+                    heli = pygame.mixer.Sound(tee)
+                elif formaat == -16:
+                    heli = pygame.mixer.Sound(buffer=sünteesi(TOONID[nimi], sagedus, kanaleid))
+                else:
+                    continue
+            except pygame.error as e:
+                print(f"Hoiatus: heli '{tee}' laadimine ebaõnnestus: {e}", file=sys.stderr)
+                continue
+            heli.set_volume(EFEKTIDE_VALJUS)
+            self._helid[nimi] = heli
+        if muusika and os.path.exists(MUUSIKA_FAIL):
+            try:
+                pygame.mixer.music.load(MUUSIKA_FAIL)
+                pygame.mixer.music.set_volume(MUUSIKA_VALJUS)
+                pygame.mixer.music.play(-1)
+            except pygame.error as e:
+                print(f"Hoiatus: muusikat '{MUUSIKA_FAIL}' ei saa mängida: {e}", file=sys.stderr)
+
+    def _vali_kanal(self, prioriteet: int) -> Optional[int]:
+        vaba = next((i for i, k in enumerate(self._kanalid) if not k.get_busy()), None)
+        if vaba is not None:
+            return vaba
+        # kõik hõivatud: kõige vanem madalama või sama prioriteediga heli
+        kandidaadid = [i for i, (p, _) in enumerate(self._mängib) if p <= prioriteet]
+        return min(kandidaadid, key=lambda i: self._mängib[i][1]) if kandidaadid else None
+
+    def mängi(self, nimi: str) -> None:
+        """Mängib efekti; kui see pole veel laetud või kanalit pole, ei tehta midagi."""
+        heli = self._helid.get(nimi) if self.sees else None
+        if heli is None:
+            return
+        prioriteet = PRIORITEEDID.get(nimi, 0)
+        i = self._vali_kanal(prioriteet)
+        if i is None:
+            return
+        self._loendur += 1
+        self._kanalid[i].play(heli)
+        self._mängib[i] = (prioriteet, self._loendur)
+
+    def sulge(self) -> None:
+        if self.sees:
+            if self._laadimine is not None:
+                self._laadimine.result()  # mixerit ei tohi sulgeda, kui taustal veel laetakse
+            pygame.mixer.music.stop()
+            pygame.mixer.quit()
+            self.sees = False
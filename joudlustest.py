@@ -0,0 +1,298 @@
+"""
+Jõudlustest – mängib mängu ilma aknata (SDL_VIDEODRIVER=dummy) etteantud stsenaariumiga läbi
+
+Mida teeb:
+ - käivitab game.main() ilma kaadripiiranguta ja annab talle sündmused ise ette
+ - käib läbi kõik olekud: tuba -> küsimus (kõik küsimused) -> lukk -> võit,
+   siis R (reset) ja valed vastused kuni kaotuseni
+ - mängib nii päris küsimused.json kui ka sünteetilised suured küsimustepangad
+ - iga oleku kohta: kaadriaja p50/p95/p99 (ms) ja mälueraldus kaadri kohta (tracemalloc)
+ - kui antakse --baas, võrdleb tulemust sellega ja lõpetab koodiga 1, kui
+   p95 on lubatust rohkem halvenenud
+
+Kasutamine:
+ - python joudlustest.py
+ - python joudlustest.py --väljund baas.json
+ - python joudlustest.py --baas baas.json --lubatud 0.25
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import string
+import sys
+import tempfile
+import time
+import tracemalloc
+from typing import Optional
+
+os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+os.environ.setdefault("SDL_AUDIODRIVER", "dummy")
+
+import pygame
+
+import game
+
+OLEKUD = ("tuba", "küsimus", "lukk", "võit", "kaotus")
+SÜNTEETILISED_PANGAD = (200, 600)
+KAADREID_OLEKUS = 30  # mitu kaadrit iga olekut "vaadatakse" (hiirega liigutades)
+
+
+# Küsimustepangad
+
+def sünteetiline_pank(n: int, kaust: str) -> str:
+    """Teeb päris küsimustest n-küsimuselise panga.
+
+    Objektid on ruudustikus ukse kõrval ja pildid skaleeritakse lahtri suuruseks,
+    et ükski objekt teist ei kataks ja kõik oleksid klikitavad.
+    """
+    with open(game.leia_kysimuste_fail(), "r", encoding="utf-8") as f:
+        päris = json.load(f)
+
+    ala = pygame.Rect(10, 60, game.UKSE_RECT.left - 20, game.AKNA_KÕRGUS - 70)
+    veerge = 20
+    ridu = max(1, (n + veerge - 1) // veerge)
+    lahter_w, lahter_h = ala.width // veerge, max(2, ala.height // ridu)
+    tähed = string.ascii_uppercase
+
+    andmed = []
+    for i in range(n):
+        r = dict(päris[i % len(päris)])
+        pilt = os.path.join("pildid", r["pilt"]) if r.get("pilt") else None
+        if pilt and os.path.exists(pilt):
+            w, h = pygame.image.load(pilt).get_size()
+            r["pilt"] = pilt
+            r["skaala"] = min((lahter_w - 1) / w, (lahter_h - 1) / h)
+        else:
+            r["pilt"] = None
+        r["objekt"] = f"objekt{i}"
+        r["x"] = ala.x + (i % veerge) * lahter_w
+        r["y"] = ala.y + (i // veerge) * lahter_h
+        r["täht"] = tähed[i % len(tähed)]
+        andmed.append(r)
+
+    tee = os.path.join(kaust, f"küsimused_{n}.json")
+    with open(tee, "w", encoding="utf-8") as f:
+        json.dump(andmed, f, ensure_ascii=False)
+    return tee
+
+
+def objektide_indeks(küsimused: list[game.küsimus]) -> game.ObjektideIndeks:
+    """Samad objektid ja klikialad (pildi mask, pealmine ees), mis mängus."""
+    objektid = []
+    for i, k in enumerate(küsimused):
+        pilt = game.lae_pilt(k.pilt) if k.pilt else None
+        objektid.append(game.KlikitavObjekt(k, pilt, jarjekord=i))
+    return game.ObjektideIndeks(objektid)
+
+
+def kliki_punkt(indeks: game.ObjektideIndeks, i: int) -> Optional[tuple[int, int]]:
+    """Punkt, kus klikk avab objekti i (nähtav osa, mitte teise objekti ega ukse all)."""
+    ala = indeks.objektid[i].rect
+    for y in range(ala.top, ala.bottom, 2):
+        for x in range(ala.left, ala.right, 2):
+            if not game.UKSE_RECT.collidepoint(x, y) and indeks.leia((x, y)) is indeks.objektid[i]:
+                return x, y
+    return None
+
+
+# Stsenaarium
+
+def _hiir(pos: tuple[int, int]) -> pygame.event.Event:
+    return pygame.event.Event(pygame.MOUSEMOTION, pos=pos, rel=(0, 0), buttons=(0, 0, 0))
+
+
+def _klikk(pos: tuple[int, int]) -> pygame.event.Event:
+    return pygame.event.Event(pygame.MOUSEBUTTONDOWN, pos=pos, button=1)
+
+
+def _klahv(key: int, unicode: str = "") -> pygame.event.Event:
+    return pygame.event.Event(pygame.KEYDOWN, key=key, unicode=unicode, mod=0)
+
+
+def _vaata(kaadrid: list[list[pygame.event.Event]], ala: pygame.Rect) -> None:
+    """KAADREID_OLEKUS kaadrit, kus hiir liigub üle ala (hover muutused)."""
+    for j in range(KAADREID_OLEKUS):
+        x = ala.left + (j * 37) % max(1, ala.width)
+        y = ala.top + (j * 53) % max(1, ala.height)
+        kaadrid.append([_hiir((x, y))])
+
+
+def stsenaarium(küsimused: list[game.küsimus]) -> list[list[pygame.event.Event]]:
+    """Sündmused kaadrite kaupa: kõik küsimused õigesti, lukk, võit, reset, kaotus."""
+    indeks = objektide_indeks(küsimused)
+    kaadrid: list[list[pygame.event.Event]] = [[]]
+    ekraan = pygame.Rect(0, 0, game.AKNA_LAIUS, game.AKNA_KÕRGUS)
+
+    _vaata(kaadrid, ekraan)
+
+    lahendatavad = []
+    for i, k in enumerate(küsimused):
+        punkt = kliki_punkt(indeks, i)
+        if punkt is None:
+            continue
+        lahendatavad.append(i)
+        kaadrid.append([_hiir(punkt), _klikk(punkt)])
+        _vaata(kaadrid, game.KÜSIMUSE_PANEEL)
+        kaadrid.append([_klahv(pygame.K_1 + k.oige_vastus, str(k.oige_vastus + 1))])
+    if len(lahendatavad) < len(küsimused):
+        print(f"Hoiatus: {len(küsimused) - len(lahendatavad)} objekti pole klikitavad", file=sys.stderr)
+
+    # lukk ja võit
+    uks = game.UKSE_RECT.center
+    kaadrid.append([_hiir(uks), _klikk(uks)])
+    for täht in "".join(k.taht for k in küsimused):
+        kaadrid.append([_klahv(0, täht)])  # key=0, et nt "r" ei teeks reseti
+    _vaata(kaadrid, game.LUKU_PANEEL)
+    kaadrid.append([_klahv(pygame.K_RETURN)])
+    _vaata(kaadrid, ekraan)
+
+    # reset ja kaotus
+    kaadrid.append([_klahv(pygame.K_r, "r")])
+    esimene = küsimused[lahendatavad[0]]
+    punkt = kliki_punkt(indeks, lahendatavad[0])
+    kaadrid.append([_hiir(punkt), _klikk(punkt)])
+    vale = (esimene.oige_vastus + 1) % 4
+    for _ in range(game.MAKS_VEAD):
+        kaadrid.append([_klahv(pygame.K_1 + vale, str(vale + 1))])
+    _vaata(kaadrid, ekraan)
+
+    kaadrid.append([pygame.event.Event(pygame.QUIT)])
+    return kaadrid
+
+
+# Mõõtmine
+
+def mängi(küsimuste_fail: str, kaadrid: list[list[pygame.event.Event]], mälu: bool) -> dict[str, list[float]]:
+    """Mängib stsenaariumi läbi; tagastab oleku kaupa kaadriajad (ms) või eraldatud baidid."""
+    tulemused: dict[str, list[float]] = {o: [] for o in OLEKUD}
+    järg = iter(kaadrid)
+    eelmine = [0.0]
+
+    def sündmused() -> list[pygame.event.Event]:
+        pygame.event.pump()
+        return next(järg, [pygame.event.Event(pygame.QUIT)])
+
+    def kaader(olek: str) -> None:
+        if mälu:
+            praegu, tipp = tracemalloc.get_traced_memory()
+            tulemused[olek].append(max(0, tipp - eelmine[0]))
+            tracemalloc.reset_peak()
+            eelmine[0] = praegu
+        else:
+            t = time.perf_counter()
+            if eelmine[0]:
+                tulemused[olek].append((t - eelmine[0]) * 1000)
+            eelmine[0] = t
+
+    for vana in (game.PROGRESSI_FAIL, game.PROGRESSI_FAIL + "-wal", game.PROGRESSI_FAIL + "-shm"):
+        if os.path.exists(vana):
+            os.remove(vana)
+    if mälu:
+        tracemalloc.start()
+    try:
+        game.main(küsimuste_fail, fps=0, sündmuste_allikas=sündmused, kaadri_kuulaja=kaader)
+    except SystemExit:
+        pass
+    finally:
+        if mälu:
+            tracemalloc.stop()
+    return tulemused
+
+
+def protsentiil(väärtused: list[float], p: float) -> float:
+    if not väärtused:
+        return 0.0
+    järjestatud = sorted(väärtused)
+    i = min(len(järjestatud) - 1, max(0, round(p / 100 * (len(järjestatud) - 1))))
+    return järjestatud[i]
+
+
+def mõõda_pank(küsimuste_fail: str) -> dict[str, dict[str, float]]:
+    pygame.init()
+    pygame.display.set_mode((game.AKNA_LAIUS, game.AKNA_KÕRGUS))
+    kaadrid = stsenaarium(game.loe_küsimused(küsimuste_fail))
+    ajad = mängi(küsimuste_fail, kaadrid, mälu=False)
+    baidid = mängi(küsimuste_fail, kaadrid, mälu=True)
+
+    kokkuvõte = {}
+    for olek in OLEKUD:
+        kokkuvõte[olek] = {
+            "kaadreid": len(ajad[olek]),
+            "p50_ms": round(protsentiil(ajad[olek], 50), 4),
+            "p95_ms": round(protsentiil(ajad[olek], 95), 4),
+            "p99_ms": round(protsentiil(ajad[olek], 99), 4),
+            "mälu_p50_baiti": int(protsentiil(baidid[olek], 50)),
+            "mälu_p95_baiti": int(protsentiil(baidid[olek], 95)),
+        }
+    return kokkuvõte
+
+
+def võrdle(tulemus: dict, baas: dict, lubatud: float, mõõdik: str) -> list[str]:
+    """Tagastab halvenemised (tühi list, kui kõik on lubatud piires)."""
+    halvenemised = []
+    for pank, olekud in tulemus["pangad"].items():
+        for olek, näitajad in olekud.items():
+            vana = baas.get("pangad", {}).get(pank, {}).get(olek, {}).get(mõõdik)
+            uus = näitajad.get(mõõdik)
+            if not vana or uus is None:
+                continue
+            if uus > vana * (1 + lubatud):
+                halvenemised.append(f"{pank} / {olek}: {mõõdik} {vana:.3f} -> {uus:.3f} (+{(uus / vana - 1) * 100:.0f}%)")
+    return halvenemised
+
+
+def main(argumendid: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Mängu jõudlustest ilma aknata.")
+    parser.add_argument("--pangad", type=int, nargs="*", default=list(SÜNTEETILISED_PANGAD),
+                        help="sünteetiliste küsimustepankade suurused")
+    parser.add_argument("--väljund", help="kirjuta tulemus JSON-faili (nt uueks baasiks)")
+    parser.add_argument("--baas", help="varasem tulemus, millega võrrelda")
+    parser.add_argument("--lubatud", type=float, default=0.20, help="lubatud halvenemine (0.20 = 20%%)")
+    parser.add_argument("--mõõdik", default="p95_ms", choices=["p50_ms", "p95_ms", "p99_ms"])
+    parser.add_argument("--täisjoonistus", action="store_true", help="joonista iga kaader täielikult")
+    args = parser.parse_args(argumendid)
+
+    if args.täisjoonistus:
+        game.OSALINE_UUENDUS = False
+    # stsenaarium vastab küsimuste pangas olevate õigete vastustega ja töötajate protsessid
+    # segaksid kaadriaegu, seega mallidest variante ei tehta (vt mallid.py)
+    game.MALLID = False
+
+    tulemus: dict = {
+        "python": sys.version.split()[0],
+        "pygame": pygame.version.ver,
+        "täisjoonistus": args.täisjoonistus,
+        "pangad": {},
+    }
+    with tempfile.TemporaryDirectory() as kaust:
+        game.SALVESTUS_FAIL = os.path.join(kaust, "salvestus.json")
+        game.PROGRESSI_FAIL = os.path.join(kaust, "progress.db")
+        game.VARADE_KOMPLEKT = os.path.join(kaust, "varad.bin")
+        failid: dict[str, str] = {"küsimused.json": game.leia_kysimuste_fail()}
+        for n in args.pangad:
+            failid[f"sünteetiline_{n}"] = sünteetiline_pank(n, kaust)
+        for nimi, tee in failid.items():
+            tulemus["pangad"][nimi] = mõõda_pank(tee)
+
+    tekst = json.dumps(tulemus, ensure_ascii=False, indent=2)
+    print(tekst)
+    if args.väljund:
+        with open(args.väljund, "w", encoding="utf-8") as f:
+            f.write(tekst)
+
+    if args.baas:
+        with open(args.baas, "r", encoding="utf-8") as f:
+            baas = json.load(f)
+        halvenemised = võrdle(tulemus, baas, args.lubatud, args.mõõdik)
+        for h in halvenemised:
+            print("HALVENES:", h, file=sys.stderr)
+        if halvenemised:
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
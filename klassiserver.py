@@ -0,0 +1,407 @@
+"""
+Klassiserver – palju mängijaid ühes protsessis (asyncio)
+
+Käivitamine:  python klassiserver.py [--host 127.0.0.1] [--port 8765] [--küsimused küsimused.json]
+Mängija:      python game.py --server 127.0.0.1:8765 --nimi mari
+Koormustest:  python klassiserver.py --koormus 500 [--kestus 20] [--lubatud-ms 50]
+
+Protokoll: üks JSON objekt rea kohta (UTF-8, lõpus "\\n"), iga päringu peale üks vastus.
+ - {"käsk": "liitu", "nimi": "mari"} -> {"pank": [objektid], "seis": {...}}
+ - {"käsk": "vasta", "valik": 2}      -> {"seis": {...}, "tulemus": {...}}
+ - {"käsk": "tagasi"}                 -> lisaks "suleti": kas midagi suleti
+ - vea korral                         -> {"viga": "..."}
+Käsud: liitu, seis, ava_uks, ava_küsimus (i), vasta (valik), sisesta (tekst), kustuta,
+kinnita_kood, tagasi, lähtesta. Reeglid on mangureeglid.Mänguseis-is, server ainult
+hoiab iga mängija seisu ja edastab käske.
+
+Küsimustepank laetakse üks kord ja on kõigi sessioonide vahel jagatud. Iga mängija
+progress kirjutatakse kausta sessioonid/<nimi>.json; muudatused koondatakse ja
+kirjutatakse taustalõimes, nii et kettaoperatsioonid ei pidurda teiste mängijate päringuid.
+"""
+
+from __future__ import annotations
+
+import argparse
+import asyncio
+import json
+import os
+import random
+import re
+import signal
+import socket
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Optional
+
+import kysimustepank
+from kysimustepank import küsimus
+from mangureeglid import Mänguseis, Tulemus
+
+HOST = "127.0.0.1"
+PORT = 8765
+SESSIOONIDE_KAUST = "sessioonid"
+SALVESTUSE_VIIVITUS_S = 0.5
+NIMI = re.compile(r"^[\w-]{1,40}$")
+
+# käsk -> argumendid (Mänguseis-i meetodid, mis tagastavad Tulemuse)
+KÄSUD = {
+    "ava_uks": (),
+    "ava_küsimus": ("i",),
+    "vasta": ("valik",),
+    "sisesta": ("tekst",),
+    "kustuta": (),
+    "kinnita_kood": (),
+    "lähtesta": (),
+}
+
+
+def hetkeseis(mäng: Mänguseis) -> dict:
+    """Kõik, mida klient ekraanil näitab (lisaks seis()-ile avatud küsimus ja sisestatud kood)."""
+    return dict(mäng.seis(), aktiivne=mäng.aktiivne, sisestatud_kood=mäng.sisestatud_kood)
+
+
+class Progress:
+    """Sessioonide salvestused. Muudatused kogutakse kokku ja kirjutatakse partiidena taustalõimes."""
+
+    def __init__(self, kaust: str):
+        self.kaust = kaust
+        os.makedirs(kaust, exist_ok=True)
+        self._ootel: dict[str, dict] = {}
+
+    def _tee(self, nimi: str) -> str:
+        return os.path.join(self.kaust, nimi + ".json")
+
+    def lae(self, nimi: str) -> dict:
+        try:
+            with open(self._tee(nimi), "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            return {}
+
+    def märgi(self, nimi: str, andmed: dict) -> None:
+        self._ootel[nimi] = andmed
+
+    def _kirjuta(self, partii: dict[str, dict]) -> None:
+        for nimi, andmed in partii.items():
+            ajutine = self._tee(nimi) + ".tmp"
+            with open(ajutine, "w", encoding="utf-8") as f:
+                json.dump(andmed, f, ensure_ascii=False)
+            os.replace(ajutine, self._tee(nimi))
+
+    async def kirjuta_ootel(self) -> None:
+        if self._ootel:
+            partii, self._ootel = self._ootel, {}
+            await asyncio.to_thread(self._kirjuta, partii)
+
+    async def kirjuta_pidevalt(self) -> None:
+        while True:
+            await asyncio.sleep(SALVESTUSE_VIIVITUS_S)
+            await self.kirjuta_ootel()
+
+
+class Klassiserver:
+    def __init__(self, küsimused: list[küsimus], kaust: str = SESSIOONIDE_KAUST):
+        for k in küsimused:
+            k.sisu  # kogu pank mällu, et päringute ajal faile ei loetaks
+        self.küsimused = küsimused
+        self.pank = [k.objekt for k in küsimused]
+        self.progress = Progress(kaust)
+        self.seisud: dict[str, Mänguseis] = {}
+        self.ühendusi = 0
+
+    async def _liitu(self, nimi: str) -> Mänguseis:
+        if not isinstance(nimi, str) or not NIMI.match(nimi):
+            raise ValueError("nimi võib sisaldada ainult tähti, numbreid, _ ja - (kuni 40 märki)")
+        mäng = self.seisud.get(nimi)
+        if mäng is None:
+            andmed = await asyncio.to_thread(self.progress.lae, nimi)
+            mäng = Mänguseis(self.küsimused, andmed.get("lahendatud", []), int(andmed.get("vead", 0)))
+            self.seisud[nimi] = mäng
+        return mäng
+
+    def _käsk(self, nimi: str, mäng: Mänguseis, sõnum: dict) -> dict:
+        käsk = sõnum.get("käsk")
+        vastus = {}
+        if käsk == "seis":
+            tulemus = Tulemus()
+        elif käsk == "tagasi":
+            tulemus = Tulemus()
+            vastus["suleti"] = mäng.tagasi()
+        elif käsk in KÄSUD:
+            tulemus = getattr(mäng, käsk)(*(sõnum[a] for a in KÄSUD[käsk]))
+            if käsk == "lähtesta":
+                tulemus.salvesta = True
+        else:
+            raise ValueError(f"tundmatu käsk {käsk!r}")
+        if tulemus.salvesta:
+            self.progress.märgi(nimi, mäng.salvestus())
+        return dict(vastus, seis=hetkeseis(mäng), tulemus=tulemus.sõnastik())
+
+    async def teeninda(self, lugeja: asyncio.StreamReader, kirjutaja: asyncio.StreamWriter) -> None:
+        self.ühendusi += 1
+        nimi: Optional[str] = None
+        mäng: Optional[Mänguseis] = None
+        try:
+            while rida := await lugeja.readline():
+                try:
+                    sõnum = json.loads(rida)
+                    if sõnum.get("käsk") == "liitu":
+                        mäng = await self._liitu(sõnum.get("nimi"))
+                        nimi = sõnum["nimi"]
+                        vastus = {"pank": self.pank, "seis": hetkeseis(mäng)}
+                    elif mäng is None:
+                        raise ValueError("kõigepealt liitu")
+                    else:
+                        vastus = self._käsk(nimi, mäng, sõnum)
+                except (ValueError, KeyError, TypeError, AttributeError) as e:
+                    vastus = {"viga": str(e)}
+                kirjutaja.write(json.dumps(vastus, ensure_ascii=False).encode("utf-8") + b"\n")
+                await kirjutaja.drain()
+        except ConnectionError:
+            pass
+        finally:
+            self.ühendusi -= 1
+            kirjutaja.close()
+
+
+async def käivita(host: str, port: int, küsimuste_fail: str, kaust: str) -> None:
+    server = Klassiserver(kysimustepank.loe(küsimuste_fail), kaust)
+    asyncio_server = await asyncio.start_server(server.teeninda, host, port, backlog=1024)
+    kirjutaja = asyncio.create_task(server.progress.kirjuta_pidevalt())
+    stopp = asyncio.Event()
+    try:
+        asyncio.get_running_loop().add_signal_handler(signal.SIGTERM, stopp.set)
+    except (NotImplementedError, AttributeError):
+        pass  # Windows
+    print(f"Klassiserver {host}:{port}, {len(server.küsimused)} küsimust, progress: {kaust}/", flush=True)
+    try:
+        async with asyncio_server:
+            await stopp.wait()
+    finally:
+        kirjutaja.cancel()
+        await server.progress.kirjuta_ootel()
+
+
+# --- klient (game.py --server) ---
+
+class Kaugseis(Mänguseis):
+    """Mänguseis, mille tegevused otsustab server; game.py kasutab seda nagu tavalist.
+
+    Küsimused on kliendil endal (joonistamiseks), server kontrollib liitumisel, et pank on sama.
+    Liitumise vead (pole ühendust, vale nimi) tõstetakse erindina; mängu ajal katkenud
+    ühendus või serveri viga tuleb tegevuse Tulemus-e teatena, seis jääb endiseks.
+    """
+
+    def __init__(self, aadress: str, nimi: str, ajalimiit: float = 5.0):
+        super().__init__([])
+        host, port = aadress.rsplit(":", 1)
+        self._sokk = socket.create_connection((host, int(port)), timeout=ajalimiit)
+        self._fail = self._sokk.makefile("rwb")
+        self.pank: list[str] = self._päring({"käsk": "liitu", "nimi": nimi})["pank"]
+
+    def _päring(self, sõnum: dict) -> dict:
+        self._fail.write(json.dumps(sõnum, ensure_ascii=False).encode("utf-8") + b"\n")
+        self._fail.flush()
+        rida = self._fail.readline()
+        if not rida:
+            raise ConnectionError("server sulges ühenduse")
+        vastus = json.loads(rida)
+        if "viga" in vastus:
+            raise ValueError(f"server: {vastus['viga']}")
+        seis = vastus["seis"]
+        self.olek, self.vead, self.tuba = seis["olek"], seis["vead"], seis["tuba"]
+        self.lahendatud = set(seis["lahendatud"])
+        self.aktiivne, self.sisestatud_kood = seis["aktiivne"], seis["sisestatud_kood"]
+        return vastus
+
+    def _käsk(self, käsk: str, **argumendid) -> Tulemus:
+        try:
+            return Tulemus(**self._päring(dict(argumendid, käsk=käsk))["tulemus"])
+        except (OSError, ValueError) as e:
+            return Tulemus(teade=self._veateade(e), ms=3000)
+
+    @staticmethod
+    def _veateade(e: Exception) -> str:
+        if isinstance(e, OSError):  # ka ConnectionError ja ajalimiit
+            return f"Ühendus serveriga katkes ({e})"
+        return str(e)
+
+    def vaheta_tuba(self, küsimused: list[küsimus]) -> None:
+        if [k.objekt for k in küsimused] != self.pank:
+            raise ValueError("serveri küsimustepank erineb kohalikust")
+        self.küsimused = küsimused
+
+    def ava_uks(self) -> Tulemus:
+        return self._käsk("ava_uks")
+
+    def ava_küsimus(self, i: int) -> Tulemus:
+        return self._käsk("ava_küsimus", i=i)
+
+    def vasta(self, valik: int) -> Tulemus:
+        return self._käsk("vasta", valik=valik)
+
+    def sisesta(self, tekst: str) -> Tulemus:
+        return self._käsk("sisesta", tekst=tekst)
+
+    def kustuta(self) -> Tulemus:
+        return self._käsk("kustuta")
+
+    def kinnita_kood(self) -> Tulemus:
+        return self._käsk("kinnita_kood")
+
+    def tagasi(self) -> bool:
+        try:
+            return self._päring({"käsk": "tagasi"})["suleti"]
+        except (OSError, ValueError):
+            return False
+
+    def lähtesta(self) -> Tulemus:
+        return self._käsk("lähtesta")
+
+    def sulge(self) -> None:
+        self._fail.close()
+        self._sokk.close()
+
+
+# --- koormustest ---
+
+def _boti_käsk(seis: dict, küsimused: list[küsimus], rnd: random.Random) -> dict:
+    """Järgmine tegevus simuleeritud õpilasele (80% vastustest õiged)."""
+    olek = seis["olek"]
+    if olek in ("võit", "kaotus"):
+        return {"käsk": "lähtesta"}
+    if olek == "küsimus":
+        k = küsimused[seis["aktiivne"]]
+        valik = k.oige_vastus if rnd.random() < 0.8 else (k.oige_vastus + 1) % max(1, len(k.valikud))
+        return {"käsk": "vasta", "valik": valik}
+    if olek == "lukk":
+        kood = "".join(k.taht for k in küsimused)
+        if len(seis["sisestatud_kood"]) < len(kood):
+            return {"käsk": "sisesta", "tekst": kood[len(seis["sisestatud_kood"])]}
+        return {"käsk": "kinnita_kood"}
+    lahendamata = [i for i, k in enumerate(küsimused) if k.objekt not in seis["lahendatud"]]
+    if lahendamata:
+        return {"käsk": "ava_küsimus", "i": rnd.choice(lahendamata)}
+    return {"käsk": "ava_uks"}
+
+
+async def _õpilane(host: str, port: int, nr: int, küsimused: list[küsimus], lõpp: float,
+                   mõtlemine: tuple[float, float], liitumised: list[float], ajad: list[float],
+                   vead: list[str]) -> None:
+    rnd = random.Random(nr)
+    algus = time.perf_counter()
+    try:
+        lugeja, kirjutaja = await asyncio.open_connection(host, port)
+    except OSError as e:
+        vead.append(f"ühendus: {e}")
+        return
+    sõnum = {"käsk": "liitu", "nimi": f"opilane{nr:04d}"}
+    try:
+        while time.monotonic() < lõpp:
+            kirjutaja.write(json.dumps(sõnum, ensure_ascii=False).encode("utf-8") + b"\n")
+            await kirjutaja.drain()
+            vastus = json.loads(await lugeja.readline())
+            # liitumine (koos ühenduse loomisega) eraldi: kõik õpilased liituvad korraga
+            (ajad if sõnum["käsk"] != "liitu" else liitumised).append(time.perf_counter() - algus)
+            if "viga" in vastus:
+                vead.append(vastus["viga"])
+                return
+            sõnum = _boti_käsk(vastus["seis"], küsimused, rnd)
+            await asyncio.sleep(rnd.uniform(*mõtlemine))
+            algus = time.perf_counter()
+    except (ConnectionError, ValueError) as e:
+        vead.append(str(e))
+    finally:
+        kirjutaja.close()
+
+
+def _vaba_port() -> int:
+    with socket.socket() as s:
+        s.bind((HOST, 0))
+        return s.getsockname()[1]
+
+
+async def _koormus(port: int, n: int, küsimused: list[küsimus], kestus: float,
+                   mõtlemine: tuple[float, float]) -> tuple[list[float], list[float], list[str]]:
+    liitumised: list[float] = []
+    ajad: list[float] = []
+    vead: list[str] = []
+    lõpp = time.monotonic() + kestus
+    await asyncio.gather(*(_õpilane(HOST, port, i, küsimused, lõpp, mõtlemine, liitumised, ajad, vead)
+                           for i in range(n)))
+    return liitumised, ajad, vead
+
+
+def koormustest(n: int, küsimuste_fail: str, kestus: float, lubatud_ms: float,
+                mõtlemine: tuple[float, float] = (0.2, 2.0)) -> int:
+    """Käivitab serveri eraldi protsessis ja n simuleeritud õpilast.
+
+    Tagastab 1, kui mängutegevuste p99 latentsus > lubatud_ms, tuli vigu või reeglite
+    moodulid laadisid pygame'i.
+    """
+    küsimused = kysimustepank.loe(küsimuste_fail)
+    if "pygame" in sys.modules:  # server laeb samad moodulid; pygame ei tohi nende kaudu tulla
+        print("VIGA: mangureeglid või kysimustepank impordib pygame'i")
+        return 1
+    port = _vaba_port()
+    with tempfile.TemporaryDirectory() as kaust:
+        protsess = subprocess.Popen([sys.executable, os.path.abspath(__file__), "--port", str(port),
+                                     "--küsimused", küsimuste_fail, "--kaust", kaust],
+                                    stdout=subprocess.DEVNULL)
+        try:
+            for _ in range(100):
+                try:
+                    socket.create_connection((HOST, port), timeout=0.1).close()
+                    break
+                except OSError:
+                    time.sleep(0.05)
+            algus = time.perf_counter()
+            liitumised, ajad, vead = asyncio.run(_koormus(port, n, küsimused, kestus, mõtlemine))
+            kulunud = time.perf_counter() - algus
+            salvestusi = len(os.listdir(kaust))
+        finally:
+            protsess.terminate()
+            protsess.wait()
+
+    if not ajad:
+        print("Ühtegi päringut ei tehtud:", vead[:3])
+        return 1
+    ms = sorted(a * 1000 for a in ajad)
+    protsentiil = lambda p: ms[min(len(ms) - 1, int(p / 100 * len(ms)))]
+    print(f"{n} õpilast, {len(ms)} päringut {kulunud:.1f} s jooksul ({len(ms) / kulunud:.0f}/s), "
+          f"{salvestusi} salvestust, {len(vead)} viga")
+    print(f"latentsus ms: p50 {statistics.median(ms):.2f}  p95 {protsentiil(95):.2f}  "
+          f"p99 {protsentiil(99):.2f}  max {ms[-1]:.2f}")
+    if liitumised:
+        print(f"liitumine (kõik korraga) ms: p50 {statistics.median(liitumised) * 1000:.1f}  "
+              f"max {max(liitumised) * 1000:.1f}")
+    if vead:
+        print("vead:", vead[:3])
+    return 1 if vead or protsentiil(99) > lubatud_ms else 0
+
+
+def main(argumendid: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Põgenemismängu klassiserver.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--küsimused", default="küsimused.json")
+    parser.add_argument("--kaust", default=SESSIOONIDE_KAUST, help="kuhu mängijate progress salvestatakse")
+    parser.add_argument("--koormus", type=int, metavar="N", help="koormustest N simuleeritud õpilasega")
+    parser.add_argument("--kestus", type=float, default=20.0, help="koormustesti kestus sekundites")
+    parser.add_argument("--lubatud-ms", type=float, default=50.0, help="koormustestis lubatud p99 latentsus")
+    arg = parser.parse_args(argumendid)
+
+    if arg.koormus:
+        return koormustest(arg.koormus, arg.küsimused, arg.kestus, arg.lubatud_ms)
+    try:
+        asyncio.run(käivita(arg.host, arg.port, arg.küsimused, arg.kaust))
+    except KeyboardInterrupt:
+        pass
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
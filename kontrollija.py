@@ -0,0 +1,461 @@
+"""
+Kontrollija – küsimustepanga kontroll: kas koodijupi väljund vastab märgitud õigele vastusele
+
+Kasutamine:
+ - python kontrollija.py                       (küsimused.json ja toad.json toad)
+ - python kontrollija.py pank.json --protsessid 8 --json tulemus.json
+
+Iga küsimuse kohta:
+ - kood käivitatakse eraldi protsessis (POSIX-il fork töötaja protsessist, mujal uus
+   Python), ajapiirangu ja ressursipiirangutega (protsessori aeg, mälu, failide kirjutamine
+   keelatud); stdout püütakse kinni
+ - väljundit võrreldakse kõigi valikutega: valik võib olla terve väljund, ridade kaupa
+   " / " või ", " eraldatud (sulgudes märkus lõpus ei loe) ja arvud võrreldakse väärtuse
+   järgi (9 == 9.0)
+ - viga, kui väljund vastab mõnele teisele valikule või mitte ühelegi, õige_vastus on
+   valikutest väljas või täht puudub; hoiatus, kui objektid kattuvad (pildi nähtavad osad)
+ - malliga küsimusest (vt mallid.py) tehakse MALLI_VARIANTE varianti nagu mängus; viga,
+   kui ükski ei õnnestu, hoiatus, kui mõni ebaõnnestub (põhjusega). Variandid on samas
+   kogumis ja vahemälus nagu koodijupid (võti on malli ja seemne räsi)
+
+Käivitatakse töötajate kogumiga (ProcessPoolExecutor) tükkide kaupa. Tulemused on
+vahemälus koodi räsi järgi (KONTROLLI_VAHEMÄLU), seega käivitatakse uuesti ainult
+muutunud koodijupid; sama kood mitmes küsimuses käivitatakse üks kord.
+"""
+
+from __future__ import annotations
+
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import subprocess
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import asdict, dataclass, field
+from typing import Optional, Union
+
+VERSIOON = 1
+KONTROLLI_VAHEMÄLU = "kontroll_vahemälu.json"
+AJAPIIRANG_S = 2.0
+MAKS_MÄLU_MB = 256
+MAKS_VÄLJUND = 64 * 1024  # baiti; pikem väljund lõigatakse
+TÜKK = 64  # mitu koodijuppi töötaja korraga saab
+VALIKUTE_ARV = 4  # küsimuse aknas on 4 nuppu
+MALLI_VARIANTE = 5  # mitu varianti malli kohta kontrollimisel tehakse
+
+_SULGUDES_LÕPUS = re.compile(r"\s*\([^()]*\)\s*$")
+
+
+@dataclass
+class Käivitus:
+    """Ühe koodijupi käivitamise tulemus (see läheb vahemällu)."""
+    väljund: str = ""
+    viga: str = ""  # erind (viimane rida tracebackist), "ajapiirang" või "mälupiirang"
+    ms: float = 0.0
+
+
+@dataclass
+class Leid:
+    objekt: str
+    fail: str
+    tase: str  # viga | hoiatus
+    sõnum: str
+
+
+@dataclass
+class Aruanne:
+    küsimusi: int = 0
+    käivitatud: int = 0
+    vahemälust: int = 0
+    leiud: list[Leid] = field(default_factory=list)
+
+    @property
+    def vigu(self) -> int:
+        return sum(l.tase == "viga" for l in self.leiud)
+
+
+# koodijupp või malli variant (mall, seeme)
+Töö = Union[str, tuple[dict, str]]
+
+
+def koodi_räsi(kood: str) -> str:
+    return hashlib.sha1(f"{VERSIOON}\0{kood}".encode("utf-8")).hexdigest()
+
+
+def töö_räsi(töö: Töö) -> str:
+    if isinstance(töö, str):
+        return koodi_räsi(töö)
+    return koodi_räsi("mall\0" + json.dumps(töö, ensure_ascii=False, sort_keys=True))
+
+
+def malli_tööd(r: dict, variante: int = MALLI_VARIANTE) -> list[tuple[dict, str]]:
+    """Malliga küsimuse variandid, mis kontrollimisel tehakse (samad seemned igal korral)."""
+    import mallid
+
+    objekt = r.get("objekt", "?")
+    mall = dict(r["mall"], küsimus=r["mall"].get("küsimus", r.get("küsimus", "")))
+    return [(mall, mallid.variandi_seeme(0, objekt, n)) for n in range(variante)]
+
+
+# --- käivitamine ---
+
+def _piira(aeg_s: float, mälu_mb: int) -> None:
+    """Ressursipiirangud lapsprotsessis (ainult POSIX)."""
+    import resource
+
+    for piirang, väärtus in ((resource.RLIMIT_CPU, max(1, math.ceil(aeg_s))),
+                             (resource.RLIMIT_AS, mälu_mb * 1024 * 1024),
+                             (resource.RLIMIT_FSIZE, 0)):
+        try:
+            resource.setrlimit(piirang, (väärtus, väärtus))
+        except (ValueError, OSError):
+            pass  # nt RLIMIT_AS pole macOS-is toetatud
+
+
+def _lapses(kood: str, w: int, aeg_s: float, mälu_mb: int) -> None:
+    """Forkitud lapse töö: käivitab koodi, kirjutab väljundi ja vea torusse ja lõpetab."""
+    import io
+    import traceback
+
+    väljund, viga = io.StringIO(), ""
+    try:
+        devnull = os.open(os.devnull, os.O_RDWR)
+        for fd in (0, 1, 2):
+            os.dup2(devnull, fd)  # kood ei saa lugeda ega kirjutada töötaja stdin/stdout-i
+        sys.stdin, sys.stdout, sys.stderr = io.StringIO(""), väljund, io.StringIO()
+        _piira(aeg_s, mälu_mb)
+        exec(compile(kood, "<kood>", "exec"), {"__name__": "__main__", "__builtins__": __builtins__})
+    except MemoryError:
+        viga = "mälupiirang"
+    except BaseException as e:  # ka SystemExit ja KeyboardInterrupt koodist
+        if not (isinstance(e, SystemExit) and e.code in (None, 0)):
+            viga = traceback.format_exception_only(type(e), e)[-1].strip()
+    try:
+        andmed = json.dumps([väljund.getvalue()[:MAKS_VÄLJUND], viga], ensure_ascii=False).encode("utf-8")
+        os.write(w, andmed)
+    finally:
+        os._exit(0)
+
+
+def _käivita_fork(kood: str, aeg_s: float, mälu_mb: int) -> Käivitus:
+    import select
+    import signal
+
+    algus = time.perf_counter()
+    r, w = os.pipe()
+    pid = os.fork()
+    if pid == 0:
+        os.close(r)
+        _lapses(kood, w, aeg_s, mälu_mb)
+    os.close(w)
+
+    osad: list[bytes] = []
+    tähtaeg = algus + aeg_s
+    aeg_täis = False
+    try:
+        while True:
+            jäänud = tähtaeg - time.perf_counter()
+            if jäänud <= 0 or not select.select([r], [], [], jäänud)[0]:
+                aeg_täis = True
+                break
+            tükk = os.read(r, 65536)
+            if not tükk:
+                break
+            osad.append(tükk)
+    finally:
+        os.close(r)
+        if aeg_täis:
+            os.kill(pid, signal.SIGKILL)
+        _, olek = os.waitpid(pid, 0)
+    ms = (time.perf_counter() - algus) * 1000
+
+    if aeg_täis or os.WIFSIGNALED(olek) and os.WTERMSIG(olek) in (signal.SIGXCPU, signal.SIGKILL):
+        return Käivitus(viga="ajapiirang", ms=ms)
+    try:
+        väljund, viga = json.loads(b"".join(osad).decode("utf-8"))
+    except ValueError:
+        return Käivitus(viga="protsess lõppes ootamatult", ms=ms)  # nt mälupiirang enne kirjutamist
+    return Käivitus(väljund, viga, ms)
+
+
+def _käivita_protsess(kood: str, aeg_s: float) -> Käivitus:
+    """Uus Python protsess (-I: ei loe keskkonnamuutujaid ega kasutaja site-packages'it)."""
+    algus = time.perf_counter()
+    try:
+        p = subprocess.run([sys.executable, "-I", "-S", "-c", kood], stdin=subprocess.DEVNULL,
+                           capture_output=True, timeout=aeg_s, encoding="utf-8", errors="replace")
+    except subprocess.TimeoutExpired:
+        return Käivitus(viga="ajapiirang", ms=(time.perf_counter() - algus) * 1000)
+    viga = ""
+    if p.returncode != 0:
+        read = p.stderr.strip().splitlines()
+        viga = read[-1] if read else f"väljumiskood {p.returncode}"
+    return Käivitus(p.stdout[:MAKS_VÄLJUND], viga, (time.perf_counter() - algus) * 1000)
+
+
+def käivita(kood: str, aeg_s: float = AJAPIIRANG_S, mälu_mb: int = MAKS_MÄLU_MB) -> Käivitus:
+    """Käivitab koodijupi eraldi protsessis ja tagastab selle stdout-i.
+
+    POSIX-il forgitakse praegune protsess (kiire, ~1 ms) ja lapsel on protsessori aja,
+    mälu ja failide piirangud. Mujal (Windows) käivitatakse uus Python ainult ajapiiranguga.
+    """
+    if hasattr(os, "fork"):
+        return _käivita_fork(kood, aeg_s, mälu_mb)
+    return _käivita_protsess(kood, aeg_s)
+
+
+def tee_malli_variant(mall: dict, seeme: str) -> Käivitus:
+    """Malli variant nagu mängus (mallid.tee_variant); viga on põhjus, miks varianti ei saanud."""
+    import mallid
+
+    algus = time.perf_counter()
+    try:
+        mallid.tee_variant(mall, seeme)
+        viga = ""
+    except mallid.MalliViga as e:
+        viga = str(e)
+    return Käivitus(viga=viga, ms=(time.perf_counter() - algus) * 1000)
+
+
+def _käivita_tükk(tööd: list[Töö], aeg_s: float, mälu_mb: int) -> list[Käivitus]:
+    return [käivita(töö, aeg_s, mälu_mb) if isinstance(töö, str) else tee_malli_variant(*töö) for töö in tööd]
+
+
+def käivita_kõik(koodid: list[Töö], protsessid: Optional[int] = None, aeg_s: float = AJAPIIRANG_S,
+                 mälu_mb: int = MAKS_MÄLU_MB) -> list[Käivitus]:
+    """Käivitab koodijupid ja malli variandid töötajate kogumis (tükkide kaupa); tulemused samas järjekorras."""
+    tükid = [koodid[i:i + TÜKK] for i in range(0, len(koodid), TÜKK)]
+    if len(tükid) <= 1 or protsessid == 1:
+        return [k for tükk in tükid for k in _käivita_tükk(tükk, aeg_s, mälu_mb)]
+    with ProcessPoolExecutor(max_workers=protsessid) as kogum:
+        tulemused = kogum.map(_käivita_tükk, tükid, [aeg_s] * len(tükid), [mälu_mb] * len(tükid))
+        return [k for tükk in tulemused for k in tükk]
+
+
+# --- vahemälu ---
+
+def lae_vahemälu(tee: str) -> dict[str, Käivitus]:
+    try:
+        with open(tee, "r", encoding="utf-8") as f:
+            andmed = json.load(f)
+    except (OSError, ValueError):
+        return {}
+    if not isinstance(andmed, dict) or andmed.get("versioon") != VERSIOON:
+        return {}
+    return {räsi: Käivitus(**k) for räsi, k in andmed.get("käivitused", {}).items()}
+
+
+def salvesta_vahemälu(tee: str, vahemälu: dict[str, Käivitus]) -> None:
+    ajutine = tee + ".tmp"
+    with open(ajutine, "w", encoding="utf-8") as f:
+        json.dump({"versioon": VERSIOON, "käivitused": {r: asdict(k) for r, k in vahemälu.items()}},
+                  f, ensure_ascii=False)
+    os.replace(ajutine, tee)
+
+
+# --- võrdlemine ---
+
+def _sama(a: str, b: str) -> bool:
+    a, b = a.strip(), b.strip()
+    if a == b:
+        return True
+    try:
+        return float(a) == float(b)
+    except ValueError:
+        return False
+
+
+def vastab(väljund: str, valik: str) -> bool:
+    """Kas programmi väljund vastab valiku tekstile (vt mooduli kirjeldus)."""
+    read = [r.rstrip() for r in väljund.strip().splitlines()]
+    tekst = _SULGUDES_LÕPUS.sub("", valik).strip()
+    if _sama(väljund, tekst):
+        return True
+    for eraldaja in (" / ", ", ", "/", ","):
+        osad = tekst.split(eraldaja)
+        if len(osad) == len(read) > 1 and all(_sama(r, o) for r, o in zip(read, osad)):
+            return True
+    return False
+
+
+def kontrolli_vastust(r: dict, fail: str, käivitus: Käivitus) -> list[Leid]:
+    objekt = r["objekt"]
+    if käivitus.viga:
+        return [Leid(objekt, fail, "viga", f"kood ei tööta: {käivitus.viga}")]
+    valikud = [str(v) for v in r.get("valikud", [])]
+    õige = int(r.get("õige_vastus", 0))
+    sobivad = [i for i, v in enumerate(valikud) if vastab(käivitus.väljund, v)]
+    väljund = " / ".join(käivitus.väljund.strip().splitlines())
+    if not sobivad:
+        return [Leid(objekt, fail, "viga", f"väljund '{väljund}' ei vasta ühelegi valikule")]
+    if õige not in sobivad:
+        return [Leid(objekt, fail, "viga",
+                     f"õige_vastus on {õige}, aga väljund '{väljund}' vastab valikule {sobivad[0]} ('{valikud[sobivad[0]]}')")]
+    if len(sobivad) > 1:
+        return [Leid(objekt, fail, "hoiatus", f"väljund vastab mitmele valikule: {sobivad}")]
+    return []
+
+
+def kontrolli_andmeid(r: dict, fail: str) -> list[Leid]:
+    """Kontrollid, mis ei vaja koodi käivitamist."""
+    objekt = r.get("objekt", "?")
+    leiud = []
+    if not str(r.get("täht", "")).strip():
+        leiud.append(Leid(objekt, fail, "viga", "täht puudub"))
+    valikud = r.get("valikud", [])
+    if not 0 <= int(r.get("õige_vastus", 0)) < len(valikud):
+        leiud.append(Leid(objekt, fail, "viga", f"õige_vastus {r.get('õige_vastus', 0)} ei ole valikute seas"))
+    if len(valikud) > VALIKUTE_ARV:
+        leiud.append(Leid(objekt, fail, "hoiatus", f"{len(valikud)} valikut, aknas on ruumi {VALIKUTE_ARV}-le"))
+    if len(set(map(str, valikud))) < len(valikud):
+        leiud.append(Leid(objekt, fail, "hoiatus", "valikute seas on kordusi"))
+    if not r.get("kood", "").strip():
+        leiud.append(Leid(objekt, fail, "hoiatus", "kood puudub, vastust ei saa kontrollida"))
+    return leiud
+
+
+def kontrolli_malli(r: dict, fail: str, variandid: list[Käivitus]) -> list[Leid]:
+    """Leiud malli variantidest (vt malli_tööd): viga, kui ükski ei õnnestunud, muidu hoiatus."""
+    objekt = r.get("objekt", "?")
+    põhjused: dict[str, int] = {}
+    for k in variandid:
+        if k.viga:
+            põhjused[k.viga] = põhjused.get(k.viga, 0) + 1
+    if not põhjused:
+        return []
+    tase = "viga" if sum(põhjused.values()) == len(variandid) else "hoiatus"
+    return [Leid(objekt, fail, tase, f"mall: {arv}/{len(variandid)} varianti ebaõnnestus: {põhjus}")
+            for põhjus, arv in põhjused.items()]
+
+
+def kontrolli_kattumisi(kirjed: list[dict], fail: str) -> list[Leid]:
+    """Objektid, mille pildi nähtavad osad kattuvad (klikk läheb pealmisele)."""
+    import pygame
+
+    import kysimustepank
+
+    maskid: dict[tuple, Optional[pygame.mask.Mask]] = {}
+
+    def mask(pilt: Optional[str], skaala: float) -> Optional[pygame.mask.Mask]:
+        if (pilt, skaala) not in maskid:
+            m = None
+            if pilt and os.path.exists(pilt):
+                try:
+                    pind = pygame.image.load(pilt)
+                    suurus = (max(1, int(pind.get_width() * skaala)), max(1, int(pind.get_height() * skaala)))
+                    m = pygame.mask.from_surface(pygame.transform.scale(pind, suurus))
+                except pygame.error:
+                    pass
+            maskid[pilt, skaala] = m
+        return maskid[pilt, skaala]
+
+    objektid = []
+    for r in kirjed:
+        m = mask(kysimustepank.leia_pilt(r.get("pilt")), float(r.get("skaala", 1.0)))
+        suurus = m.get_size() if m is not None else (120, 120)  # nagu KlikitavObjekt ilma pildita
+        objektid.append((r.get("objekt", "?"), pygame.Rect((int(r["x"]), int(r["y"])), suurus), m))
+
+    leiud = []
+    nimed = [o[0] for o in objektid]
+    for nimi in sorted({n for n in nimed if nimed.count(n) > 1}):
+        leiud.append(Leid(nimi, fail, "viga", "objekti nimi kordub"))
+    rectid = [o[1] for o in objektid]
+    for i, (nimi, rect, m) in enumerate(objektid):
+        for j in rect.collidelistall(rectid[i + 1:]):
+            teine, t_rect, t_m = objektid[i + 1 + j]
+            if m is not None and t_m is not None and m.overlap(t_m, (t_rect.x - rect.x, t_rect.y - rect.y)) is None:
+                continue  # ainult läbipaistvad osad kattuvad
+            leiud.append(Leid(nimi, fail, "hoiatus", f"kattub objektiga '{teine}'"))
+    return leiud
+
+
+def kontrolli(failid: list[str], protsessid: Optional[int] = None, vahemälu_tee: Optional[str] = KONTROLLI_VAHEMÄLU,
+              aeg_s: float = AJAPIIRANG_S, mälu_mb: int = MAKS_MÄLU_MB, kattumised: bool = True) -> Aruanne:
+    aruanne = Aruanne()
+    pangad: list[tuple[str, list[dict]]] = []
+    for fail in failid:
+        with open(fail, "r", encoding="utf-8") as f:
+            pangad.append((fail, json.load(f)))
+
+    vahemälu = lae_vahemälu(vahemälu_tee) if vahemälu_tee else {}
+    käivitada: dict[str, Töö] = {}
+    for _, kirjed in pangad:
+        aruanne.küsimusi += len(kirjed)
+        for r in kirjed:
+            kood = r.get("kood", "")
+            tööd: list[Töö] = [kood] if kood.strip() else []
+            if r.get("mall"):
+                tööd.extend(malli_tööd(r))
+            for töö in tööd:
+                räsi = töö_räsi(töö)
+                if räsi in vahemälu:
+                    aruanne.vahemälust += 1
+                else:
+                    käivitada[räsi] = töö
+    aruanne.käivitatud = len(käivitada)
+
+    if käivitada:
+        for räsi, k in zip(käivitada, käivita_kõik(list(käivitada.values()), protsessid, aeg_s, mälu_mb)):
+            vahemälu[räsi] = k
+        if vahemälu_tee:
+            try:
+                salvesta_vahemälu(vahemälu_tee, vahemälu)
+            except OSError as e:
+                print(f"Hoiatus: vahemälu salvestamine ebaõnnestus: {e}", file=sys.stderr)
+
+    for fail, kirjed in pangad:
+        for r in kirjed:
+            aruanne.leiud.extend(kontrolli_andmeid(r, fail))
+            kood = r.get("kood", "")
+            if kood.strip() and 0 <= int(r.get("õige_vastus", 0)) < len(r.get("valikud", [])):
+                aruanne.leiud.extend(kontrolli_vastust(r, fail, vahemälu[koodi_räsi(kood)]))
+            if r.get("mall"):
+                variandid = [vahemälu[töö_räsi(töö)] for töö in malli_tööd(r)]
+                aruanne.leiud.extend(kontrolli_malli(r, fail, variandid))
+        if kattumised:
+            aruanne.leiud.extend(kontrolli_kattumisi(kirjed, fail))
+    return aruanne
+
+
+def main(argumendid: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Kontrollib, kas küsimuste koodi väljund vastab õigele vastusele.")
+    parser.add_argument("failid", nargs="*", help="küsimuste failid (vaikimisi küsimused.json ja toad.json toad)")
+    parser.add_argument("--protsessid", type=int, help="töötajate arv (vaikimisi kõik tuumad)")
+    parser.add_argument("--aeg", type=float, default=AJAPIIRANG_S, help="ajapiirang koodijupi kohta (s)")
+    parser.add_argument("--mälu", type=int, default=MAKS_MÄLU_MB, help="mälupiirang koodijupi kohta (MB)")
+    parser.add_argument("--vahemälu", default=KONTROLLI_VAHEMÄLU, help="tulemuste vahemälu fail")
+    parser.add_argument("--ilma-vahemäluta", action="store_true", help="käivita kõik koodijupid uuesti")
+    parser.add_argument("--ilma-kattumisteta", action="store_true", help="ära kontrolli objektide kattumist")
+    parser.add_argument("--json", help="kirjuta leiud JSON-faili")
+    arg = parser.parse_args(argumendid)
+
+    failid = arg.failid
+    if not failid:
+        import stseenid
+
+        failid = ["küsimused.json"]
+        if os.path.exists("toad.json"):
+            failid += [t.küsimused for t in stseenid.loe_toad("toad.json") if t.küsimused not in failid]
+
+    algus = time.perf_counter()
+    aruanne = kontrolli(failid, arg.protsessid, None if arg.ilma_vahemäluta else arg.vahemälu,
+                        arg.aeg, arg.mälu, not arg.ilma_kattumisteta)
+    kulunud = time.perf_counter() - algus
+
+    for l in aruanne.leiud:
+        print(f"{l.tase.upper():<8} {l.fail}: {l.objekt}: {l.sõnum}")
+    print(f"{aruanne.küsimusi} küsimust, {aruanne.käivitatud} koodijuppi käivitatud, "
+          f"{aruanne.vahemälust} vahemälust, {aruanne.vigu} viga ({kulunud:.2f} s)")
+
+    if arg.json:
+        with open(arg.json, "w", encoding="utf-8") as f:
+            json.dump([asdict(l) for l in aruanne.leiud], f, ensure_ascii=False, indent=2)
+    return 1 if aruanne.vigu else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
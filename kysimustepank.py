@@ -0,0 +1,236 @@
+"""
+Küsimustepank – küsimused.json kompileeritakse indekseeritud JSON Lines failiks
+
+Kompileeritud fail (nt küsimused.jsonl):
+ - 1. rida: päis JSON-ina – versioon, allikafaili info (suurus, muutmisaeg, räsi) ja
+   kõigi objektide paigutus: [objekt, x, y, pilt, skaala, täht, nihe, pikkus, mall]
+ - edasi iga küsimuse sisu (nimi, küsimus, kood, valikud, õige vastus) omal real;
+   nihe on baitides päise lõpust
+
+Mängu alguses loetakse ainult päis. Küsimuse tekst loetakse failist (seek + read)
+alles siis, kui küsimust esimest korda vaja läheb. Kui allikas on muutunud, kompileeritakse
+fail automaatselt uuesti.
+
+Mall (valikuline, vt mallid.py) on parameetritega küsimus, millest mäng teeb igal avamisel
+uue variandi; küsimuse enda kood, valikud ja õige vastus on siis varuks.
+"""
+
+from __future__ import annotations
+
+import json
+import os
+import threading
+from typing import Callable, Optional
+
+import varad
+
+VERSIOON = 2
+
+
+class KüsimuseSisu:
+    __slots__ = ("nimi", "kysimus", "kood", "valikud", "oige_vastus")
+
+    def __init__(self, nimi: str, kysimus: str, kood: str, valikud: list[str], oige_vastus: int):
+        self.nimi = nimi
+        self.kysimus = kysimus
+        self.kood = kood
+        self.valikud = valikud
+        self.oige_vastus = oige_vastus
+
+
+_SISU_LUKK = threading.Lock()  # küsimus.sisu laadimine ja vaheta()
+
+
+class küsimus:
+    """Üks küsimus koos objekti paigutusega.
+
+    Paigutus (objekt, x, y, pilt, skaala, täht) ja mall on alati mälus. Nimi, küsimus, kood,
+    valikud ja õige vastus võivad tulla kompileeritud pangast alles esimesel kasutamisel.
+    """
+
+    __slots__ = ("objekt", "x", "y", "pilt", "skaala", "taht", "mall", "_sisu", "_lae_sisu")
+
+    def __init__(self, objekt: str, nimi: str, x: int, y: int, pilt: Optional[str], skaala: float,
+                 kysimus: str, kood: str, valikud: list[str], oige_vastus: int, taht: str,
+                 mall: Optional[dict] = None):
+        self.objekt = objekt
+        self.x = x
+        self.y = y
+        self.pilt = pilt
+        self.skaala = skaala
+        self.taht = taht
+        self.mall = mall
+        self._sisu: Optional[KüsimuseSisu] = KüsimuseSisu(nimi, kysimus, kood, valikud, oige_vastus)
+        self._lae_sisu: Optional[Callable[[], KüsimuseSisu]] = None
+
+    @classmethod
+    def laisk(cls, objekt: str, x: int, y: int, pilt: Optional[str], skaala: float, taht: str,
+              lae_sisu: Callable[[], KüsimuseSisu], mall: Optional[dict] = None) -> küsimus:
+        k = cls.__new__(cls)
+        k.objekt, k.x, k.y, k.pilt, k.skaala, k.taht, k.mall = objekt, x, y, pilt, skaala, taht, mall
+        k._sisu = None
+        k._lae_sisu = lae_sisu
+        return k
+
+    def vaheta(self, sisu: KüsimuseSisu) -> None:
+        """Mallist tehtud uus variant; paigutus ja täht jäävad samaks."""
+        with _SISU_LUKK:
+            self._sisu = sisu
+
+    @property
+    def sisu(self) -> KüsimuseSisu:
+        if self._sisu is None:
+            # laadimine võib käia taustalõimes (game.eellae_tekstid); kui vahepeal
+            # vahetati variant, jääb variant alles
+            sisu = self._lae_sisu()
+            with _SISU_LUKK:
+                if self._sisu is None:
+                    self._sisu = sisu
+        return self._sisu
+
+    @property
+    def on_laetud(self) -> bool:
+        return self._sisu is not None
+
+    nimi = property(lambda self: self.sisu.nimi)
+    kysimus = property(lambda self: self.sisu.kysimus)
+    kood = property(lambda self: self.sisu.kood)
+    valikud = property(lambda self: self.sisu.valikud)
+    oige_vastus = property(lambda self: self.sisu.oige_vastus)
+
+    def __repr__(self) -> str:
+        return f"küsimus(objekt={self.objekt!r}, x={self.x}, y={self.y}, täht={self.taht!r})"
+
+
+# JSON allikas
+
+def leia_pilt(pilt: Optional[str]) -> Optional[str]:
+    if pilt and not os.path.exists(pilt):
+        kandidaadi_tee = os.path.join("pildid", pilt)
+        if os.path.exists(kandidaadi_tee):
+            pilt = kandidaadi_tee
+    return pilt
+
+
+def _sisu(r: dict) -> KüsimuseSisu:
+    return KüsimuseSisu(
+        nimi=r.get("nimi", r["objekt"]),
+        kysimus=r["küsimus"],
+        kood=r.get("kood", ""),
+        valikud=list(r.get("valikud", [])),
+        oige_vastus=int(r.get("õige_vastus", 0)),
+    )
+
+
+def _mall(r: dict) -> Optional[dict]:
+    """Küsimuse mall (vt mallid.py); kui mallis pole küsimuse teksti, on see küsimuse enda oma."""
+    mall = r.get("mall")
+    return dict(mall, küsimus=mall.get("küsimus", r["küsimus"])) if mall else None
+
+
+def loe_json(failitee: str) -> list[küsimus]:
+    """Loeb kogu JSON allika korraga (nii nagu varem)."""
+    with open(failitee, "r", encoding="utf-8") as f: #avame küsimused.json faili
+        andmed = json.load(f)
+
+    küsimused: list[küsimus] = []
+    for r in andmed:
+        s = _sisu(r)
+        küsimused.append(
+            küsimus(
+                objekt=r["objekt"],
+                nimi=s.nimi,
+                x=int(r["x"]),
+                y=int(r["y"]),
+                pilt=leia_pilt(r.get("pilt")),
+                skaala=float(r.get("skaala", 1.0)),
+                kysimus=s.kysimus,
+                kood=s.kood,
+                valikud=s.valikud,
+                oige_vastus=s.oige_vastus,
+                taht=str(r.get("täht", "")),
+                mall=_mall(r),
+            )
+        )
+    return küsimused
+
+
+# Kompileeritud pank
+
+def kompileeritud_tee(failitee: str) -> str:
+    return failitee + "l" if failitee.endswith(".json") else failitee + ".jsonl"
+
+
+def kompileeri(failitee: str, siht: str) -> None:
+    with open(failitee, "r", encoding="utf-8") as f:
+        andmed = json.load(f)
+
+    paigutus = []
+    read: list[bytes] = []
+    nihe = 0
+    for r in andmed:
+        s = _sisu(r)
+        rida = json.dumps([s.nimi, s.kysimus, s.kood, s.valikud, s.oige_vastus], ensure_ascii=False).encode("utf-8") + b"\n"
+        paigutus.append([r["objekt"], int(r["x"]), int(r["y"]), leia_pilt(r.get("pilt")),
+                         float(r.get("skaala", 1.0)), str(r.get("täht", "")), nihe, len(rida), _mall(r)])
+        read.append(rida)
+        nihe += len(rida)
+
+    info = varad.allika_info(failitee)
+    info["allikas"] = failitee
+    päis = json.dumps({"versioon": VERSIOON, "allikas": info, "paigutus": paigutus}, ensure_ascii=False)
+
+    ajutine = siht + ".tmp"
+    with open(ajutine, "wb") as f:
+        f.write(päis.encode("utf-8") + b"\n")
+        f.writelines(read)
+    os.replace(ajutine, siht)
+
+
+def _loe_päis(tee: str) -> tuple[dict, int]:
+    with open(tee, "rb") as f:
+        rida = f.readline()
+    return json.loads(rida.decode("utf-8")), len(rida)
+
+
+def ava_kompileeritud(tee: str, allikas: Optional[str] = None) -> Optional[list[küsimus]]:
+    """Loeb kompileeritud panga päise. None, kui fail puudub, on vigane või allikast vanem."""
+    try:
+        päis, andmete_algus = _loe_päis(tee)
+    except (OSError, ValueError):
+        return None
+    if päis.get("versioon") != VERSIOON:
+        return None
+    info = päis.get("allikas", {})
+    if allikas is not None and (os.path.abspath(info.get("allikas", "")) != os.path.abspath(allikas)
+                                or not varad.allikas_sama(info)):
+        return None
+
+    def laadija(nihe: int, pikkus: int) -> Callable[[], KüsimuseSisu]:
+        def lae() -> KüsimuseSisu:
+            with open(tee, "rb") as f:
+                f.seek(andmete_algus + nihe)
+                nimi, kysimus, kood, valikud, oige = json.loads(f.read(pikkus).decode("utf-8"))
+            return KüsimuseSisu(nimi, kysimus, kood, valikud, oige)
+        return lae
+
+    return [
+        küsimus.laisk(objekt, x, y, pilt, skaala, taht, laadija(nihe, pikkus), mall)
+        for objekt, x, y, pilt, skaala, taht, nihe, pikkus, mall in päis["paigutus"]
+    ]
+
+
+def loe(failitee: str) -> list[küsimus]:
+    """Küsimused kompileeritud pangast; vajadusel kompileerib selle enne uuesti.
+
+    Kui kompileeritud faili ei saa kirjutada, loetakse JSON allikas tervikuna.
+    """
+    siht = kompileeritud_tee(failitee)
+    küsimused = ava_kompileeritud(siht, failitee)
+    if küsimused is None:
+        try:
+            kompileeri(failitee, siht)
+        except OSError:
+            return loe_json(failitee)
+        küsimused = ava_kompileeritud(siht, failitee)
+    return küsimused if küsimused is not None else loe_json(failitee)
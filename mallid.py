@@ -0,0 +1,226 @@
+"""
+Mallid – parameetritega küsimused: igal avamisel uued arvud, vastused koodi käivitamisest
+
+Küsimusel (küsimused.json) võib olla mall:
+    "mall": {
+        "parameetrid": {"x": [2, 9], "samm": [2, 6, 2]},
+        "kood": "x = $x\\n...",
+        "küsimus": "Mis prinditakse, kui x = $x?",
+        "eksitajad": ["print($x + 1)"]
+    }
+ - parameetrid: [algus, lõpp] või [algus, lõpp, samm] (täisarvud, lõpp kaasa arvatud)
+ - kood ja küsimus: $nimi asendatakse parameetri väärtusega (string.Template); kui
+   küsimust pole, on see küsimuse enda tekst
+ - eksitajad (valikuline): tüüpvigade kood samade parameetritega; nende väljund on vale vastus
+
+Variandi tegemine: parameetrid loositakse, kood käivitatakse (kontrollija.käivita, samad
+piirangud mis kontrollimisel) ja väljund on õige vastus (mitu rida " / " eraldatult).
+Valed vastused on eksitajate väljundid ja sama koodi väljundid teiste parameetritega.
+Variant jäetakse kõrvale, kui kood ei tööta või erinevaid valesid vastuseid on alla kolme.
+Küsimuse tavalised väljad (kood, valikud, õige_vastus) jäävad varuks: neid näidatakse,
+kuni esimene variant valmib, ja klassiserveris, kus malle ei kasutata.
+
+Variandid tehakse töötajate kogumis (ProcessPoolExecutor) ette: iga malliga objekti jaoks
+on järjekorras VARU valmis või valmivat varianti. Küsimuse avamisel võetakse järjekorrast
+valmis variant ja tellitakse asemele uus; kui järgmine pole veel valmis, jääb küsimusele
+eelmine variant, nii et avamine ei oota kunagi.
+
+Seeme: objekti n-s variant sõltub ainult sessiooni seemnest, objektist ja n-st, mitte
+töötajate ajastusest (python game.py --seeme N näitab samu variante samas järjekorras).
+Kas avamisel oli variant juba valmis, sõltub aga ajastusest; seepärast saab kuulaja iga
+avamisel järjekorrast võetud variantide arvu (sisendlogi salvestab selle) ja taasesitus
+(esitus) võtab täpselt sama palju, oodates vajadusel variandid ära.
+"""
+
+from __future__ import annotations
+
+import multiprocessing
+import os
+import random
+import string
+import sys
+from collections import deque
+from concurrent.futures import Future, ProcessPoolExecutor
+from typing import Callable, Hashable, Iterable, Optional
+
+import kontrollija
+
+VARU = 3  # mitu varianti objekti kohta hoitakse valmis
+PROTSESSE = min(2, os.cpu_count() or 1)
+KATSEID = 12  # mitu korda loositakse teisi parameetreid, et leida erinevaid valesid vastuseid
+AJAPIIRANG_S = 1.0
+
+# küsimus, kood, valikud, õige vastus
+Variant = tuple[str, str, list[str], int]
+
+
+def loosi(parameetrid: dict[str, list[int]], juhus: random.Random) -> dict[str, int]:
+    väärtused = {}
+    for nimi, vahemik in parameetrid.items():
+        algus, lõpp, *samm = vahemik
+        väärtused[nimi] = juhus.randrange(algus, lõpp + 1, samm[0] if samm else 1)
+    return väärtused
+
+
+def asenda(mall: str, väärtused: dict[str, int]) -> str:
+    return string.Template(mall).substitute(väärtused)
+
+
+def vastuse_tekst(väljund: str) -> str:
+    return " / ".join(r.rstrip() for r in väljund.strip().splitlines())
+
+
+class MalliViga(Exception):
+    """Mallist ei saanud varianti (põhjus on teates)."""
+
+
+def _väljund(kood: str) -> str:
+    k = kontrollija.käivita(kood, AJAPIIRANG_S)
+    if k.viga:
+        raise MalliViga(f"kood ei tööta: {k.viga}")
+    if not k.väljund.strip():
+        raise MalliViga("kood ei prindi midagi")
+    return k.väljund
+
+
+def tee_variant(mall: dict, seeme: str) -> Variant:
+    """Üks variant mallist; MalliViga, kui kood ei tööta või erinevaid valesid vastuseid on vähe."""
+    juhus = random.Random(seeme)
+    try:
+        väärtused = loosi(mall["parameetrid"], juhus)
+        kood = asenda(mall["kood"], väärtused)
+        eksitajad = [asenda(e, väärtused) for e in mall.get("eksitajad", [])]
+        küsimus = asenda(mall["küsimus"], väärtused)
+    except (KeyError, ValueError, TypeError) as e:
+        raise MalliViga(f"vigane mall: {type(e).__name__}: {e}") from None
+
+    õige = _väljund(kood)
+    vastused = [vastuse_tekst(õige)]
+
+    def lisa(kood: str) -> None:
+        try:
+            väljund = _väljund(kood)
+        except MalliViga:
+            return  # eksitaja või teiste parameetritega kood võib vabalt mitte töötada
+        # 9 ja 9.0 või eri eraldajaga sama väljund ei ole erinevad vastused (vt kontrollija.vastab)
+        if not any(kontrollija.vastab(väljund, v) for v in vastused):
+            vastused.append(vastuse_tekst(väljund))
+
+    for eksitaja in eksitajad:
+        if len(vastused) < kontrollija.VALIKUTE_ARV:
+            lisa(eksitaja)
+    for _ in range(KATSEID):
+        if len(vastused) >= kontrollija.VALIKUTE_ARV:
+            break
+        lisa(asenda(mall["kood"], loosi(mall["parameetrid"], juhus)))
+    if len(vastused) < kontrollija.VALIKUTE_ARV:
+        raise MalliViga(f"erinevaid valesid vastuseid on {len(vastused) - 1}, vaja {kontrollija.VALIKUTE_ARV - 1}")
+
+    järjekord = list(range(kontrollija.VALIKUTE_ARV))
+    juhus.shuffle(järjekord)
+    return küsimus, kood, [vastused[i] for i in järjekord], järjekord.index(0)
+
+
+def loo_variant(mall: dict, seeme: str) -> Optional[Variant]:
+    """Üks variant mallist (töötaja protsessis). None, kui varianti ei saanud (vt tee_variant)."""
+    try:
+        return tee_variant(mall, seeme)
+    except MalliViga:
+        return None
+
+
+def uus_seeme() -> int:
+    return random.randrange(1 << 31)
+
+
+def variandi_seeme(seeme: int, võti: Hashable, n: int) -> str:
+    return f"{seeme}:{võti}:{n}"
+
+
+class Mallid:
+    """Malliga objektide variandid: iga objekti jaoks järjekord ette tellitud variantidest.
+
+    lisa() registreerib malli, käivita() alustab tegemist (nt pärast esimest kaadrit),
+    võta() annab järgmise valmis variandi ilma ootamata ja teatab kuulajale, mitu
+    varianti järjekorrast võeti. esitus (taasesitus) annab need arvud ette: võta() võtab
+    täpselt nii palju ja ootab variandid ära, et tulemus ei sõltuks ajastusest.
+    """
+
+    def __init__(self, seeme: Optional[int] = None, protsessid: int = PROTSESSE, varu: int = VARU,
+                 kuulaja: Optional[Callable[[int], None]] = None, esitus: Optional[Iterable[int]] = None):
+        self.seeme = uus_seeme() if seeme is None else seeme
+        self.protsessid = protsessid
+        self.varu = varu
+        self.kuulaja = kuulaja
+        self._esitus = iter(esitus) if esitus is not None else None
+        self._mallid: dict[Hashable, dict] = {}
+        self._järjekorrad: dict[Hashable, deque[Future]] = {}
+        self._tellitud: dict[Hashable, int] = {}
+        self._kogum: Optional[ProcessPoolExecutor] = None
+        self._käib = False
+
+    def lisa(self, võti: Hashable, mall: dict) -> None:
+        if võti in self._mallid:
+            return
+        self._mallid[võti] = mall
+        self._järjekorrad[võti] = deque()
+        if self._käib:
+            self._telli(võti)
+
+    def käivita(self) -> None:
+        if self._käib:
+            return
+        self._käib = True
+        for võti in self._mallid:
+            self._telli(võti)
+
+    def _telli(self, võti: Hashable) -> None:
+        if self._kogum is None:
+            # spawn: mängul on juba lõimed (pygame, salvestamine), nendega protsessi forkida ei tohi
+            self._kogum = ProcessPoolExecutor(self.protsessid, multiprocessing.get_context("spawn"))
+        järjekord = self._järjekorrad[võti]
+        try:
+            while len(järjekord) < self.varu:
+                n = self._tellitud.get(võti, 0)
+                self._tellitud[võti] = n + 1
+                järjekord.append(self._kogum.submit(loo_variant, self._mallid[võti], variandi_seeme(self.seeme, võti, n)))
+        except RuntimeError as e:  # töötaja suri (BrokenProcessPool) või kogum on suletud
+            print(f"Hoiatus: küsimuste variante ei saa teha: {e}", file=sys.stderr)
+            self._käib = False
+
+    def võta(self, võti: Hashable) -> Optional[Variant]:
+        """Järgmine valmis variant või None (siis jääb küsimusele eelmine)."""
+        järjekord = self._järjekorrad.get(võti)
+        if järjekord is None:
+            return None
+        variant = None
+        if self._esitus is not None:
+            self.käivita()
+            for _ in range(next(self._esitus, 0)):
+                if not järjekord:
+                    break
+                variant = self._tulemus(järjekord.popleft())
+        else:
+            võetud = 0
+            while variant is None and järjekord and järjekord[0].done():
+                variant = self._tulemus(järjekord.popleft())
+                võetud += 1
+            if self.kuulaja is not None:
+                self.kuulaja(võetud)
+        if self._käib:
+            self._telli(võti)
+        return variant
+
+    @staticmethod
+    def _tulemus(tellimus: Future) -> Optional[Variant]:
+        try:
+            return tellimus.result()
+        except Exception as e:
+            print(f"Hoiatus: küsimuse variandi tegemine ebaõnnestus: {e}", file=sys.stderr)
+            return None
+
+    def sulge(self) -> None:
+        if self._kogum is not None:
+            self._kogum.shutdown(wait=False, cancel_futures=True)
+            self._kogum = None
+        self._käib = False
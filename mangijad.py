@@ -0,0 +1,295 @@
+"""
+Mängijad – mitme õpilase progress ühes SQLite andmebaasis
+
+Klassi arvutis mängivad järjest paljud õpilased ja igaühel on oma profiil (nimi).
+Kõik profiilid on ühes failis ANDMEBAAS (SQLite, WAL režiimis):
+ - mängijad: nimi, loodud, viimati mänginud, praegune tuba ja vigade arv
+ - lahendatud: mängija lahendatud objektid ja millal need lahendati
+ - vead: iga vale vastus või kood (aeg, tuba, objekt, vastus). Need jäävad alles ka
+   pärast resetti, et õpetaja näeks, millega õpilane hätta jäi
+
+Profiili vahetus ei oota ketast: laetud profiilid hoitakse mälus ja andmebaasist loetakse
+indeksi järgi ainult ühe mängija read. Kirjutamine käib taustalõimes: muudatused ootavad
+KOONDAMISE_MS ja kirjutatakse siis ühes transaktsioonis (iga profiili kohta ainult viimane
+seis). WAL režiimis ei takista lugemine (nt eksport mängu ajal) kirjutamist ega vastupidi.
+
+Õpetajale: python mangijad.py [progress.db] näitab kõiki profiile,
+--ekspordi FAIL.csv (üks rida profiili kohta) või FAIL.json (ka lahendatud objektid ja vead
+koos aegadega) kirjutab need faili.
+"""
+
+from __future__ import annotations
+
+import argparse
+import csv
+import json
+import os
+import re
+import sqlite3
+import sys
+import threading
+import time
+from typing import Optional
+
+ANDMEBAAS = "progress.db"
+KOONDAMISE_MS = 250
+SKEEMI_VERSIOON = 1
+NIMI = re.compile(r"^[\w-]{1,40}$")  # nagu klassiserveris
+
+SKEEM = """
+CREATE TABLE IF NOT EXISTS mängijad (
+    id INTEGER PRIMARY KEY,
+    nimi TEXT NOT NULL UNIQUE,
+    loodud REAL NOT NULL,
+    viimati REAL NOT NULL,
+    tuba INTEGER NOT NULL DEFAULT 0,
+    vead INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS mängijad_viimati ON mängijad (viimati);
+CREATE TABLE IF NOT EXISTS lahendatud (
+    mängija INTEGER NOT NULL REFERENCES mängijad (id) ON DELETE CASCADE,
+    objekt TEXT NOT NULL,
+    aeg REAL NOT NULL,
+    PRIMARY KEY (mängija, objekt)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS vead (
+    mängija INTEGER NOT NULL REFERENCES mängijad (id) ON DELETE CASCADE,
+    aeg REAL NOT NULL,
+    tuba INTEGER NOT NULL,
+    objekt TEXT NOT NULL,
+    vastus TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS vead_mängija ON vead (mängija, aeg);
+"""
+
+
+def puhasta_nimi(nimi: str) -> str:
+    """Nimi NIMI kujule: lubamatud märgid asendatakse '_'-ga (nt kooli kasutaja mari.tamm -> mari_tamm)."""
+    return re.sub(r"[^\w-]", "_", nimi)[:40]
+
+
+def ava(tee: str) -> sqlite3.Connection:
+    """Ühendus ilma automaatsete transaktsioonideta (need alustatakse ise, vt Mängijad._kirjuta)."""
+    ühendus = sqlite3.connect(tee, timeout=5.0, isolation_level=None)
+    ühendus.execute("PRAGMA journal_mode=WAL")
+    # WAL-iga jääb andmebaas terveks ka krahhi korral; elektrikatkestusel võib kaotsi minna viimane partii
+    ühendus.execute("PRAGMA synchronous=NORMAL")
+    ühendus.execute("PRAGMA foreign_keys=ON")
+    return ühendus
+
+
+def tühi_seis() -> dict:
+    return {"lahendatud": [], "vead": 0, "tuba": 0}
+
+
+class Mängijad:
+    """Profiilide progress. Lugemine põhilõimes (mälust või indeksi järgi), kirjutamine taustalõimes.
+
+    salvesta(), viga() ja vali() ainult jätavad muudatuse järjekorda ja uuendavad mälus olevat
+    seisu, nii et lae() näeb kohe ka veel kirjutamata muudatusi.
+    """
+
+    def __init__(self, tee: str = ANDMEBAAS, koondamise_ms: int = KOONDAMISE_MS):
+        self.tee = tee
+        self.viivitus = koondamise_ms / 1000
+        self._ühendus = ava(tee)
+        if self._ühendus.execute("PRAGMA user_version").fetchone()[0] < SKEEMI_VERSIOON:
+            self._ühendus.executescript(SKEEM)
+            self._ühendus.execute(f"PRAGMA user_version = {SKEEMI_VERSIOON}")
+        self._seisud: dict[str, dict] = {}  # laetud profiilid koos kirjutamata muudatustega
+        self._viimati: dict[str, float] = {}  # selles sessioonis kasutatud profiilid
+        self._ootel: list[tuple] = []
+        self._lõpeta = False
+        self._tingimus = threading.Condition()
+        self._lõim = threading.Thread(target=self._töö, name="mängijad", daemon=True)
+        self._lõim.start()
+
+    # --- lugemine (põhilõim) ---
+
+    def olemas(self, nimi: str) -> bool:
+        if nimi in self._seisud or nimi in self._viimati:
+            return True
+        return self._ühendus.execute("SELECT 1 FROM mängijad WHERE nimi = ?", (nimi,)).fetchone() is not None
+
+    def nimed(self, n: int = 10) -> list[str]:
+        """Kuni n viimati mänginud profiili, uuemad eespool."""
+        ajad = dict(self._ühendus.execute("SELECT nimi, viimati FROM mängijad ORDER BY viimati DESC LIMIT ?", (n,)))
+        ajad.update(self._viimati)
+        return sorted(ajad, key=ajad.__getitem__, reverse=True)[:n]
+
+    def viimane(self) -> Optional[str]:
+        nimed = self.nimed(1)
+        return nimed[0] if nimed else None
+
+    def lae(self, nimi: str) -> dict:
+        """Profiili seis salvestuse kujul ({"lahendatud", "vead", "tuba"}); uuel profiilil tühi."""
+        seis = self._seisud.get(nimi)
+        if seis is None:
+            rida = self._ühendus.execute("SELECT id, tuba, vead FROM mängijad WHERE nimi = ?", (nimi,)).fetchone()
+            seis = tühi_seis()
+            if rida is not None:
+                mängija, seis["tuba"], seis["vead"] = rida
+                seis["lahendatud"] = [o for (o,) in self._ühendus.execute(
+                    "SELECT objekt FROM lahendatud WHERE mängija = ? ORDER BY objekt", (mängija,))]
+            self._seisud[nimi] = seis
+        return dict(seis, lahendatud=list(seis["lahendatud"]))
+
+    # --- muutmine (ainult järjekorda) ---
+
+    def vali(self, nimi: str) -> None:
+        """Märgib profiili kasutatuks (luuakse, kui seda veel pole)."""
+        aeg = time.time()
+        self._viimati[nimi] = aeg
+        self._lisa(("vali", nimi, aeg))
+
+    def salvesta(self, nimi: str, andmed: dict) -> None:
+        aeg = time.time()
+        self._seisud[nimi] = dict(andmed, lahendatud=list(andmed.get("lahendatud", [])))
+        self._viimati[nimi] = aeg
+        self._lisa(("seis", nimi, aeg, self._seisud[nimi]))
+
+    def viga(self, nimi: str, tuba: int, objekt: str, vastus: str) -> None:
+        self._lisa(("viga", nimi, time.time(), tuba, objekt, vastus))
+
+    def sulge(self) -> None:
+        """Kirjutab ootel muudatused ära ja lõpetab lõime (mängust väljumisel)."""
+        with self._tingimus:
+            self._lõpeta = True
+            self._tingimus.notify()
+        self._lõim.join()
+        self._ühendus.close()
+
+    def _lisa(self, kirje: tuple) -> None:
+        with self._tingimus:
+            self._ootel.append(kirje)
+            self._tingimus.notify()
+
+    # --- kirjutamine (taustalõim) ---
+
+    def _võta_ootel(self) -> list[tuple]:
+        with self._tingimus:
+            ootel, self._ootel = self._ootel, []
+        return ootel
+
+    def _töö(self) -> None:
+        ühendus = ava(self.tee)
+        try:
+            while True:
+                with self._tingimus:
+                    while not self._ootel and not self._lõpeta:
+                        self._tingimus.wait()
+                    if not self._ootel:
+                        return
+                    # koondamine: ootame natuke, kas tuleb veel muudatusi
+                    tähtaeg = time.monotonic() + self.viivitus
+                    while not self._lõpeta and time.monotonic() < tähtaeg:
+                        self._tingimus.wait(tähtaeg - time.monotonic())
+                try:
+                    self._kirjuta(ühendus, self._võta_ootel())
+                except sqlite3.Error as e:
+                    print(f"Hoiatus: progressi salvestamine ebaõnnestus: {e}", file=sys.stderr)
+        finally:
+            ühendus.close()
+
+    @staticmethod
+    def _kirjuta(ühendus: sqlite3.Connection, partii: list[tuple]) -> None:
+        ajad: dict[str, tuple[float, float]] = {}  # profiili esimene ja viimane muudatus partiis
+        seisud: dict[str, tuple[float, dict]] = {}  # profiili kohta ainult viimane seis
+        for kirje in partii:
+            liik, nimi, aeg = kirje[:3]
+            esimene, viimane = ajad.get(nimi, (aeg, aeg))
+            ajad[nimi] = (min(esimene, aeg), max(viimane, aeg))
+            if liik == "seis":
+                seisud[nimi] = (aeg, kirje[3])
+
+        ühendus.execute("BEGIN IMMEDIATE")
+        try:
+            ühendus.executemany(
+                "INSERT INTO mängijad (nimi, loodud, viimati) VALUES (?, ?, ?) "
+                "ON CONFLICT (nimi) DO UPDATE SET viimati = max(viimati, excluded.viimati)",
+                [(nimi, esimene, viimane) for nimi, (esimene, viimane) in ajad.items()])
+            id_d = {nimi: ühendus.execute("SELECT id FROM mängijad WHERE nimi = ?", (nimi,)).fetchone()[0]
+                    for nimi in ajad}
+
+            ühendus.executemany(
+                "INSERT INTO vead (mängija, aeg, tuba, objekt, vastus) VALUES (?, ?, ?, ?, ?)",
+                [(id_d[k[1]], *k[2:]) for k in partii if k[0] == "viga"])
+
+            for nimi, (aeg, seis) in seisud.items():
+                mängija = id_d[nimi]
+                ühendus.execute("UPDATE mängijad SET tuba = ?, vead = ? WHERE id = ?",
+                                (int(seis.get("tuba", 0)), int(seis.get("vead", 0)), mängija))
+                vanad = {o for (o,) in ühendus.execute("SELECT objekt FROM lahendatud WHERE mängija = ?", (mängija,))}
+                uued = set(seis["lahendatud"])
+                ühendus.executemany("DELETE FROM lahendatud WHERE mängija = ? AND objekt = ?",
+                                    [(mängija, o) for o in vanad - uued])
+                ühendus.executemany("INSERT INTO lahendatud (mängija, objekt, aeg) VALUES (?, ?, ?)",
+                                    [(mängija, o, aeg) for o in uued - vanad])
+        except BaseException:
+            ühendus.execute("ROLLBACK")
+            raise
+        ühendus.execute("COMMIT")
+
+
+# --- õpetajale: kõigi profiilide eksport ---
+
+def ekspordi(tee: str = ANDMEBAAS) -> list[dict]:
+    """Kõik profiilid nime järjekorras koos lahendatud objektide ja vigadega (kolm päringut kokku)."""
+    ühendus = ava(tee)
+    try:
+        profiilid: dict[int, dict] = {}
+        for mängija, nimi, loodud, viimati, tuba, vead in ühendus.execute(
+                "SELECT id, nimi, loodud, viimati, tuba, vead FROM mängijad ORDER BY nimi"):
+            profiilid[mängija] = {"nimi": nimi, "loodud": loodud, "viimati": viimati, "tuba": tuba,
+                                  "vead": vead, "lahendatud": [], "vigade_logi": []}
+        for mängija, objekt, aeg in ühendus.execute("SELECT mängija, objekt, aeg FROM lahendatud ORDER BY aeg"):
+            profiilid[mängija]["lahendatud"].append({"objekt": objekt, "aeg": aeg})
+        for mängija, aeg, tuba, objekt, vastus in ühendus.execute(
+                "SELECT mängija, aeg, tuba, objekt, vastus FROM vead ORDER BY mängija, aeg"):
+            profiilid[mängija]["vigade_logi"].append({"aeg": aeg, "tuba": tuba, "objekt": objekt, "vastus": vastus})
+    finally:
+        ühendus.close()
+    return list(profiilid.values())
+
+
+def _kuupäev(aeg: float) -> str:
+    return time.strftime("%Y-%m-%d %H:%M", time.localtime(aeg))
+
+
+def kirjuta_csv(profiilid: list[dict], tee: str) -> None:
+    with open(tee, "w", encoding="utf-8", newline="") as f:
+        kirjutaja = csv.writer(f)
+        kirjutaja.writerow(["nimi", "loodud", "viimati", "tuba", "vead", "lahendatud", "vigu_kokku", "objektid"])
+        for p in profiilid:
+            kirjutaja.writerow([p["nimi"], _kuupäev(p["loodud"]), _kuupäev(p["viimati"]), p["tuba"], p["vead"],
+                                len(p["lahendatud"]), len(p["vigade_logi"]),
+                                " ".join(l["objekt"] for l in p["lahendatud"])])
+
+
+def main(argumendid: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Kõigi mängijaprofiilide ülevaade ja eksport õpetajale.")
+    parser.add_argument("andmebaas", nargs="?", default=ANDMEBAAS)
+    parser.add_argument("--ekspordi", metavar="FAIL", help="kirjuta profiilid faili (.csv või .json)")
+    arg = parser.parse_args(argumendid)
+
+    if not os.path.exists(arg.andmebaas):
+        print(f"Ei leidnud faili: '{arg.andmebaas}'.", file=sys.stderr)
+        return 1
+    profiilid = ekspordi(arg.andmebaas)
+    if arg.ekspordi:
+        if arg.ekspordi.lower().endswith(".json"):
+            with open(arg.ekspordi, "w", encoding="utf-8") as f:
+                json.dump(profiilid, f, ensure_ascii=False, indent=2)
+        else:
+            kirjuta_csv(profiilid, arg.ekspordi)
+        print(f"{len(profiilid)} profiili -> {arg.ekspordi}")
+        return 0
+    for p in profiilid:
+        print(f"{p['nimi']:<24} tuba {p['tuba'] + 1}  lahendatud {len(p['lahendatud']):>3}  vead {p['vead']}"
+              f"  vigu kokku {len(p['vigade_logi']):>4}  viimati {_kuupäev(p['viimati'])}")
+    print(f"{len(profiilid)} profiili")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
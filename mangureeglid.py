@@ -0,0 +1,167 @@
+"""
+Mängureeglid – ühe mängija seis ja reeglid ilma pygame'ita
+
+Mänguseis teab küsimusi, lahendatud objekte, vigu, olekut (tuba | küsimus | lukk |
+võit | kaotus), avatud küsimust ja lukku sisestatud koodi. Meetodid vastavad mängija
+tegevustele ja tagastavad Tulemuse: mida näidata (teade, punane X) ja kas progress
+tuleb salvestada. Joonistamine, helid ja failid on kasutajaliidese (game.py) või
+serveri (klassiserver.py) mure.
+"""
+
+from __future__ import annotations
+
+from dataclasses import asdict, dataclass
+from typing import Iterable, Optional
+
+from kysimustepank import küsimus
+
+MAKS_VEAD = 3
+
+
+@dataclass
+class Tulemus:
+    teade: str = ""
+    ms: int = 1500  # kui kaua teadet näidata
+    viga: bool = False  # punane X
+    salvesta: bool = False
+    uus_tuba: bool = False  # uks avanes ja mäng läks järgmisse tuppa
+
+    def sõnastik(self) -> dict:
+        return asdict(self)
+
+
+class Mänguseis:
+    def __init__(self, küsimused: list[küsimus], lahendatud: Iterable[str] = (), vead: int = 0,
+                 tuba: int = 0, tubade_arv: int = 1, maks_vead: int = MAKS_VEAD):
+        self.küsimused = küsimused
+        self.lahendatud: set[str] = set(lahendatud)
+        self.vead = vead
+        self.tuba = tuba
+        self.tubade_arv = tubade_arv
+        self.maks_vead = maks_vead
+        self.olek = "tuba"
+        self.aktiivne: Optional[int] = None  # avatud küsimuse indeks
+        self.sisestatud_kood = ""
+
+    # --- tuletatud väärtused ---
+
+    @property
+    def oodatav_kood(self) -> str:
+        """Uksekood: tähtede jada küsimuste järjekorras."""
+        return "".join(k.taht for k in self.küsimused)
+
+    @property
+    def kood_nahtav(self) -> list[str]:
+        return [k.taht if k.objekt in self.lahendatud else "_" for k in self.küsimused]
+
+    def on_lahendatud(self, i: int) -> bool:
+        return self.küsimused[i].objekt in self.lahendatud
+
+    def kõik_lahendatud(self) -> bool:
+        return all(k.objekt in self.lahendatud for k in self.küsimused)
+
+    def seis(self) -> dict:
+        return {"olek": self.olek, "vead": self.vead, "lahendatud": sorted(self.lahendatud), "tuba": self.tuba}
+
+    def salvestus(self) -> dict:
+        return {"lahendatud": sorted(self.lahendatud), "vead": self.vead, "tuba": self.tuba}
+
+    # --- tegevused ---
+
+    def vaheta_tuba(self, küsimused: list[küsimus]) -> None:
+        """Uue toa küsimused (kasutajaliides laeb toa ise, vt Tulemus.uus_tuba)."""
+        self.küsimused = küsimused
+        self.aktiivne = None
+
+    def ava_uks(self) -> Tulemus:
+        if self.olek != "tuba":
+            return Tulemus()
+        if not self.kõik_lahendatud():
+            puudu = len(self.küsimused) - sum(k.objekt in self.lahendatud for k in self.küsimused)
+            return Tulemus(f"Uks on lukus. Tee kõik ülesanded ({puudu}/{len(self.küsimused)} puudu).")
+        self.olek = "lukk"
+        self.sisestatud_kood = ""
+        return Tulemus()
+
+    def ava_küsimus(self, i: int) -> Tulemus:
+        if self.olek != "tuba" or not 0 <= i < len(self.küsimused):
+            return Tulemus()
+        if self.on_lahendatud(i):
+            return Tulemus("See on juba lahendatud.")
+        self.olek = "küsimus"
+        self.aktiivne = i
+        return Tulemus()
+
+    def vasta(self, valik: int) -> Tulemus:
+        if self.olek != "küsimus" or self.aktiivne is None:
+            return Tulemus()
+        k = self.küsimused[self.aktiivne]
+        if valik != k.oige_vastus:
+            return self._viga("Vale vastus")
+        uus = k.objekt not in self.lahendatud
+        self.lahendatud.add(k.objekt)
+        self.olek = "tuba"
+        self.aktiivne = None
+        return Tulemus(f"Õige! Täht: {k.taht}", salvesta=uus)
+
+    def sisesta(self, tekst: str) -> Tulemus:
+        if self.olek == "lukk" and tekst.isprintable() and len(self.sisestatud_kood) < len(self.oodatav_kood) + 4:
+            self.sisestatud_kood += tekst
+        return Tulemus()
+
+    def kustuta(self) -> Tulemus:
+        if self.olek == "lukk":
+            self.sisestatud_kood = self.sisestatud_kood[:-1]
+        return Tulemus()
+
+    def kinnita_kood(self) -> Tulemus:
+        if self.olek != "lukk":
+            return Tulemus()
+        if self.sisestatud_kood.upper() != self.oodatav_kood.upper():
+            tulemus = self._viga("Vale kood")
+            self.sisestatud_kood = ""
+            return tulemus
+        self.sisestatud_kood = ""
+        if self.tuba + 1 < self.tubade_arv:
+            self.tuba += 1
+            self.lahendatud.clear()
+            self.olek = "tuba"
+            return Tulemus(salvesta=True, uus_tuba=True)
+        self.olek = "võit"
+        return Tulemus()
+
+    def tagasi(self) -> bool:
+        """ESC: sulgeb küsimuse või luku. False, kui polnud midagi sulgeda (mängust väljumine)."""
+        if self.olek not in ("küsimus", "lukk"):
+            return False
+        self.olek = "tuba"
+        self.aktiivne = None
+        self.sisestatud_kood = ""
+        return True
+
+    def taasta(self, salvestus: dict) -> None:
+        """Seis salvestusest (mängu algus või teise mängija profiil); avatud aknad suletakse."""
+        self.lahendatud = set(salvestus.get("lahendatud", []))
+        self.vead = int(salvestus.get("vead", 0))
+        self.tuba = min(max(0, int(salvestus.get("tuba", 0))), self.tubade_arv - 1)
+        self.olek = "tuba"
+        self.aktiivne = None
+        self.sisestatud_kood = ""
+
+    def lähtesta(self) -> Tulemus:
+        self.lahendatud.clear()
+        self.vead = 0
+        self.tuba = 0
+        self.olek = "tuba"
+        self.aktiivne = None
+        self.sisestatud_kood = ""
+        return Tulemus("Reset tehtud.")
+
+    def _viga(self, sõnum: str) -> Tulemus:
+        self.vead += 1
+        tulemus = Tulemus(f"{sõnum} (vead: {self.vead}/{self.maks_vead})", ms=1300, viga=True, salvesta=True)
+        if self.vead >= self.maks_vead:
+            self.olek = "kaotus"
+            self.aktiivne = None
+            self.sisestatud_kood = ""
+        return tulemus
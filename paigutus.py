@@ -0,0 +1,178 @@
+"""
+Teksti paigutus – reamurdmine ja keritav koodiblokk
+
+Paigutaja mõõdab iga sõna laiuse ühe korra (font.size) ja paneb read kokku laiuste
+summana, seega on reamurdmine rea pikkuse suhtes lineaarne. Valmis murtud tekst
+jäetakse meelde võtmega (font, tekst, laius). Reavahetused ("\\n") algavad uue rea,
+liiga pikad sõnad (nt URL või pikk avaldis) tükeldatakse tähtede kaupa.
+
+Koodiblokk renderdatakse ühe korra kõrgeks pinnaks (lihtne Pythoni süntaksi
+esiletõst) ja seda näidatakse Kerimisala kaudu: iga kaader on vaid subsurface
+vaade, ridu uuesti ei renderdata.
+"""
+
+from __future__ import annotations
+
+import builtins
+import keyword
+import re
+from collections import OrderedDict
+
+import pygame
+
+KOODI_TAUST = (15, 16, 20)
+KOODI_VÄRVID = {
+    "tavaline": (210, 245, 210),
+    "võtmesõna": (255, 170, 120),
+    "sisseehitatud": (140, 220, 255),
+    "sõne": (240, 220, 130),
+    "arv": (190, 160, 255),
+    "kommentaar": (130, 140, 130),
+}
+_SISSEEHITATUD = frozenset(dir(builtins))
+_MUSTER = re.compile(
+    r"(?P<kommentaar>#.*)"
+    r"|(?P<sõne>'(?:\\.|[^'\\])*'?|\"(?:\\.|[^\"\\])*\"?)"
+    r"|(?P<arv>\b\d+(?:\.\d+)?\b)"
+    r"|(?P<nimi>[^\W\d]\w*)"
+)
+
+
+class Paigutaja:
+    """Reamurdmine sõnade laiuste ja valmis paigutuste vahemäluga."""
+
+    def __init__(self, maht: int = 256):
+        self.maht = maht  # mitu murtud teksti meelde jätta
+        self._laiused: dict[pygame.font.Font, dict[str, int]] = {}
+        self._read: OrderedDict[tuple, tuple[str, ...]] = OrderedDict()
+
+    def laius(self, font: pygame.font.Font, tekst: str) -> int:
+        laiused = self._laiused.setdefault(font, {})
+        w = laiused.get(tekst)
+        if w is None:
+            w = laiused[tekst] = font.size(tekst)[0]
+        return w
+
+    def murra(self, font: pygame.font.Font, tekst: str, max_laius: int) -> tuple[str, ...]:
+        võti = (font, tekst, max_laius)
+        read = self._read.get(võti)
+        if read is not None:
+            self._read.move_to_end(võti)
+            return read
+
+        read = tuple(self._murra(font, tekst, max_laius))
+        self._read[võti] = read
+        if len(self._read) > self.maht:
+            self._read.popitem(last=False)
+        return read
+
+    def _murra(self, font: pygame.font.Font, tekst: str, max_laius: int) -> list[str]:
+        if not tekst.strip():
+            return []
+        tühik = self.laius(font, " ")
+        read: list[str] = []
+        for lõik in tekst.split("\n"):
+            rida: list[str] = []
+            laius = 0
+            for sõna in lõik.split(" "):
+                if not sõna:
+                    continue
+                w = self.laius(font, sõna)
+                if w > max_laius:
+                    # pikk sõna eraldi ridadele; viimane tükk jätkab rida
+                    if rida:
+                        read.append(" ".join(rida))
+                    tükid = self._tükelda(font, sõna, max_laius)
+                    read.extend(tükid[:-1])
+                    rida, laius = [tükid[-1]], self.laius(font, tükid[-1])
+                elif not rida:
+                    rida, laius = [sõna], w
+                elif laius + tühik + w <= max_laius:
+                    rida.append(sõna)
+                    laius += tühik + w
+                else:
+                    read.append(" ".join(rida))
+                    rida, laius = [sõna], w
+            read.append(" ".join(rida))
+        return read
+
+    def _tükelda(self, font: pygame.font.Font, sõna: str, max_laius: int) -> list[str]:
+        tükid = []
+        while sõna:
+            # kõige pikem algus, mis mahub (vähemalt üks täht)
+            lo, hi = 1, len(sõna)
+            while lo < hi:
+                m = (lo + hi + 1) // 2
+                if font.size(sõna[:m])[0] <= max_laius:
+                    lo = m
+                else:
+                    hi = m - 1
+            tükid.append(sõna[:lo])
+            sõna = sõna[lo:]
+        return tükid
+
+    def tühjenda(self) -> None:
+        self._laiused.clear()
+        self._read.clear()
+
+
+def koodi_tükid(rida: str) -> list[tuple[str, str]]:
+    """Rea jagamine (liik, tekst) tükkideks esiletõstu jaoks."""
+    tükid: list[tuple[str, str]] = []
+    algus = 0
+    for m in _MUSTER.finditer(rida):
+        if m.start() > algus:
+            tükid.append(("tavaline", rida[algus:m.start()]))
+        liik = m.lastgroup
+        if liik == "nimi":
+            nimi = m.group()
+            liik = "võtmesõna" if keyword.iskeyword(nimi) else "sisseehitatud" if nimi in _SISSEEHITATUD else "tavaline"
+        tükid.append((liik, m.group()))
+        algus = m.end()
+    if algus < len(rida):
+        tükid.append(("tavaline", rida[algus:]))
+    return tükid
+
+
+def koodipind(font: pygame.font.Font, kood: str, reavahe: int = 20) -> pygame.Surface:
+    """Kogu kood ühe (vajadusel väga kõrge) pinnana."""
+    read = kood.expandtabs(4).split("\n")
+    laius = max([font.size(r)[0] for r in read] + [1])
+    pind = pygame.Surface((laius, max(1, len(read) * reavahe)))
+    pind.fill(KOODI_TAUST)
+    for i, rida in enumerate(read):
+        x = 0
+        for liik, tekst in koodi_tükid(rida):
+            pind.blit(font.render(tekst, True, KOODI_VÄRVID[liik], KOODI_TAUST), (x, i * reavahe))
+            x += font.size(tekst)[0]
+    return pind
+
+
+class Kerimisala:
+    """Pinna nähtav osa. Kerimine muudab ainult nihet, vaade on subsurface."""
+
+    def __init__(self, pind: pygame.Surface, suurus: tuple[int, int]):
+        self.pind = pind
+        self.laius, self.kõrgus = suurus
+        self.x = 0
+        self.y = 0
+
+    @property
+    def max_x(self) -> int:
+        return max(0, self.pind.get_width() - self.laius)
+
+    @property
+    def max_y(self) -> int:
+        return max(0, self.pind.get_height() - self.kõrgus)
+
+    def keri(self, dx: int, dy: int) -> bool:
+        """Nihutab vaadet; tagastab, kas nihe muutus."""
+        uus = (min(max(0, self.x + dx), self.max_x), min(max(0, self.y + dy), self.max_y))
+        muutus = uus != (self.x, self.y)
+        self.x, self.y = uus
+        return muutus
+
+    def vaade(self) -> pygame.Surface:
+        w = min(self.laius, self.pind.get_width() - self.x)
+        h = min(self.kõrgus, self.pind.get_height() - self.y)
+        return self.pind.subsurface(pygame.Rect(self.x, self.y, w, h))
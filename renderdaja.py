@@ -0,0 +1,72 @@
+"""
+SDL2 renderdaja – valikuline esitusviis (python game.py --renderdaja sdl2)
+
+ - aken on SCALED režiimis: mäng joonistab alati loogilisse 800x600 ruumi, SDL skaleerib
+   selle aknasse või täisekraanile (kuvasuhe säilib) ja teisendab hiire koordinaadid
+   tagasi loogilisteks, nii et UKSE_RECT, paneelid jms jäävad samaks
+ - vsync, kui draiver seda lubab
+ - taust ja objektide pildid laetakse üks kord tekstuurideks ja joonistatakse renderdajaga
+ - kõik ülejäänu (ülariba, paneelid, teated, X) joonistatakse nagu enne, aga läbipaistvale
+   pinnale (kiht), millest kopeeritakse tekstuuri ainult muutunud alad
+
+Kui kiirendatud renderdajat pole (nt masinas pole GPU-d), valib SDL ise tarkvararenderdaja;
+"sdl2-tarkvara" sunnib seda kohe.
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+import pygame
+from pygame._sdl2 import video
+
+SEGAMINE = 1  # SDL_BLENDMODE_BLEND
+
+
+class Renderdaja:
+    def __init__(self, suurus: tuple[int, int], tarkvara: bool = False):
+        if tarkvara:
+            os.environ["SDL_RENDER_DRIVER"] = "software"
+        try:
+            pygame.display.set_mode(suurus, pygame.SCALED | pygame.RESIZABLE, vsync=1)
+        except pygame.error:
+            pygame.display.set_mode(suurus, pygame.SCALED | pygame.RESIZABLE)  # vsync pole toetatud
+        self.aken = video.Window.from_display_module()
+        self.renderer = video.Renderer.from_window(self.aken)
+        self.renderer.logical_size = suurus
+
+        self.kiht = pygame.Surface(suurus, pygame.SRCALPHA)
+        self._kihi_tekstuur = video.Texture(self.renderer, suurus, streaming=True)
+        self._kihi_tekstuur.blend_mode = SEGAMINE
+        self._tekstuurid: dict[pygame.Surface, video.Texture] = {}
+
+    def tekstuur(self, pind: pygame.Surface) -> video.Texture:
+        """Pinna tekstuur; luuakse esimesel korral, pinda hiljem ei muudeta."""
+        tekstuur = self._tekstuurid.get(pind)
+        if tekstuur is None:
+            tekstuur = self._tekstuurid[pind] = video.Texture.from_surface(self.renderer, pind)
+        return tekstuur
+
+    def unusta(self) -> None:
+        """Vabastab piltide tekstuurid (nt toa vahetumisel)."""
+        self._tekstuurid.clear()
+
+    def uuenda(self, alad: Optional[list[pygame.Rect]] = None) -> None:
+        """Kopeerib kihi muutunud alad (None = kogu kiht) tekstuuri."""
+        if alad is None:
+            self._kihi_tekstuur.update(self.kiht)
+            return
+        piir = self.kiht.get_rect()
+        for ala in alad:
+            ala = ala.clip(piir)
+            if ala.width and ala.height:
+                self._kihi_tekstuur.update(self.kiht.subsurface(ala), area=ala)
+
+    def esita(self, pildid: list[tuple[pygame.Surface, pygame.Rect]]) -> None:
+        """Joonistab pildid (taust, objektid) tekstuuridena, kihi nende peale ja näitab kaadrit."""
+        self.renderer.clear()
+        for pind, rect in pildid:
+            self.tekstuur(pind).draw(dstrect=rect)
+        self._kihi_tekstuur.draw()
+        self.renderer.present()
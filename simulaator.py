@@ -0,0 +1,218 @@
+"""
+Simulaator – palju läbimänge korraga (NumPy), et häälestada MAKS_VEAD, küsimuste järjekorda ja valikute arvu
+
+Mudel (samad reeglid nagu mangureeglid.Mänguseis):
+ - küsimused lahendatakse järjest; iga vastus on õige tõenäosusega p (küsimuse kaupa),
+   vale vastuse korral jääb küsimus lahti ja mängija vastab uuesti
+ - iga vale vastus on viga; MAKS_VEAD vea juures on mäng kaotatud
+ - kui kõik on lahendatud, sisestatakse uksekood (õige tõenäosusega p_kood, vale kood on viga)
+
+Ühe küsimuse valede vastuste arv on geomeetrilise jaotusega, seega saab N läbimängu
+arvutada N x küsimused massiivina: kumulatiivne vigade summa näitab, kus (kas üldse)
+vead täis said. Tulemuseks on võiduprotsent ning kasutatud vigade ja alustatud küsimuste jaotus.
+
+Tõenäosused: --teadmine K tähendab, et mängija teab vastust tõenäosusega K ja muidu
+arvab (1/valikute arv); --tõenäosused fail.json ({objekt: p}) annab need küsimuse kaupa.
+--kontrolli võrdleb tulemust Mänguseis-iga ükshaaval läbi mängitud mängudega.
+
+Kasutamine:
+ - python simulaator.py --mänge 1000000
+ - python simulaator.py --pühi maks_vead=2,3,4,5 teadmine=0.5,0.7,0.9 --protsessid 4
+"""
+
+from __future__ import annotations
+
+import argparse
+import itertools
+import json
+import random
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional
+
+import numpy as np
+
+import kysimustepank
+from mangureeglid import MAKS_VEAD, Mänguseis
+
+TÜKK = 1_000_000  # mitu mängu korraga mällu
+
+
+def tõenäosused(küsimused: list[kysimustepank.küsimus], teadmine: float,
+                valikuid: Optional[int] = None, erandid: Optional[dict[str, float]] = None) -> np.ndarray:
+    """Iga küsimuse õige vastuse tõenäosus: teab (teadmine) või arvab ühe valikutest."""
+    p = []
+    for k in küsimused:
+        n = valikuid or max(1, len(k.valikud))
+        p.append(teadmine + (1 - teadmine) / n)
+    if erandid:
+        p = [erandid.get(k.objekt, pk) for k, pk in zip(küsimused, p)]
+    return np.clip(np.array(p, dtype=np.float64), 1e-9, 1.0)
+
+
+def simuleeri(p: np.ndarray, maks_vead: int = MAKS_VEAD, p_kood: float = 1.0, mänge: int = 1_000_000,
+              seeme: Optional[int] = None) -> dict:
+    """N läbimängu; tagastab võidu osakaalu ja jaotused (vigu 0..maks_vead, alustatud küsimusi 0..Q)."""
+    rng = np.random.default_rng(seeme)
+    q = len(p)
+    tõenäosused_ = np.append(p, min(max(p_kood, 1e-9), 1.0))  # viimane "küsimus" on uksekood
+    võite = 0
+    vigu = np.zeros(maks_vead + 1, dtype=np.int64)
+    alustatud = np.zeros(q + 1, dtype=np.int64)
+
+    jäänud = mänge
+    while jäänud > 0:
+        n = min(TÜKK, jäänud)
+        jäänud -= n
+        # valede vastuste arv enne õiget, iga mängu ja küsimuse kohta
+        valed = rng.geometric(tõenäosused_, size=(n, q + 1)) - 1
+        kokku = np.cumsum(valed, axis=1, dtype=np.int32)
+        täis = kokku >= maks_vead
+        kaotus = täis[:, -1]
+        # kaotuse korral: küsimus, mille juures vead täis said (uksekoodi juures on kõik q alustatud)
+        kus = np.where(kaotus, np.argmax(täis, axis=1), q)
+        võite += int(n - kaotus.sum())
+        vigu += np.bincount(np.minimum(kokku[:, -1], maks_vead), minlength=maks_vead + 1)
+        alustatud += np.bincount(np.minimum(kus + 1, q), minlength=q + 1)
+
+    return {
+        "mänge": mänge,
+        "võit": võite / mänge,
+        "vigu": (vigu / mänge).tolist(),
+        "alustatud": (alustatud / mänge).tolist(),
+    }
+
+
+def mängi_läbi(küsimused: list[kysimustepank.küsimus], p: list[float], maks_vead: int, p_kood: float,
+               rnd: random.Random) -> tuple[bool, int, int]:
+    """Üks mäng mangureeglid.Mänguseis-iga (võrdluseks): (võit, vigu, alustatud küsimusi)."""
+    mäng = Mänguseis(küsimused, maks_vead=maks_vead)
+    alustatud = 0
+    for i, k in enumerate(küsimused):
+        if mäng.olek == "kaotus":
+            break
+        mäng.ava_küsimus(i)
+        alustatud += 1
+        while mäng.olek == "küsimus":
+            õige = rnd.random() < p[i]
+            mäng.vasta(k.oige_vastus if õige else k.oige_vastus + 1)
+    while mäng.olek not in ("võit", "kaotus"):
+        mäng.ava_uks()
+        for täht in (mäng.oodatav_kood if rnd.random() < p_kood else "?"):
+            mäng.sisesta(täht)
+        mäng.kinnita_kood()
+    return mäng.olek == "võit", mäng.vead, alustatud
+
+
+def kontrolli(küsimused: list[kysimustepank.küsimus], p: np.ndarray, maks_vead: int, p_kood: float,
+              mänge: int = 20_000) -> tuple[float, float]:
+    """Võidu osakaal Mänguseis-iga ja simulaatoriga (peaksid statistiliselt klappima)."""
+    rnd = random.Random(1)
+    võite = sum(mängi_läbi(küsimused, p.tolist(), maks_vead, p_kood, rnd)[0] for _ in range(mänge))
+    return võite / mänge, simuleeri(p, maks_vead, p_kood, mänge * 10, seeme=1)["võit"]
+
+
+def _pühkimise_töö(töö: tuple) -> dict:
+    alus, parameetrid, mänge, seeme = töö
+    seaded = dict(alus, **parameetrid)
+    p = tõenäosused_ja_valikud(seaded)
+    tulemus = simuleeri(p, seaded["maks_vead"], seaded["p_kood"], mänge, seeme)
+    return dict(parameetrid, **tulemus)
+
+
+def tõenäosused_ja_valikud(seaded: dict) -> np.ndarray:
+    """Pühkimise jaoks sama mis tõenäosused(): teadmine ja valikud (või küsimuse valikute arv),
+    küsimuse kaupa antud tõenäosused (erandid, None = pole) jäävad ette."""
+    k = seaded["teadmine"]
+    p = [e if e is not None else k + (1 - k) / (seaded["valikud"] or n)
+         for n, e in zip(seaded["küsimuste_valikud"], seaded["erandid"])]
+    return np.clip(np.array(p, dtype=np.float64), 1e-9, 1.0)
+
+
+def pühi(alus: dict, ruudustik: dict[str, list[float]], mänge: int, protsessid: Optional[int]) -> list[dict]:
+    """Kõik parameetrite kombinatsioonid protsesside kogumis (igaühel oma juhuarvude jada).
+
+    alus on käsurea seaded (teadmine, valikud, maks_vead, p_kood, küsimuste_valikud,
+    erandid); kombinatsioon asendab neist ainult pühitavad.
+    """
+    nimed = list(ruudustik)
+    kombinatsioonid = [dict(zip(nimed, v)) for v in itertools.product(*ruudustik.values())]
+    for k in kombinatsioonid:
+        for nimi in ("maks_vead", "valikud"):
+            if nimi in k:
+                k[nimi] = int(k[nimi])
+    seemned = np.random.SeedSequence(12345).generate_state(len(kombinatsioonid)).tolist()
+    tööd = [(alus, k, mänge, s) for k, s in zip(kombinatsioonid, seemned)]
+    with ProcessPoolExecutor(max_workers=protsessid) as kogum:
+        return list(kogum.map(_pühkimise_töö, tööd))
+
+
+def _jaotus(osakaalud: list[float]) -> str:
+    return " ".join(f"{i}:{o:.1%}" for i, o in enumerate(osakaalud) if o >= 0.0005)
+
+
+def main(argumendid: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Mängu tasakaalu simulaator.")
+    parser.add_argument("--küsimused", default="küsimused.json")
+    parser.add_argument("--mänge", type=int, default=1_000_000)
+    parser.add_argument("--maks-vead", type=int, default=MAKS_VEAD)
+    parser.add_argument("--teadmine", type=float, default=0.7, help="tõenäosus, et mängija teab vastust")
+    parser.add_argument("--valikud", type=int, help="valikute arv (vaikimisi küsimustepangast)")
+    parser.add_argument("--tõenäosused", help="JSON {objekt: p} küsimuste kaupa")
+    parser.add_argument("--p-kood", type=float, default=1.0, help="tõenäosus, et uksekood sisestatakse õigesti")
+    parser.add_argument("--seeme", type=int)
+    parser.add_argument("--pühi", nargs="+", metavar="NIMI=V1,V2",
+                        help="parameetrite ruudustik: maks_vead, teadmine, valikud, p_kood")
+    parser.add_argument("--protsessid", type=int, help="pühkimise protsesside arv (vaikimisi kõik tuumad)")
+    parser.add_argument("--kontrolli", action="store_true", help="võrdle Mänguseis-iga läbi mängitud mängudega")
+    parser.add_argument("--json", help="kirjuta tulemus JSON-faili")
+    arg = parser.parse_args(argumendid)
+
+    küsimused = kysimustepank.loe(arg.küsimused)
+    erandid = None
+    if arg.tõenäosused:
+        with open(arg.tõenäosused, "r", encoding="utf-8") as f:
+            erandid = {k: float(v) for k, v in json.load(f).items()}
+    p = tõenäosused(küsimused, arg.teadmine, arg.valikud, erandid)
+
+    if arg.kontrolli:
+        reeglid, sim = kontrolli(küsimused, p, arg.maks_vead, arg.p_kood)
+        print(f"võit: Mänguseis {reeglid:.2%}, simulaator {sim:.2%}")
+        return 0 if abs(reeglid - sim) < 0.02 else 1
+
+    algus = time.perf_counter()
+    if arg.pühi:
+        ruudustik = {}
+        for osa in arg.pühi:
+            nimi, väärtused = osa.split("=", 1)
+            ruudustik[nimi] = [float(v) for v in väärtused.split(",")]
+        alus = {
+            "teadmine": arg.teadmine,
+            "valikud": arg.valikud,
+            "maks_vead": arg.maks_vead,
+            "p_kood": arg.p_kood,
+            "küsimuste_valikud": [max(1, len(k.valikud)) for k in küsimused],
+            "erandid": [(erandid or {}).get(k.objekt) for k in küsimused],
+        }
+        tulemused = pühi(alus, ruudustik, arg.mänge, arg.protsessid)
+        for t in tulemused:
+            seaded = " ".join(f"{n}={t[n]}" for n in ruudustik)
+            print(f"{seaded:<40} võit {t['võit']:.2%}  vigu {_jaotus(t['vigu'])}")
+    else:
+        tulemused = [simuleeri(p, arg.maks_vead, arg.p_kood, arg.mänge, arg.seeme)]
+        t = tulemused[0]
+        print(f"{t['mänge']} mängu, {len(küsimused)} küsimust, MAKS_VEAD={arg.maks_vead}")
+        print(f"võit: {t['võit']:.2%}")
+        print(f"kasutatud vigu: {_jaotus(t['vigu'])}")
+        print(f"alustatud küsimusi: {_jaotus(t['alustatud'])}")
+    print(f"aega: {time.perf_counter() - algus:.2f} s")
+
+    if arg.json:
+        with open(arg.json, "w", encoding="utf-8") as f:
+            json.dump(tulemused, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,257 @@
+"""
+Sisendlogi – mängu sisendi salvestamine ja täpne taasesitus
+
+Lindistamine: python game.py --lindista sessioon.sisend
+Taasesitus:   python sisendlogi.py sessioon.sisend [--kontrolli]
+
+Faili ülesehitus:
+ - MAAGIA (8 baiti), päise pikkus (4 baiti, little-endian), päis JSON-ina
+   (versioon, küsimuste fail, mängija, salvestus, millega mäng algas, ja küsimuste
+   variantide seeme, vt mallid.py)
+ - kirjed: kaader (4 baiti), aeg ms mängu algusest (4 baiti), liik (1 bait) + liigi andmed;
+   VARIANDID-kirje ütleb, mitu valmis varianti malliga küsimuse avamisel võeti (vt mallid.py)
+ - viimane kirje on LÕPP, millele järgneb lõppseis JSON-ina (olek, vead, lahendatud, tuba)
+
+Salvestatakse ainult sündmused, mida mäng kasutab. Hiire liikumistest jäetakse kaadri
+kohta alles ainult viimane (vahepealsed ei mõjuta midagi).
+
+Taasesitusel antakse sündmused mängule samades kaadrites tagasi ja mängu kell on
+virtuaalne (kaadri salvestatud aeg), seega ei oota taasesitus midagi ja töötab ilma
+aknata nii kiiresti kui suudab. Salvestus algab samast seisust ajutises failis.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import struct
+import sys
+import tempfile
+import time
+from typing import BinaryIO, Callable, Optional
+
+import pygame
+
+MAAGIA = b"SISEND1\n"
+VERSIOON = 2  # 1: ilma VARIANDID-kirjeteta (siis mallidega küsimusi polnud)
+
+KIRJE = struct.Struct("<IIB")  # kaader, aeg_ms, liik
+HIIR = struct.Struct("<hh")  # x, y
+NUPP = struct.Struct("<Bhh")  # nupp, x, y
+KLAHV = struct.Struct("<iHB")  # klahv, modifikaatorid, unicode baitide arv
+RULL = struct.Struct("<hh")  # x, y sammudes
+ARV = struct.Struct("<H")
+
+LIIKUMINE, KLIKK, KLAHV_ALLA, SULGE, NÄHTAV, SUURUS, LÕPP, KERIMINE, VARIANDID = range(1, 10)
+
+
+def _kodeeri(ev: pygame.event.Event) -> Optional[bytes]:
+    if ev.type == pygame.MOUSEMOTION:
+        return bytes([LIIKUMINE]) + HIIR.pack(*ev.pos)
+    if ev.type == pygame.MOUSEBUTTONDOWN:
+        return bytes([KLIKK]) + NUPP.pack(ev.button, *ev.pos)
+    if ev.type == pygame.KEYDOWN:
+        tekst = ev.unicode.encode("utf-8")
+        return bytes([KLAHV_ALLA]) + KLAHV.pack(ev.key, ev.mod & 0xFFFF, len(tekst)) + tekst
+    if ev.type == pygame.MOUSEWHEEL:
+        return bytes([KERIMINE]) + RULL.pack(ev.x, ev.y)
+    if ev.type == pygame.QUIT:
+        return bytes([SULGE])
+    if ev.type in (pygame.VIDEOEXPOSE, pygame.WINDOWEXPOSED):
+        return bytes([NÄHTAV])
+    if ev.type in (pygame.VIDEORESIZE, pygame.WINDOWSIZECHANGED):
+        return bytes([SUURUS])
+    return None
+
+
+def _loe_sündmus(f: BinaryIO, liik: int) -> pygame.event.Event:
+    if liik == LIIKUMINE:
+        x, y = HIIR.unpack(f.read(HIIR.size))
+        return pygame.event.Event(pygame.MOUSEMOTION, pos=(x, y), rel=(0, 0), buttons=(0, 0, 0))
+    if liik == KLIKK:
+        nupp, x, y = NUPP.unpack(f.read(NUPP.size))
+        return pygame.event.Event(pygame.MOUSEBUTTONDOWN, button=nupp, pos=(x, y))
+    if liik == KLAHV_ALLA:
+        klahv, mod, pikkus = KLAHV.unpack(f.read(KLAHV.size))
+        return pygame.event.Event(pygame.KEYDOWN, key=klahv, mod=mod, unicode=f.read(pikkus).decode("utf-8"))
+    if liik == KERIMINE:
+        x, y = RULL.unpack(f.read(RULL.size))
+        return pygame.event.Event(pygame.MOUSEWHEEL, x=x, y=y, flipped=False)
+    if liik == SULGE:
+        return pygame.event.Event(pygame.QUIT)
+    if liik == NÄHTAV:
+        return pygame.event.Event(pygame.WINDOWEXPOSED)
+    if liik == SUURUS:
+        return pygame.event.Event(pygame.WINDOWSIZECHANGED)
+    raise ValueError(f"tundmatu kirje liik {liik}")
+
+
+class Lindistaja:
+    """Kirjutab iga kaadri sündmused logisse (game.main(sündmuste_kuulaja=..., väljumisel=...))."""
+
+    def __init__(self, tee: str, algus: dict, küsimuste_fail: Optional[str] = None,
+                 aeg: Callable[[], int] = pygame.time.get_ticks, mängija: str = "", seeme: Optional[int] = None):
+        self.tee = tee
+        self._aeg = aeg
+        self._algusaeg: Optional[int] = None
+        self.kaader = 0
+        self._f = open(tee, "wb")
+        päis = json.dumps({"versioon": VERSIOON, "küsimuste_fail": küsimuste_fail, "mängija": mängija,
+                           "algus": algus, "seeme": seeme}, ensure_ascii=False).encode("utf-8")
+        self._f.write(MAAGIA + struct.pack("<I", len(päis)) + päis)
+
+    def _ms(self) -> int:
+        praegu = self._aeg()
+        if self._algusaeg is None:
+            self._algusaeg = praegu
+        return praegu - self._algusaeg
+
+    def __call__(self, sündmused: list[pygame.event.Event]) -> None:
+        ms = self._ms()
+        viimane_liikumine = max((i for i, ev in enumerate(sündmused) if ev.type == pygame.MOUSEMOTION), default=-1)
+        for i, ev in enumerate(sündmused):
+            if ev.type == pygame.MOUSEMOTION and i != viimane_liikumine:
+                continue
+            kirje = _kodeeri(ev)
+            if kirje is not None:
+                self._f.write(KIRJE.pack(self.kaader, ms, kirje[0]) + kirje[1:])
+        self.kaader += 1
+
+    def variandid(self, arv: int) -> None:
+        """game.main(variantide_kuulaja=...): mitu varianti malliga küsimuse avamisel võeti."""
+        self._f.write(KIRJE.pack(self.kaader, self._ms(), VARIANDID) + ARV.pack(arv))
+
+    def sulge(self, seis: dict) -> None:
+        if self._f.closed:
+            return
+        lõpp = json.dumps(seis, ensure_ascii=False).encode("utf-8")
+        self._f.write(KIRJE.pack(self.kaader, self._ms(), LÕPP) + struct.pack("<I", len(lõpp)) + lõpp)
+        self._f.close()
+
+
+class Logi:
+    """Loetud logi: päis, sündmused kaadrite kaupa ja (kui mäng suleti korralikult) lõppseis."""
+
+    def __init__(self, tee: str):
+        with open(tee, "rb") as f:
+            if f.read(len(MAAGIA)) != MAAGIA:
+                raise ValueError(f"'{tee}' ei ole sisendlogi")
+            (pikkus,) = struct.unpack("<I", f.read(4))
+            self.päis: dict = json.loads(f.read(pikkus).decode("utf-8"))
+            if self.päis.get("versioon") not in (1, VERSIOON):
+                raise ValueError(f"'{tee}' on tundmatu versiooniga")
+
+            self.kaadrid: dict[int, list[pygame.event.Event]] = {}
+            self.ajad: dict[int, int] = {}
+            self.lõppseis: Optional[dict] = None
+            self.variandid: list[int] = []
+            self.viimane_kaader = 0
+            while True:
+                toores = f.read(KIRJE.size)
+                if len(toores) < KIRJE.size:
+                    break  # mäng katkes, lõpukirjet pole
+                kaader, ms, liik = KIRJE.unpack(toores)
+                if liik == VARIANDID:  # ei ole sündmus, kaadri aega ei muuda
+                    toores = f.read(ARV.size)
+                    if len(toores) < ARV.size:
+                        break
+                    self.variandid.extend(ARV.unpack(toores))
+                    continue
+                self.ajad[kaader] = ms
+                self.viimane_kaader = kaader
+                if liik == LÕPP:
+                    (pikkus,) = struct.unpack("<I", f.read(4))
+                    self.lõppseis = json.loads(f.read(pikkus).decode("utf-8"))
+                    break
+                try:
+                    ev = _loe_sündmus(f, liik)
+                except (struct.error, UnicodeDecodeError):
+                    break  # poolik viimane kirje
+                self.kaadrid.setdefault(kaader, []).append(ev)
+
+    @property
+    def kestus_ms(self) -> int:
+        return self.ajad.get(self.viimane_kaader, 0)
+
+
+class Taasesitus:
+    """Sündmuste allikas ja virtuaalne kell game.main() jaoks.
+
+    Pärast logi lõppu saadab QUIT, et mäng lõpetaks ka siis, kui logi jäi pooleli.
+    """
+
+    def __init__(self, logi: Logi):
+        self.logi = logi
+        self.kaader = 0
+        self._ms = 0
+
+    def aeg(self) -> int:
+        return self._ms
+
+    def sündmused(self) -> list[pygame.event.Event]:
+        kaader = self.kaader
+        self.kaader += 1
+        self._ms = self.logi.ajad.get(kaader, self._ms)
+        if kaader > self.logi.viimane_kaader:
+            return [pygame.event.Event(pygame.QUIT)]
+        return self.logi.kaadrid.get(kaader, [])
+
+
+def esita(tee: str) -> tuple[Logi, dict, float]:
+    """Mängib logi ilma aknata läbi. Tagastab logi, lõppseisu ja kulunud aja sekundites."""
+    os.environ["SDL_VIDEODRIVER"] = "dummy"
+    import game
+
+    logi = Logi(tee)
+    taasesitus = Taasesitus(logi)
+    seis: dict = {}
+
+    with tempfile.TemporaryDirectory() as kaust:
+        vana = game.PROGRESSI_FAIL, game.SALVESTUS_FAIL
+        game.PROGRESSI_FAIL = os.path.join(kaust, "progress.db")
+        game.SALVESTUS_FAIL = os.path.join(kaust, "salvestus.json")
+        if logi.päis.get("algus"):
+            # algseis vana salvestusena: mäng viib selle ise mängija profiili
+            with open(game.SALVESTUS_FAIL, "w", encoding="utf-8") as f:
+                json.dump(logi.päis["algus"], f, ensure_ascii=False)
+        algus = time.perf_counter()
+        try:
+            game.main(logi.päis.get("küsimuste_fail"), fps=0, sündmuste_allikas=taasesitus.sündmused,
+                      aeg=taasesitus.aeg, väljumisel=seis.update, nimi=logi.päis.get("mängija", ""),
+                      seeme=logi.päis.get("seeme"), variandid_logist=logi.variandid)
+        except SystemExit:
+            pass
+        finally:
+            game.PROGRESSI_FAIL, game.SALVESTUS_FAIL = vana
+        return logi, seis, time.perf_counter() - algus
+
+
+def taasesitus_kokkuvõte(logi: Logi, seis: dict) -> str:
+    sündmusi = sum(len(s) for s in logi.kaadrid.values())
+    return (f"{logi.viimane_kaader + 1} kaadrit, {sündmusi} sündmust, {logi.kestus_ms / 1000:.1f} s mängu; "
+            f"olek={seis.get('olek')} vead={seis.get('vead')} lahendatud={len(seis.get('lahendatud', []))}")
+
+
+def main(argumendid: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Mängib salvestatud sisendlogi ilma aknata läbi.")
+    parser.add_argument("logi", help="game.py --lindista abil tehtud fail")
+    parser.add_argument("--kontrolli", action="store_true",
+                        help="lõpeta koodiga 1, kui lõppseis erineb salvestatust")
+    arg = parser.parse_args(argumendid)
+
+    logi, seis, kulunud = esita(arg.logi)
+    kiirus = logi.kestus_ms / 1000 / kulunud if kulunud > 0 else 0.0
+    print(f"{taasesitus_kokkuvõte(logi, seis)}; {kulunud:.2f} s ({kiirus:.0f}x)")
+
+    if logi.lõppseis is None:
+        print("Logis pole lõppseisu (mäng katkes), kontrollida ei saa.")
+        return 1 if arg.kontrolli else 0
+    if seis != logi.lõppseis:
+        print(f"ERINEB: salvestatud {logi.lõppseis}, taasesitus {seis}")
+        return 1 if arg.kontrolli else 0
+    print("Lõppseis klapib.")
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
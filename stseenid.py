@@ -0,0 +1,122 @@
+"""
+Stseenid – mitu tuba järjest (toad.json) ja järgmise toa eellaadimine taustalõimes
+
+toad.json on nimekiri tubadest, nt:
+  [
+    {"nimi": "klassiruum", "taust": "pildid/background.png",
+     "küsimused": "küsimused.json", "uks": [690, 145, 90, 330], "komplekt": "varad.bin"},
+    {"nimi": "raamatukogu", "taust": "pildid/raamatukogu.png",
+     "küsimused": "raamatukogu.json", "uks": [20, 150, 90, 320]}
+  ]
+
+Stseenihaldur laeb toa kahes osas:
+ - dekodeeri(kirjeldus) – failid, piltide lahtipakkimine ja skaleerimine; töötab taustalõimes
+ - valmista(andmed) – see, mis vajab ekraani (convert jms); töötab alati põhilõimes
+Valmis toad on LRU vahemälus; kui nende hinnanguline maht ületab piiri, visatakse
+kõige kauem kasutamata toad välja (praegust ja eellaaditavat mitte).
+"""
+
+from __future__ import annotations
+
+import json
+import os
+from collections import OrderedDict
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Generic, TypeVar
+
+A = TypeVar("A")  # dekodeeritud andmed
+T = TypeVar("T")  # valmis tuba
+
+
+@dataclass(frozen=True)
+class ToaKirjeldus:
+    nimi: str
+    taust: str
+    küsimused: str
+    uks: tuple[int, int, int, int]
+    komplekt: str  # toa varade komplekt (vt varad.py)
+
+
+def loe_toad(failitee: str) -> list[ToaKirjeldus]:
+    with open(failitee, "r", encoding="utf-8") as f:
+        andmed = json.load(f)
+    toad = []
+    for r in andmed:
+        toad.append(ToaKirjeldus(
+            nimi=r["nimi"],
+            taust=r["taust"],
+            küsimused=r["küsimused"],
+            uks=tuple(int(v) for v in r["uks"]),
+            komplekt=r.get("komplekt", f"varad_{r['nimi']}.bin"),
+        ))
+    if not toad:
+        raise ValueError(f"'{failitee}' ei sisalda ühtegi tuba")
+    return toad
+
+
+class Stseenihaldur(Generic[A, T]):
+    def __init__(
+        self,
+        toad: list[ToaKirjeldus],
+        dekodeeri: Callable[[ToaKirjeldus], A],
+        valmista: Callable[[A], T],
+        suurus: Callable[[T], int],
+        maks_baite: int,
+    ):
+        self.toad = toad
+        self._dekodeeri = dekodeeri
+        self._valmista = valmista
+        self._suurus = suurus
+        self.maks_baite = maks_baite
+        self._valmis: OrderedDict[int, T] = OrderedDict()
+        self._laadimisel: dict[int, Future] = {}
+        self._töötaja = ThreadPoolExecutor(max_workers=1, thread_name_prefix="eellaadija")
+        self.praegune = -1
+
+    def eellae(self, nr: int) -> None:
+        """Alustab toa nr laadimist taustal (kui see pole juba valmis või laadimisel)."""
+        if not 0 <= nr < len(self.toad) or nr in self._valmis or nr in self._laadimisel:
+            return
+        self._laadimisel[nr] = self._töötaja.submit(self._dekodeeri, self.toad[nr])
+
+    def hangi(self, nr: int) -> T:
+        """Tuba nr valmis kujul. Kui eellaadimine pole lõppenud, ootab selle ära."""
+        if nr in self._valmis:
+            self._valmis.move_to_end(nr)
+        else:
+            töö = self._laadimisel.pop(nr, None)
+            andmed = töö.result() if töö is not None else self._dekodeeri(self.toad[nr])
+            self._valmis[nr] = self._valmista(andmed)
+        self.praegune = nr
+        self._kärbi()
+        return self._valmis[nr]
+
+    def lõpeta_valmis(self) -> None:
+        """Kutsuda põhilõimes (nt iga kaadri lõpus): valmistab taustal dekodeeritud toad ette."""
+        for nr, töö in list(self._laadimisel.items()):
+            if töö.done():
+                del self._laadimisel[nr]
+                self._valmis[nr] = self._valmista(töö.result())
+                self._valmis.move_to_end(nr, last=False)  # pole veel kasutatud
+                self._kärbi()
+
+    def maht(self) -> int:
+        return sum(self._suurus(t) for t in self._valmis.values())
+
+    def _kärbi(self) -> None:
+        kaitstud = {self.praegune, self.praegune + 1}
+        for nr in list(self._valmis):
+            if self.maht() <= self.maks_baite:
+                break
+            if nr not in kaitstud:
+                del self._valmis[nr]
+
+    def sulge(self) -> None:
+        self._töötaja.shutdown(wait=False, cancel_futures=True)
+
+
+def vaiketoad(taust: str, küsimused: str, uks: tuple[int, int, int, int], komplekt: str) -> list[ToaKirjeldus]:
+    """Üks tuba – nii nagu mäng oli enne toad.json faili."""
+    nimi = os.path.splitext(os.path.basename(küsimused))[0]
+    return [ToaKirjeldus(nimi=nimi, taust=taust, küsimused=küsimused, uks=uks, komplekt=komplekt)]
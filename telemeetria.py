@@ -0,0 +1,313 @@
+"""
+Telemeetria – vastuste logi küsimuste raskuse hindamiseks (valikuline)
+
+Kogumine: python game.py --telemeetria [KAUST]   (vaikimisi telemeetria/, üks fail sessiooni kohta)
+Kokkuvõte: python telemeetria.py telemeetria/ [--json tulemus.json] [--tõenäosused p.json]
+
+Faili ülesehitus:
+ - MAAGIA (8 baiti), päise pikkus (4 baiti, little-endian), päis JSON-ina
+   (versioon, küsimuste fail, algusaeg)
+ - kirjed, igaüks täpselt KIRJE.size (16) baiti: aeg ms sessiooni algusest, objekti id
+   (crc32 objekti nimest, lukul 0), kestus ms (küsimuse/luku avamisest), liik, valik
+   (EI_VALIKUT, kui pole), vigu pärast sündmust, tuba
+
+Mängutsükkel ainult pakib kirje eeljaotatud rõngaspuhvrisse (struct.pack_into, ühe
+sündmuse kohta mõni mikrosekund); faili kirjutab taustalõim, kui puhver on poolenisti
+täis või VÄLJASTUSE_INTERVALL möödus. Kui lõim ei jõua järele, jäetakse uued kirjed
+kirjutamata ja loendatakse (kadunud), mängu ei oodata kunagi.
+
+Kokkuvõte loeb kõik failid NumPy massiividesse ja annab küsimuste kaupa avamised,
+vastused, valede osakaalu, esimese katse õnnestumise, aja õige vastuseni, katkestamised
+ja kõige sagedasema vale valiku. Malliga küsimustel (vt mallid.py) on igal variandil
+oma valikud, seega nende vastustel valikut ei salvestata ja sagedasimat vale valikut
+pole (aruandes "mall"). --tõenäosused kirjutab õige vastuse tõenäosused
+kujul, mida simulaator.py --tõenäosused loeb.
+"""
+
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import struct
+import sys
+import threading
+import time
+import zlib
+from typing import Callable, Optional
+
+MAAGIA = b"TELEM1\n\x00"
+VERSIOON = 1
+
+KIRJE = struct.Struct("<IIIBBBB")  # aeg_ms, objekt, kestus_ms, liik, valik, vead, tuba
+AVATUD, VASTUS, VALE, SULETUD, LUKK_AVATUD, KOOD, VALE_KOOD, LUKK_SULETUD = range(1, 9)
+LIIGID = {AVATUD: "avatud", VASTUS: "vastus", VALE: "vale", SULETUD: "suletud",
+          LUKK_AVATUD: "lukk_avatud", KOOD: "kood", VALE_KOOD: "vale_kood", LUKK_SULETUD: "lukk_suletud"}
+EI_VALIKUT = 255
+
+PUHVRI_KIRJEID = 4096
+VÄLJASTUSE_INTERVALL = 2.0  # s
+
+
+def objekti_id(objekt: str) -> int:
+    return zlib.crc32(objekt.encode("utf-8"))
+
+
+def uus_logi(kaust: str = "telemeetria") -> str:
+    """Uue sessiooni faili tee kaustas (kaust luuakse)."""
+    os.makedirs(kaust, exist_ok=True)
+    return os.path.join(kaust, f"{time.strftime('%Y%m%d_%H%M%S')}_{os.getpid()}.tlm")
+
+
+class Telemeetria:
+    """Mängija tegevuste logi (game.main(telemeetria=...)); kõik meetodid on mängutsükli jaoks odavad."""
+
+    def __init__(self, tee: str, küsimuste_fail: Optional[str] = None,
+                 aeg: Callable[[], int] = lambda: int(time.monotonic() * 1000), maht: int = PUHVRI_KIRJEID):
+        self.tee = tee
+        self.aeg = aeg
+        self.maht = maht
+        self.kadunud = 0
+        self._algus: Optional[int] = None
+        self._avatud = 0  # küsimuse/luku avamise aeg
+        self._puhver = bytearray(maht * KIRJE.size)
+        self._kirjutatud = 0  # kirjeid puhvrisse kokku
+        self._väljastatud = 0  # neist faili
+        self._lõpeta = False
+        self._tingimus = threading.Condition()
+
+        self._f = open(tee, "wb")
+        päis = json.dumps({"versioon": VERSIOON, "küsimuste_fail": küsimuste_fail, "algus": time.time()},
+                          ensure_ascii=False).encode("utf-8")
+        self._f.write(MAAGIA + struct.pack("<I", len(päis)) + päis)
+        self._lõim = threading.Thread(target=self._töö, name="telemeetria", daemon=True)
+        self._lõim.start()
+
+    # --- mängutsüklist ---
+
+    def _kirje(self, liik: int, objekt: str, valik: Optional[int], vead: int, tuba: int, kestus: int = 0) -> None:
+        praegu = self.aeg()
+        if self._algus is None:
+            self._algus = praegu
+        with self._tingimus:
+            täidetud = self._kirjutatud - self._väljastatud
+            if täidetud >= self.maht:
+                self.kadunud += 1
+                return
+            KIRJE.pack_into(self._puhver, (self._kirjutatud % self.maht) * KIRJE.size,
+                            praegu - self._algus, objekti_id(objekt) if objekt else 0, max(0, kestus), liik,
+                            EI_VALIKUT if valik is None else valik, min(vead, 255), min(tuba, 255))
+            self._kirjutatud += 1
+            if täidetud + 1 == self.maht // 2:
+                self._tingimus.notify()
+
+    def avatud(self, objekt: str, vead: int, tuba: int) -> None:
+        self._avatud = self.aeg()
+        self._kirje(AVATUD, objekt, None, vead, tuba)
+
+    def vastus(self, objekt: str, valik: Optional[int], õige: bool, vead: int, tuba: int) -> None:
+        self._kirje(VASTUS if õige else VALE, objekt, valik, vead, tuba, self.aeg() - self._avatud)
+
+    def suletud(self, objekt: str, vead: int, tuba: int) -> None:
+        self._kirje(SULETUD, objekt, None, vead, tuba, self.aeg() - self._avatud)
+
+    def lukk_avatud(self, vead: int, tuba: int) -> None:
+        self._avatud = self.aeg()
+        self._kirje(LUKK_AVATUD, "", None, vead, tuba)
+
+    def kood(self, õige: bool, vead: int, tuba: int) -> None:
+        self._kirje(KOOD if õige else VALE_KOOD, "", None, vead, tuba, self.aeg() - self._avatud)
+
+    def lukk_suletud(self, vead: int, tuba: int) -> None:
+        self._kirje(LUKK_SULETUD, "", None, vead, tuba, self.aeg() - self._avatud)
+
+    # --- taustalõim ---
+
+    def _võta(self) -> bytes:
+        with self._tingimus:
+            algus, lõpp = self._väljastatud, self._kirjutatud
+            a, b = algus % self.maht * KIRJE.size, lõpp % self.maht * KIRJE.size
+            if lõpp - algus == 0:
+                andmed = b""
+            elif a < b:
+                andmed = bytes(self._puhver[a:b])
+            else:
+                andmed = bytes(self._puhver[a:]) + bytes(self._puhver[:b])
+            self._väljastatud = lõpp
+        return andmed
+
+    def _töö(self) -> None:
+        while True:
+            with self._tingimus:
+                if not self._lõpeta:
+                    self._tingimus.wait(VÄLJASTUSE_INTERVALL)
+                lõpeta = self._lõpeta
+            andmed = self._võta()
+            try:
+                if andmed:
+                    self._f.write(andmed)
+                    self._f.flush()
+            except OSError as e:
+                print(f"Hoiatus: telemeetria kirjutamine ebaõnnestus: {e}", file=sys.stderr)
+            if lõpeta:
+                self._f.close()
+                return
+
+    def sulge(self) -> None:
+        """Kirjutab puhvri lõpuni ja sulgeb faili (mängust väljumisel)."""
+        with self._tingimus:
+            if self._lõpeta:
+                return
+            self._lõpeta = True
+            self._tingimus.notify()
+        self._lõim.join()
+        if self.kadunud:
+            print(f"Hoiatus: telemeetria jättis {self.kadunud} kirjet kirjutamata", file=sys.stderr)
+
+
+# --- kokkuvõte ---
+
+def _failid(teed: list[str]) -> list[str]:
+    failid = []
+    for tee in teed:
+        if os.path.isdir(tee):
+            failid.extend(os.path.join(tee, n) for n in sorted(os.listdir(tee)) if n.endswith(".tlm"))
+        else:
+            failid.append(tee)
+    return failid
+
+
+def loe(teed: list[str]):
+    """Kõik kirjed ühes NumPy kirjemassiivis; väli "sessioon" on faili järjekorranumber."""
+    import numpy as np
+
+    tüüp = np.dtype([("ms", "<u4"), ("objekt", "<u4"), ("kestus", "<u4"), ("liik", "u1"),
+                     ("valik", "u1"), ("vead", "u1"), ("tuba", "u1")])
+    assert tüüp.itemsize == KIRJE.size
+    osad, sessioonid = [], []
+    for i, tee in enumerate(_failid(teed)):
+        with open(tee, "rb") as f:
+            andmed = f.read()
+        if not andmed.startswith(MAAGIA):
+            print(f"Hoiatus: '{tee}' ei ole telemeetria logi", file=sys.stderr)
+            continue
+        (pikkus,) = struct.unpack_from("<I", andmed, len(MAAGIA))
+        algus = len(MAAGIA) + 4 + pikkus
+        n = (len(andmed) - algus) // KIRJE.size  # poolik viimane kirje (mäng katkes) jääb välja
+        kirjed = np.frombuffer(andmed, dtype=tüüp, count=n, offset=algus)
+        osad.append(kirjed)
+        sessioonid.append(np.full(n, i, dtype=np.uint32))
+    if not osad:
+        return np.zeros(0, dtype=tüüp), np.zeros(0, dtype=np.uint32)
+    return np.concatenate(osad), np.concatenate(sessioonid)
+
+
+def objektide_nimed(küsimuste_failid: list[str]) -> dict[int, tuple[str, str, bool]]:
+    """objekti id -> (objekt, küsimuse nimi, kas küsimusel on mall) küsimuste failidest."""
+    import kysimustepank
+
+    nimed: dict[int, tuple[str, str, bool]] = {}
+    for fail in küsimuste_failid:
+        if not os.path.exists(fail):
+            continue
+        for k in kysimustepank.loe(fail):
+            nimed[objekti_id(k.objekt)] = (k.objekt, k.nimi, k.mall is not None)
+    return nimed
+
+
+def kokkuvõte(kirjed, sessioonid) -> dict:
+    """Küsimuste (ja luku) statistika kirjemassiivist."""
+    import numpy as np
+
+    liik = kirjed["liik"]
+    vastused = (liik == VASTUS) | (liik == VALE)
+
+    # esimene vastus iga (sessioon, objekt) kohta
+    v_obj, v_ses, v_ms = kirjed["objekt"][vastused], sessioonid[vastused], kirjed["ms"][vastused]
+    järjekord = np.lexsort((v_ms, v_obj, v_ses))
+    võti = v_ses[järjekord].astype(np.uint64) << np.uint64(32) | v_obj[järjekord]
+    _, esimesed = np.unique(võti, return_index=True)
+    esimene_õige = liik[vastused][järjekord][esimesed] == VASTUS
+    esimene_obj = v_obj[järjekord][esimesed]
+
+    küsimused = {}
+    for objekt in np.unique(kirjed["objekt"][kirjed["objekt"] != 0]):
+        oma = kirjed["objekt"] == objekt
+        õiged = oma & (liik == VASTUS)
+        valed = oma & (liik == VALE)
+        n_õige, n_vale = int(õiged.sum()), int(valed.sum())
+        esimesed_oma = esimene_õige[esimene_obj == objekt]
+        vale_valikud = kirjed["valik"][valed & (kirjed["valik"] != EI_VALIKUT)]
+        küsimused[int(objekt)] = {
+            "sessioone": int(len(np.unique(sessioonid[oma]))),
+            "avatud": int((oma & (liik == AVATUD)).sum()),
+            "vastuseid": n_õige + n_vale,
+            "vale_osakaal": n_vale / (n_õige + n_vale) if n_õige + n_vale else 0.0,
+            "esimene_õige": float(esimesed_oma.mean()) if len(esimesed_oma) else 0.0,
+            "mediaan_ms": int(np.median(kirjed["kestus"][õiged])) if n_õige else 0,
+            "katkestatud": int((oma & (liik == SULETUD)).sum()),
+            "sagedasim_vale": int(np.bincount(vale_valikud).argmax()) if len(vale_valikud) else None,
+        }
+
+    koodid = (liik == KOOD) | (liik == VALE_KOOD)
+    lukk = {
+        "katseid": int(koodid.sum()),
+        "vale_osakaal": float((liik == VALE_KOOD).sum() / koodid.sum()) if koodid.any() else 0.0,
+        "mediaan_ms": int(np.median(kirjed["kestus"][koodid])) if koodid.any() else 0,
+    }
+    return {"sessioone": int(len(np.unique(sessioonid))), "kirjeid": int(len(kirjed)),
+            "küsimused": küsimused, "lukk": lukk}
+
+
+def main(argumendid: Optional[list[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Telemeetria logide kokkuvõte küsimuste kaupa.")
+    parser.add_argument("logid", nargs="+", help="logifailid või kaustad (*.tlm)")
+    parser.add_argument("--küsimused", nargs="+", default=None,
+                        help="küsimuste failid objektide nimede jaoks (vaikimisi küsimused.json ja toad.json toad)")
+    parser.add_argument("--json", help="kirjuta kokkuvõte JSON-faili")
+    parser.add_argument("--tõenäosused", help="kirjuta {objekt: õige vastuse tõenäosus} simulaator.py jaoks")
+    arg = parser.parse_args(argumendid)
+
+    algus = time.perf_counter()
+    kirjed, sessioonid = loe(arg.logid)
+    tulemus = kokkuvõte(kirjed, sessioonid)
+    kulunud = time.perf_counter() - algus
+
+    failid = arg.küsimused
+    if failid is None:
+        import stseenid
+
+        failid = ["küsimused.json"]
+        if os.path.exists("toad.json"):
+            failid += [t.küsimused for t in stseenid.loe_toad("toad.json")]
+    nimed = objektide_nimed(failid)
+
+    print(f"{tulemus['sessioone']} sessiooni, {tulemus['kirjeid']} kirjet ({kulunud:.2f} s)")
+    print(f"{'objekt':<22}{'nimi':<28}{'avatud':>7}{'vastuseid':>10}{'vale':>7}{'1. õige':>8}"
+          f"{'mediaan':>9}{'katk.':>6}  sagedasim vale")
+    read = sorted(tulemus["küsimused"].items(), key=lambda kv: kv[1]["esimene_õige"])  # raskeim enne
+    for id_, s in read:
+        objekt, nimi, mall = nimed.get(id_, (f"#{id_:08x}", "?", False))
+        if mall:
+            vale = "mall"  # variantidel on eri valikud, valiku number ei ütle midagi
+        else:
+            vale = "-" if s["sagedasim_vale"] is None else str(s["sagedasim_vale"] + 1)
+        print(f"{objekt:<22}{nimi[:27]:<28}{s['avatud']:>7}{s['vastuseid']:>10}{s['vale_osakaal']:>7.0%}"
+              f"{s['esimene_õige']:>8.0%}{s['mediaan_ms'] / 1000:>8.1f}s{s['katkestatud']:>6}  {vale}")
+    lukk = tulemus["lukk"]
+    print(f"lukk: {lukk['katseid']} katset, vale {lukk['vale_osakaal']:.0%}, mediaan {lukk['mediaan_ms'] / 1000:.1f} s")
+
+    if arg.json:
+        väljund = dict(tulemus, küsimused={nimed.get(i, (f"#{i:08x}",))[0]: s for i, s in tulemus["küsimused"].items()})
+        with open(arg.json, "w", encoding="utf-8") as f:
+            json.dump(väljund, f, ensure_ascii=False, indent=2)
+    if arg.tõenäosused:
+        # geomeetrilise mudeli hinnang: õigete vastuste osakaal kõigist vastustest
+        p = {nimed[i][0]: 1 - s["vale_osakaal"] for i, s in tulemus["küsimused"].items() if i in nimed and s["vastuseid"]}
+        with open(arg.tõenäosused, "w", encoding="utf-8") as f:
+            json.dump(p, f, ensure_ascii=False, indent=2)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,194 @@
+"""
+Varade komplekt – taust, objektide pildid (juba õiges suuruses) ja font ühes failis
+
+Faili ülesehitus:
+ - MAAGIA (8 baiti), indeksi pikkus (4 baiti, little-endian), indeks JSON-ina
+ - seejärel andmed: pildid toorete pikslitena ekraani formaadis (BGRA), font failina
+
+Indeksis on iga vara kohta allikafaili suurus, muutmisaeg ja SHA-1 räsi ning skaala.
+Kui mõni allikas on muutunud (või vajalik vara puudub), tuleb komplekt uuesti ehitada.
+
+Mängu ajal avatakse fail mmap-iga ja pinnad luuakse otse selle mälust
+(pygame.image.frombuffer), ilma PNG lahtipakkimise ja skaleerimiseta.
+
+pygame imporditakse alles funktsioonides, mis pindu teevad: allika_info ja allikas_sama
+kasutab ka küsimustepank, mida laeb pygame'ita klassiserver (vt mangureeglid.py).
+
+Käsitsi ehitamine: python varad.py
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import mmap
+import os
+import struct
+import sys
+from dataclasses import dataclass
+from typing import TYPE_CHECKING, Optional, Union
+
+if TYPE_CHECKING:
+    import pygame
+
+MAAGIA = b"VARAD01\n"
+VERSIOON = 1
+JOONDUS = 64  # iga vara algab 64 baidi piirilt
+
+
+@dataclass(frozen=True)
+class Vara:
+    liik: str  # taust | pilt | font
+    allikas: str
+    skaala: float = 1.0
+    suurus: Optional[tuple[int, int]] = None  # taustal lõplik suurus
+
+    @property
+    def nimi(self) -> str:
+        suurus = f"{self.suurus[0]}x{self.suurus[1]}" if self.suurus else "-"
+        return f"{self.liik}:{self.allikas}@{self.skaala:g}:{suurus}"
+
+
+def faili_räsi(tee: str) -> str:
+    h = hashlib.sha1()
+    with open(tee, "rb") as f:
+        for tükk in iter(lambda: f.read(1 << 20), b""):
+            h.update(tükk)
+    return h.hexdigest()
+
+
+def allika_info(tee: str) -> dict:
+    st = os.stat(tee)
+    return {"baite": st.st_size, "mtime_ns": st.st_mtime_ns, "räsi": faili_räsi(tee)}
+
+
+def allikas_sama(kirje: dict) -> bool:
+    """Kas allikafail on sama, mis komplekti ehitamisel (kõigepealt odav stat, siis räsi)."""
+    try:
+        st = os.stat(kirje["allikas"])
+    except OSError:
+        return False
+    if st.st_size == kirje["baite"] and st.st_mtime_ns == kirje["mtime_ns"]:
+        return True
+    return st.st_size == kirje["baite"] and faili_räsi(kirje["allikas"]) == kirje["räsi"]
+
+
+def ehita(tee: str, sisu: dict[Vara, Union[pygame.Surface, bytes]]) -> None:
+    """Kirjutab komplekti (ajutisse faili ja siis rename, et pooleli fail ei jääks)."""
+    import pygame
+
+    kirjed: dict[str, dict] = {}
+    andmed: list[bytes] = []
+    nihe = 0
+    for vara, väärtus in sisu.items():
+        if isinstance(väärtus, pygame.Surface):
+            toores = pygame.image.tobytes(väärtus, "BGRA")
+            kirje = {"formaat": "BGRA", "mõõdud": list(väärtus.get_size())}
+        else:
+            toores = bytes(väärtus)
+            kirje = {"formaat": "toores"}
+        kirje.update(allika_info(vara.allikas), allikas=vara.allikas, nihe=nihe, pikkus=len(toores))
+        kirjed[vara.nimi] = kirje
+
+        täide = -len(toores) % JOONDUS
+        andmed.append(toores + b"\0" * täide)
+        nihe += len(toores) + täide
+
+    indeks = json.dumps({
+        "versioon": VERSIOON,
+        "baidijärjestus": sys.byteorder,
+        "kirjed": kirjed,
+    }, ensure_ascii=False).encode("utf-8")
+    päis = MAAGIA + struct.pack("<I", len(indeks)) + indeks
+    päis += b"\0" * (-len(päis) % JOONDUS)
+
+    ajutine = tee + ".tmp"
+    with open(ajutine, "wb") as f:
+        f.write(päis)
+        for tükk in andmed:
+            f.write(tükk)
+    os.replace(ajutine, tee)
+
+
+class Komplekt:
+    """Avatud (mmap) komplekt. Pinnad viitavad otse faili mälule, seega tuleb objekti hoida alles."""
+
+    def __init__(self, tee: str):
+        self.tee = tee
+        self._fail = open(tee, "rb")
+        try:
+            self._mm = mmap.mmap(self._fail.fileno(), 0, access=mmap.ACCESS_READ)
+            if self._mm[:len(MAAGIA)] != MAAGIA:
+                raise ValueError(f"'{tee}' ei ole varade komplekt")
+            (pikkus,) = struct.unpack_from("<I", self._mm, len(MAAGIA))
+            algus = len(MAAGIA) + 4
+            indeks = json.loads(self._mm[algus:algus + pikkus].decode("utf-8"))
+        except Exception:
+            self._fail.close()
+            raise
+        self._andmete_algus = algus + pikkus + (-(algus + pikkus) % JOONDUS)
+        self.versioon = indeks.get("versioon")
+        self.baidijärjestus = indeks.get("baidijärjestus")
+        self.kirjed: dict[str, dict] = indeks.get("kirjed", {})
+
+    def sobib(self, varad: list[Vara]) -> bool:
+        if self.versioon != VERSIOON or self.baidijärjestus != sys.byteorder:
+            return False
+        for vara in varad:
+            kirje = self.kirjed.get(vara.nimi)
+            if kirje is None or not allikas_sama(kirje):
+                return False
+        return True
+
+    def sulge(self) -> None:
+        self._mm.close()
+        self._fail.close()
+
+    def _vaade(self, kirje: dict) -> memoryview:
+        algus = self._andmete_algus + kirje["nihe"]
+        return memoryview(self._mm)[algus:algus + kirje["pikkus"]]
+
+    def pind(self, vara: Vara) -> Optional[pygame.Surface]:
+        kirje = self.kirjed.get(vara.nimi)
+        if kirje is None or kirje["formaat"] != "BGRA":
+            return None
+        import pygame
+
+        return pygame.image.frombuffer(self._vaade(kirje), tuple(kirje["mõõdud"]), "BGRA")
+
+    def baidid(self, vara: Vara) -> Optional[bytes]:
+        kirje = self.kirjed.get(vara.nimi)
+        if kirje is None:
+            return None
+        return self._vaade(kirje).tobytes()
+
+
+def ava(tee: str, varad: list[Vara]) -> Optional[Komplekt]:
+    """Avab komplekti, kui see on olemas ja kõigi varadega ajakohane; muidu None."""
+    if not os.path.exists(tee):
+        return None
+    try:
+        komplekt = Komplekt(tee)
+    except (OSError, ValueError, struct.error):
+        return None
+    if not komplekt.sobib(varad):
+        komplekt.sulge()
+        return None
+    return komplekt
+
+
+def main() -> None:
+    os.environ.setdefault("SDL_VIDEODRIVER", "dummy")
+    import pygame
+
+    import game
+
+    pygame.init()
+    pygame.display.set_mode((game.AKNA_LAIUS, game.AKNA_KÕRGUS))
+    varad = game.vajalikud_varad(game.loe_küsimused())
+    ehita(game.VARADE_KOMPLEKT, {v: game.dekodeeri_vara(v) for v in varad})
+    print(f"{game.VARADE_KOMPLEKT}: {len(varad)} vara, {os.path.getsize(game.VARADE_KOMPLEKT)} baiti")
+
+
+if __name__ == "__main__":
+    main()